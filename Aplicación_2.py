@@ -5,10 +5,21 @@ import numpy as np
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import io, csv, re
-from datetime import timedelta
-from docx import Document
-from docx.shared import Pt
+import os
+from caat.ingesta import leer_tabular, EXT_CSV, EXT_PARQUET, EXT_FEATHER
+from caat.particiones import conciliar_por_particiones
+from caat.pruebas import (conciliar_todo, conteos, SALIDAS, ETIQUETAS_CONTEO, conciliadas_por_clave,
+                          duplicados_por_clave, generar_conclusion_conteo, recomendaciones, sin_par)
+from caat.cache import TOPE_MB, DirectorioTemporal, cache_sesion, hash_sesion
+from caat.normalizacion import a_fecha
+from caat.entregables import exportar, docx_from_sections, FORMATOS, MIME_DOCX
+from caat import cxc_bancos, trabajos
+from caat.consolidacion import MONEDA_BASE, consolidar_bancos, cuenta_de_archivo, leer_extractos
+from caat.incremental import conciliar_incremental
+from caat.duplicados import REGLAS, VENTANA_DIAS, detectar_duplicados, filas_duplicadas
+from caat.discrepancias import discrepancias as comparar_valores
+from caat.perfil import Perfil, activar, contar, etapa
+from caat.visor import FILAS_POR_PAGINA, Visor, interpretar_filtro
 
 # ------------------------- Apariencia -------------------------
 st.set_page_config(page_title="CAAT - Conciliación y Auditoría", layout="wide")
@@ -38,7 +49,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 st.title("📊 CAAT – Conciliación y Auditoría Automatizada")
-st.caption("Soporta **CSV/XLSX/XLS/TXT**. Descargas en **XLSX** y reportes en **DOCX**. "
+st.caption("Soporta **CSV/XLSX/XLS/TXT/Parquet/Feather**. Descargas en **XLSX** y reportes en **DOCX**. "
            "Incluye conciliación **CxC vs Bancos + Aging** con tolerancias, NC/Retenciones y saldos irrisorios.")
 
 # ------------------------- Utilidades comunes -------------------------
@@ -48,43 +59,63 @@ PRUEBAS = [
     "3. Inesperadas en el Destino (Solo en Destino)",
     "4. Discrepancias por ID (Monto/Fecha)",
     "5. Duplicados Internos",
-    "6. CxC vs Bancos + Aging"  # NUEVA
+    "6. CxC vs Bancos + Aging",  # NUEVA
+    "7. Pruebas 1–5 en una pasada"
 ]
 CAMPOS_CLAVE = ["ID_Transaccion", "Fecha", "Monto", "ID_Entidad"]
 CAMPOS_ID = ["ID_Transaccion", "ID_Entidad"]
 
-def sniff_delimiter(sample_bytes: bytes):
-    try:
-        sample = sample_bytes.decode('utf-8', errors='ignore')
-        dialect = csv.Sniffer().sniff(sample, delimiters=";,|\t")
-        return dialect.delimiter
-    except Exception:
-        return None
+TIPOS_ARCHIVO = ["xlsx", "xls", "csv", "txt", "parquet", "feather"]
 
 def read_any(file, widget_key="sheet"):
+    with etapa(f"leer {file.name}"):
+        df = _read_any(file, widget_key)
+        contar("filas", len(df))
+    return df
+
+def _hash(file):
+    # un solo recorrido del contenido por archivo subido, aunque el rerun lo pida varias veces
+    return hash_sesion(st.session_state, file)
+
+def _read_any(file, widget_key):
+    # Caché por contenido: los reruns de Streamlit no vuelven a parsear el mismo archivo
     name = file.name.lower()
-    if name.endswith(".csv") or name.endswith(".txt"):
-        data = file.read()
-        if isinstance(data, bytes):
-            delim = sniff_delimiter(data[:4096])
-            bio = io.BytesIO(data)
-            if delim:
-                try: return pd.read_csv(bio, sep=delim, engine="python")
-                except Exception: pass
-            bio.seek(0)
-            try: return pd.read_csv(bio, sep=None, engine="python")
-            except Exception:
-                bio.seek(0); return pd.read_csv(bio, sep=None, engine="python", encoding="latin-1")
-        else:
-            return pd.read_csv(io.StringIO(data))
+    cache = cache_sesion(st.session_state, "tablas")
+    h = _hash(file)
+    if name.endswith(EXT_CSV + EXT_PARQUET + EXT_FEATHER):
+        df = cache.get(("leido", h))
+        if df is None:
+            # una sola pasada: codificación/delimitador detectados una vez, motor pyarrow/C y plan de tipos
+            df, metricas = leer_tabular(file, ids=CAMPOS_ID, montos=["Monto"], fechas=["Fecha"],
+                                        medir_memoria=mostrar_metricas_lectura)
+            cache.put(("leido", h), df)
+            if mostrar_metricas_lectura:
+                pico = f", pico {metricas['pico_mb']} MB" if metricas["pico_mb"] is not None else ""
+                st.caption(f"⏱️ {file.name}: {metricas['filas']:,} filas en {metricas['segundos']:.2f}s "
+                           f"({metricas['filas_s'] or 0:,} filas/s, motor {metricas['motor']}{pico})")
     else:
         # Excel
         try:
-            xls = pd.ExcelFile(file)
-            sheet = st.selectbox("📄 Hoja de Excel", xls.sheet_names, key=widget_key)
-            return pd.read_excel(xls, sheet_name=sheet)
+            hojas = cache.obtener(("hojas", h), lambda: pd.ExcelFile(file).sheet_names)
+            sheet = st.selectbox("📄 Hoja de Excel", hojas, key=widget_key)
+            df = cache.get(("leido", h, sheet))
+            if df is None:
+                file.seek(0); df = cache.put(("leido", h, sheet), pd.read_excel(file, sheet_name=sheet))
         except Exception:
-            return pd.read_excel(file)
+            file.seek(0); df = pd.read_excel(file)
+    # copia superficial: las columnas que agregue cada prueba no tocan el objeto cacheado
+    return df.copy(deep=False)
+
+def read_many(files, widget_key="sheet"):
+    # CSV/Parquet/Feather aún no leídos: en hilos (E/S); luego read_any los toma de la caché (Excel, uno a uno)
+    cache = cache_sesion(st.session_state, "tablas")
+    faltan = [f for f in files if f.name.lower().endswith(EXT_CSV + EXT_PARQUET + EXT_FEATHER)
+              and cache.get(("leido", _hash(f))) is None]
+    if len(faltan) > 1:
+        leidos = leer_extractos(faltan, lambda f: leer_tabular(f, ids=CAMPOS_ID, montos=["Monto"], fechas=["Fecha"])[0])
+        for f, df in zip(faltan, leidos):
+            cache.put(("leido", _hash(f)), df)
+    return [read_any(f, widget_key if i == 0 else f"{widget_key}_{i}") for i, f in enumerate(files)]
 
 def validar_columnas(df, nombre, requeridas):
     faltantes = [col for col in requeridas if col not in df.columns]
@@ -93,32 +124,28 @@ def validar_columnas(df, nombre, requeridas):
         return False
     return True
 
-def to_xlsx_bytes(sheets: dict):
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as w:
-        for name, df in sheets.items():
-            nm = str(name)[:31]
-            (df if isinstance(df, pd.DataFrame) else pd.DataFrame(df)).to_excel(w, index=False, sheet_name=nm)
-    return buf.getvalue()
-
-def docx_from_sections(title: str, sections: list[tuple[str, list[str]]]) -> bytes:
-    d = Document(); d.add_heading(title, level=1)
-    for heading, bullets in sections:
-        d.add_heading(heading, level=2)
-        for item in bullets:
-            p = d.add_paragraph(item, style="List Bullet")
-            p.style.font.size = Pt(11)
-    bio = io.BytesIO(); d.save(bio); return bio.getvalue()
-
-def coerce_amount(series: pd.Series) -> pd.Series:
-    s = series.astype(str).str.replace(r"\.", "", regex=True).str.replace(",", ".", regex=False)
-    return pd.to_numeric(s, errors="coerce")
-
 def coerce_date(series: pd.Series) -> pd.Series:
-    return pd.to_datetime(series, errors="coerce", dayfirst=True)
+    # formato fijo detectado en una muestra; solo las filas que no encajan usan el parseo flexible
+    with etapa("normalizar fecha", filas=len(series)):
+        return a_fecha(series)
 
 # ------------------------- Panel lateral -------------------------
 opcion = st.sidebar.selectbox("Selecciona la prueba CAAT", PRUEBAS)
+mostrar_metricas_lectura = st.sidebar.checkbox("⏱️ Métricas de lectura", value=False,
+                                               help="Filas/s y pico de memoria de cada archivo leído.")
+registrar_perfil = st.sidebar.checkbox("⏱️ Perfil de rendimiento", value=True,
+                                       help="Tiempo, memoria y conteos por etapa (panel 'Rendimiento' al final).")
+# sin perfil registrado las etapas instrumentadas no hacen nada
+perfil_app = activar(Perfil() if registrar_perfil else None)
+if st.sidebar.button("🧹 Vaciar caché de la sesión",
+                     help="Descarta archivos leídos, resultados y páginas guardados (y la salida del modo streaming); "
+                          "todo se recalcula en la próxima ejecución."):
+    anterior = cache_sesion(st.session_state, "tablas").descartar(st.session_state.pop("clave_streaming", None))
+    if anterior is not None:
+        anterior[0].borrar()
+    for nivel in TOPE_MB:
+        cache_sesion(st.session_state, nivel).limpiar()
+    st.sidebar.caption("Caché vaciada.")
 
 # ------------------------- PRUEBAS 1–5 (tu base existente) -------------------------
 conteo_resultados = {
@@ -129,88 +156,216 @@ conteo_resultados = {
     "Duplicados": 0
 }
 
-def generar_conclusion_conteo(conteo):
-    conclusion = "🔍 **Conclusión General del Análisis**\n\nDurante la conciliación se identificaron:\n\n"
-    if conteo["Faltantes en destino"] > 0:
-        conclusion += f"- **{conteo['Faltantes en destino']}** transacciones ausentes en el destino.\n"
-    if conteo["Inesperadas en destino"] > 0:
-        conclusion += f"- **{conteo['Inesperadas en destino']}** transacciones inesperadas en el destino.\n"
-    if conteo["Discrepancias de valor"] > 0:
-        conclusion += f"- **{conteo['Discrepancias de valor']}** discrepancias en monto o fecha.\n"
-    if conteo["Duplicados"] > 0:
-        conclusion += f"- **{conteo['Duplicados']}** registros duplicados.\n"
-    if all(conteo[k] == 0 for k in ["Faltantes en destino","Inesperadas en destino","Discrepancias de valor","Duplicados"]):
-        conclusion += "- No se detectaron anomalías significativas. Conciliación correcta.\n"
-    conclusion += "\n📌 Prioriza los casos con mayor materialidad e impacto."
-    return conclusion
-
-def generar_recomendacion(nombre, cantidad, umbral, mensaje_ok, mensaje_alerta):
-    if cantidad > umbral:
-        return f"🔴 Riesgo alto en **{nombre}**: {mensaje_alerta}"
-    elif cantidad > 0:
-        return f"🟡 Atención en **{nombre}**: {mensaje_alerta}"
-    else:
-        return f"🟢 **{nombre}** en buen estado: {mensaje_ok}"
-
 if opcion != PRUEBAS[4] and opcion != PRUEBAS[5]:
-    file_origen = st.file_uploader("📂 Archivo de Origen", type=["xlsx", "xls", "csv", "txt"], key="origen")
-    file_destino = st.file_uploader("📁 Archivo de Destino", type=["xlsx", "xls", "csv", "txt"], key="destino")
+    file_origen = st.file_uploader("📂 Archivo de Origen", type=TIPOS_ARCHIVO, key="origen")
+    file_destino = st.file_uploader("📁 Archivo de Destino", type=TIPOS_ARCHIVO, key="destino")
+    if opcion == PRUEBAS[3]:
+        t1, t2 = st.columns(2)
+        tol_monto4 = t1.number_input("Tolerancia de monto", min_value=0.0, value=0.0, step=0.01,
+                                     help="Diferencias de monto hasta este valor no cuentan (se comparan centavos enteros).")
+        tol_dias4 = t2.number_input("Tolerancia de días", min_value=0, value=0, step=1)
 elif opcion == PRUEBAS[4]:
-    file_data = st.file_uploader("📥 Archivo a Analizar", type=["xlsx", "xls", "csv", "txt"], key="uno")
-
-if opcion == PRUEBAS[0] and file_origen and file_destino:
-    df1, df2 = read_any(file_origen, "sheet_o"), read_any(file_destino, "sheet_d")
-    if validar_columnas(df1, "origen", CAMPOS_CLAVE) and validar_columnas(df2, "destino", CAMPOS_CLAVE):
-        df1["Fecha"] = coerce_date(df1["Fecha"]); df2["Fecha"] = coerce_date(df2["Fecha"])
-        conciliadas = pd.merge(df1, df2, how="inner", on=CAMPOS_CLAVE)
-        conteo_resultados["Conciliadas"] = len(conciliadas)
-        st.success(f"✅ {len(conciliadas)} transacciones conciliadas.")
-        st.dataframe(conciliadas)
-        st.download_button("⬇ Descargar", conciliadas.to_csv(index=False).encode(), "conciliadas.csv", "text/csv")
-
-elif opcion == PRUEBAS[1] and file_origen and file_destino:
-    df1, df2 = read_any(file_origen, "sheet_o"), read_any(file_destino, "sheet_d")
-    if validar_columnas(df1, "origen", CAMPOS_CLAVE) and validar_columnas(df2, "destino", CAMPOS_CLAVE):
-        df1["Fecha"] = coerce_date(df1["Fecha"]); df2["Fecha"] = coerce_date(df2["Fecha"])
-        merge = pd.merge(df1, df2, how="left", on=CAMPOS_CLAVE, indicator=True)
-        solo_origen = merge[merge["_merge"] == "left_only"].drop(columns="_merge")
-        conteo_resultados["Faltantes en destino"] = len(solo_origen)
-        st.warning(f"❗ {len(solo_origen)} transacciones solo en el origen.")
-        st.dataframe(solo_origen)
-        st.download_button("⬇ Descargar", solo_origen.to_csv(index=False).encode(), "solo_origen.csv", "text/csv")
-
-elif opcion == PRUEBAS[2] and file_origen and file_destino:
-    df1, df2 = read_any(file_origen, "sheet_o"), read_any(file_destino, "sheet_d")
-    if validar_columnas(df1, "origen", CAMPOS_CLAVE) and validar_columnas(df2, "destino", CAMPOS_CLAVE):
-        df1["Fecha"] = coerce_date(df1["Fecha"]); df2["Fecha"] = coerce_date(df2["Fecha"])
-        merge = pd.merge(df2, df1, how="left", on=CAMPOS_CLAVE, indicator=True)
-        solo_destino = merge[merge["_merge"] == "left_only"].drop(columns="_merge")
-        conteo_resultados["Inesperadas en destino"] = len(solo_destino)
-        st.warning(f"🚨 {len(solo_destino)} transacciones inesperadas en el destino.")
-        st.dataframe(solo_destino)
-        st.download_button("⬇ Descargar", solo_destino.to_csv(index=False).encode(), "solo_destino.csv", "text/csv")
-
-elif opcion == PRUEBAS[3] and file_origen and file_destino:
+    file_data = st.file_uploader("📥 Archivo a Analizar", type=TIPOS_ARCHIVO, key="uno")
+    reglas5 = st.multiselect("Reglas de duplicado", list(REGLAS), default=["exacto"], format_func=REGLAS.get,
+                             help="Exacto: misma clave normalizada. Entidad y monto ± días: misma entidad y monto con "
+                                  "fechas cercanas. ID transpuesto: dos dígitos contiguos intercambiados.")
+    ventana5 = st.number_input("Ventana de días (casi duplicados)", min_value=0, value=VENTANA_DIAS, step=1)
+    fuera_memoria5 = st.checkbox("🧮 Motor por bloques (archivos muy grandes)", value=False,
+                                 help="Lee por bloques y guarda en disco solo las claves con hash de 64 bits; "
+                                      "no carga el archivo completo.")
+
+def resultado(clave, calcular):
+    # Resultados por (hashes de archivos, hojas, parámetros): los reruns de paginación no recalculan la prueba
+    return cache_sesion(st.session_state, "tablas").obtener(clave, calcular)
+
+def ver_tabla(df, nombre, clave, archivo=None):
+    # Visor paginado del lado del servidor: solo la página visible viaja al navegador, como Arrow
+    # sin clave estable (p. ej. conciliación incremental) no se cachean órdenes ni páginas
+    visor = Visor(df, (clave, nombre), cache_sesion(st.session_state, "vistas") if clave is not None else None)
+    columnas = [str(c) for c in df.columns]
+    b1, b2, b3 = st.columns([3, 2, 1])
+    busqueda = b1.text_input("🔎 Buscar", key=f"buscar_{nombre}")
+    orden = b2.selectbox("Ordenar por", [None] + list(df.columns), key=f"orden_{nombre}",
+                         format_func=lambda c: "(original)" if c is None else str(c))
+    ascendente = b3.checkbox("Asc.", value=True, key=f"asc_{nombre}")
+    f1, f2, f3 = st.columns([2, 3, 1])
+    col_filtro = f1.selectbox("Filtrar columna", [None] + list(df.columns), key=f"fcol_{nombre}",
+                              format_func=lambda c: "(ninguna)" if c is None else str(c))
+    texto_filtro = f2.text_input("Valor (contiene, o rango desde..hasta)", key=f"fval_{nombre}",
+                                 disabled=col_filtro is None)
+    tamano = f3.selectbox("Filas", [25, FILAS_POR_PAGINA, 100, 500], index=1, key=f"tam_{nombre}")
+    filtros = {col_filtro: interpretar_filtro(df, col_filtro, texto_filtro)} if col_filtro is not None else {}
+    consulta = dict(orden=orden, ascendente=ascendente, filtros=filtros, busqueda=busqueda)
+    total = len(visor.filas(**consulta))
+    paginas = max(1, -(-total // tamano))
+    numero = st.number_input(f"Página (de {paginas:,})", min_value=1, max_value=paginas, value=1, step=1,
+                             key=f"pag_{nombre}") if paginas > 1 else 1
+    tabla, total = visor.pagina_arrow(numero, tamano, **consulta)
+    st.dataframe(tabla, hide_index=True)
+    inicio = (numero - 1) * tamano
+    st.caption(f"Filas {min(inicio + 1, total):,}–{min(inicio + tamano, total):,} de {total:,}"
+               + (f" (filtradas de {len(df):,})" if total != len(df) else "") + " · columnas: " + ", ".join(columnas[:12])
+               + ("…" if len(columnas) > 12 else ""))
+    # el CSV completo se arma solo al pulsar la descarga
+    st.download_button("⬇ Descargar", lambda: df.to_csv(index=False).encode(), archivo or f"{nombre}.csv", "text/csv",
+                       key=f"dl_{nombre}")
+
+def mostrar_salidas(resultados, clave_datos=None):
+    # una pestaña por salida; acepta DataFrames o (filas, ruta CSV) del modo streaming
+    for tab, (clave, res) in zip(st.tabs([ETIQUETAS_CONTEO[k] for k in resultados]), resultados.items()):
+        with tab:
+            if isinstance(res, pd.DataFrame):
+                ver_tabla(res, clave, clave_datos, f"{clave}.csv")
+            elif res[0]:
+                st.dataframe(pd.read_csv(res[1], nrows=1000))
+                with open(res[1], "rb") as f:
+                    st.download_button("⬇ Descargar", f, f"{clave}.csv", "text/csv", key=f"dl_{clave}")
+
+modo_streaming = False
+if opcion in PRUEBAS[:4] + [PRUEBAS[6]]:
+    modo_streaming = st.sidebar.checkbox("🌊 Modo streaming (archivos grandes)", value=False,
+                                         help="Particiona ambos archivos en disco por ID y concilia por partes con memoria acotada.")
+    if modo_streaming:
+        presupuesto_mb = st.sidebar.number_input("💾 Presupuesto de memoria (MB)", min_value=64, value=512, step=64)
+
+# resultado del modo streaming: uno por par de archivos, con su directorio de salida en la caché de tablas;
+# al cambiar los archivos (o salir del modo) la entrada anterior se descarta y su directorio se borra
+clave_stream = (("streaming", _hash(file_origen), _hash(file_destino), presupuesto_mb)
+                if modo_streaming and file_origen and file_destino else None)
+if st.session_state.get("clave_streaming") not in (None, clave_stream):
+    anterior = cache_sesion(st.session_state, "tablas").descartar(st.session_state["clave_streaming"])
+    if anterior is not None:
+        anterior[0].borrar()
+st.session_state["clave_streaming"] = clave_stream
+
+if clave_stream:
+    def conciliar_streaming():
+        directorio = DirectorioTemporal("caat_stream_")
+        with etapa("conciliar por particiones"):
+            return directorio, conciliar_por_particiones(file_origen, file_destino, directorio.ruta, presupuesto_mb)
+    try:
+        directorio_stream, res = cache_sesion(st.session_state, "tablas").obtener(clave_stream, conciliar_streaming)
+    except KeyError as e:
+        st.error(f"❌ Los archivos no contienen las columnas necesarias: {e}")
+        st.stop()
+    for clave, (n, _) in res.items():
+        conteo_resultados[ETIQUETAS_CONTEO[clave]] = n
+    if opcion == PRUEBAS[6]:
+        st.info("🌊 Modo streaming: pruebas 1–5 calculadas por particiones en disco.")
+        mostrar_salidas(res)
+    else:
+        clave = SALIDAS[PRUEBAS.index(opcion)]
+        n, ruta = res[clave]
+        st.info(f"🌊 Modo streaming: {n} filas en '{clave}' (se calcularon las pruebas 1–5 en una pasada por particiones).")
+        if n:
+            st.dataframe(pd.read_csv(ruta, nrows=1000))
+            with open(ruta, "rb") as f:
+                st.download_button("⬇ Descargar", f, f"{clave}.csv", "text/csv")
+
+od_listo = opcion in PRUEBAS[:4] + [PRUEBAS[6]] and not modo_streaming and bool(file_origen and file_destino)
+if od_listo:
+    # read_any en cada rerun mantiene los selectores de hoja; las pruebas se cachean por contenido
     df1, df2 = read_any(file_origen, "sheet_o"), read_any(file_destino, "sheet_d")
-    if validar_columnas(df1, "origen", CAMPOS_CLAVE) and validar_columnas(df2, "destino", CAMPOS_CLAVE):
-        df1["Fecha"] = coerce_date(df1["Fecha"]); df2["Fecha"] = coerce_date(df2["Fecha"])
-        merged = pd.merge(df1, df2, on=CAMPOS_ID, how="inner", suffixes=("_origen", "_destino"))
-        discrepancias = merged[(merged["Monto_origen"] != merged["Monto_destino"]) |
-                               (merged["Fecha_origen"] != merged["Fecha_destino"])]
-        conteo_resultados["Discrepancias de valor"] = len(discrepancias)
-        st.warning(f"⚠️ {len(discrepancias)} discrepancias encontradas.")
-        st.dataframe(discrepancias)
-        st.download_button("⬇ Descargar", discrepancias.to_csv(index=False).encode(), "discrepancias.csv", "text/csv")
+    clave_od = (_hash(file_origen), st.session_state.get("sheet_o"),
+                _hash(file_destino), st.session_state.get("sheet_d"))
+    od_listo = validar_columnas(df1, "origen", CAMPOS_CLAVE) and validar_columnas(df2, "destino", CAMPOS_CLAVE)
+
+def fechas_od():
+    # solo al calcular una prueba; los reruns de paginación usan el resultado cacheado
+    df1["Fecha"] = coerce_date(df1["Fecha"]); df2["Fecha"] = coerce_date(df2["Fecha"])
+    return df1, df2
+
+if opcion == PRUEBAS[6] and od_listo:
+    # Un solo merge externo por CAMPOS_ID alimenta las cinco pruebas
+    def pruebas_1_5():
+        with etapa("pruebas 1–5"):
+            return conciliar_todo(*fechas_od())
+    resultados = resultado(("pruebas 1–5",) + clave_od, pruebas_1_5)
+    conteo_resultados.update(conteos(resultados))
+    st.success("✅ Pruebas 1–5 en una pasada: " + " | ".join(f"{k}: {v}" for k, v in conteos(resultados).items()))
+    mostrar_salidas(resultados, clave_od)
+
+elif opcion == PRUEBAS[0] and od_listo:
+    def prueba1():
+        with etapa("prueba 1"):
+            return conciliadas_por_clave(*fechas_od())
+    conciliadas = resultado(("prueba 1",) + clave_od, prueba1)
+    conteo_resultados["Conciliadas"] = len(conciliadas)
+    st.success(f"✅ {len(conciliadas)} transacciones conciliadas.")
+    ver_tabla(conciliadas, "conciliadas", clave_od, "conciliadas.csv")
+
+elif opcion == PRUEBAS[1] and od_listo:
+    def prueba2():
+        with etapa("prueba 2"):
+            a, b = fechas_od()
+            return sin_par(a, b)
+    solo_origen = resultado(("prueba 2",) + clave_od, prueba2)
+    conteo_resultados["Faltantes en destino"] = len(solo_origen)
+    st.warning(f"❗ {len(solo_origen)} transacciones solo en el origen.")
+    ver_tabla(solo_origen, "solo_origen", clave_od, "solo_origen.csv")
+
+elif opcion == PRUEBAS[2] and od_listo:
+    def prueba3():
+        with etapa("prueba 3"):
+            a, b = fechas_od()
+            return sin_par(b, a)
+    solo_destino = resultado(("prueba 3",) + clave_od, prueba3)
+    conteo_resultados["Inesperadas en destino"] = len(solo_destino)
+    st.warning(f"🚨 {len(solo_destino)} transacciones inesperadas en el destino.")
+    ver_tabla(solo_destino, "solo_destino", clave_od, "solo_destino.csv")
+
+elif opcion == PRUEBAS[3] and od_listo:
+    # pares 1 a 1 por ID (sin multiplicar filas repetidas), montos en centavos y fechas en días con tolerancia
+    def prueba4():
+        with etapa("prueba 4"):
+            tabla, resumen = comparar_valores(*fechas_od(), tol_monto4, tol_dias4)
+            contar("discrepancias", len(tabla))
+        return tabla, resumen
+    clave4 = clave_od + (tol_monto4, tol_dias4)
+    discrepancias, resumen4 = resultado(("prueba 4",) + clave4, prueba4)
+    conteo_resultados["Discrepancias de valor"] = len(discrepancias)
+    st.warning(f"⚠️ {len(discrepancias)} discrepancias encontradas.")
+    st.dataframe(resumen4, hide_index=True)
+    ver_tabla(discrepancias, "discrepancias", clave4, "discrepancias.csv")
+
+elif opcion == PRUEBAS[4] and file_data and (fuera_memoria5 or set(reglas5) != {"exacto"}):
+    # Motor de duplicados: claves normalizadas por bloques y baldes en disco; solo se leen las filas en grupos
+    fuente5 = file_data if file_data.name.lower().endswith(EXT_CSV + EXT_PARQUET) else read_any(file_data, "sheet_uno")
+    clave5 = (_hash(file_data), st.session_state.get("sheet_uno"), tuple(reglas5), ventana5)
+
+    def grupos5_():
+        with etapa("duplicados por bloques"):
+            grupos, resumen = detectar_duplicados(fuente5, reglas5 or ["exacto"], ventana5)
+            contar("filas en grupos", len(grupos))
+        return grupos, resumen
+    try:
+        grupos5, resumen5 = resultado(("grupos duplicados",) + clave5, grupos5_)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+    conteo_resultados["Duplicados"] = grupos5["_FILA"].nunique()
+    st.warning(f"🔁 {conteo_resultados['Duplicados']} filas en grupos de duplicados.")
+    st.dataframe(resumen5, hide_index=True)
+
+    def filas5():
+        with etapa("filas duplicadas"):
+            return filas_duplicadas(fuente5, grupos5)
+    duplicados = resultado(("filas duplicadas",) + clave5, filas5)
+    ver_tabla(duplicados, "duplicados", clave5, "duplicados.csv")
 
 elif opcion == PRUEBAS[4] and file_data:
     df = read_any(file_data, "sheet_uno")
     if validar_columnas(df, "archivo único", CAMPOS_CLAVE):
-        df["Fecha"] = coerce_date(df["Fecha"])
-        duplicados = df[df.duplicated(subset=CAMPOS_CLAVE, keep=False)]
+        clave5 = (_hash(file_data), st.session_state.get("sheet_uno"))
+
+        def prueba5():
+            with etapa("prueba 5"):
+                df["Fecha"] = coerce_date(df["Fecha"])
+                return duplicados_por_clave(df)
+        duplicados = resultado(("prueba 5",) + clave5, prueba5)
         conteo_resultados["Duplicados"] = len(duplicados)
         st.warning(f"🔁 {len(duplicados)} duplicados encontrados.")
-        st.dataframe(duplicados)
-        st.download_button("⬇ Descargar", duplicados.to_csv(index=False).encode(), "duplicados.csv", "text/csv")
+        ver_tabla(duplicados, "duplicados", clave5, "duplicados.csv")
 
 # ------------------------- NUEVA PRUEBA 6: CxC vs Bancos + Aging -------------------------
 if opcion == PRUEBAS[5]:
@@ -219,7 +374,7 @@ if opcion == PRUEBAS[5]:
   <div class="section-title">6️⃣ Cuentas por Cobrar (CxC) vs Bancos + Aging</div>
   <div class="section-desc">
     Concilia saldos de clientes (CxC) con depósitos/transferencias bancarias. Detecta <strong>pagos no aplicados</strong>,
-    <strong>NC/retenciones no cruzadas</strong>, <strong>saldos irrisorios</strong> y clasifica antigüedad (0–30/31–60/61–90/90+).
+    <strong>NC/retenciones no cruzadas</strong>, <strong>saldos irrisorios</strong> y clasifica antigüedad por tramos configurables (p. ej. 0–30/31–60/61–90/90+).
   </div>
 </div>
 """, unsafe_allow_html=True)
@@ -228,212 +383,259 @@ if opcion == PRUEBAS[5]:
         st.markdown("""
 - **Pagos en banco no aplicados** a facturas (Tesorería vs Cobranzas).
 - **Facturas vencidas** con alto riesgo (aging configurable).
-- **Notas de crédito/retenciones** no aplicadas (indicios por signo y palabras clave).
+- **Notas de crédito/retenciones**: se compensan contra sus facturas (por referencia, tasa de retención o monto) antes del cruce con el banco; las que quedan sin aplicar se listan aparte.
 - **Saldos irrisorios** que deberían sanease según política.
+- **Varias cuentas y monedas**: se cargan varios extractos a la vez, se convierten a la moneda base con la tabla de tipos de cambio y se concilian juntos contra la misma CxC, con desglose por cuenta.
   
 **Entregables**  
-- **XLSX**: Resumen, Conciliados, PendientesCxC, PagosNoAplicadosBanco, Aging, SaldosIrrisorios, PosiblesNC_Retenciones.  
+- **XLSX**: Resumen (con desglose por cuenta), Conciliados, PendientesCxC, PagosNoAplicadosBanco, Aging, SaldosIrrisorios, PosiblesNC_Retenciones, CompensacionesNC, PorCuenta.  
 - **DOCX**: Resumen ejecutivo, hallazgos y **recomendaciones accionables**.
 """)
 
     col1, col2 = st.columns(2)
     with col1:
-        file_cxc = st.file_uploader("📂 CxC (facturas/abonos por cliente)", type=["xlsx","xls","csv","txt"], key="cxc")
+        file_cxc = st.file_uploader("📂 CxC (facturas/abonos por cliente)", type=TIPOS_ARCHIVO, key="cxc")
     with col2:
-        file_bank = st.file_uploader("🏦 Extracto bancario", type=["xlsx","xls","csv","txt"], key="bank")
+        files_bank = st.file_uploader("🏦 Extractos bancarios (uno o varios)", type=TIPOS_ARCHIVO, key="bank",
+                                      accept_multiple_files=True)
+
+    # varios extractos o una tabla de tasas: se consolidan por cuenta en la moneda base
+    with st.expander("💱 Cuentas y monedas", expanded=len(files_bank) > 1):
+        file_tasas = st.file_uploader("Tipos de cambio (Fecha, Moneda, Tasa en moneda base)", type=TIPOS_ARCHIVO, key="tasas6")
+        moneda_base6 = st.text_input("Moneda base", value=MONEDA_BASE).strip().upper() or MONEDA_BASE
+        monedas6 = {}
+        for f in files_bank if len(files_bank) > 1 or file_tasas else []:
+            cuenta = cuenta_de_archivo(f.name)
+            monedas6[cuenta] = st.text_input(f"Moneda de la cuenta {cuenta}", value=moneda_base6, key=f"moneda6_{f.name}",
+                                             help="Se usa si el extracto no trae columna de moneda.").strip().upper()
+    consolidar6 = len(files_bank) > 1 or file_tasas is not None
 
     st.markdown("**Campos mínimos esperados (flexibles en nombre):**")
     st.caption("- CxC: Cliente, NumeroFactura/Referencia, Fecha, Monto (positivo factura, negativo NC/retenciones), Observacion/Glosa (opcional)")
-    st.caption("- Banco: Fecha, Monto (depósitos/transferencias +), Referencia/Concepto")
+    st.caption("- Banco: Fecha, Monto (depósitos/transferencias +), Referencia/Concepto, Cuenta y Moneda (opcionales; si no, el nombre del archivo y la moneda elegida)")
 
     # Parámetros
     with st.expander("⚙️ Parámetros de conciliación", expanded=True):
         tol_monto = st.number_input("🎯 Tolerancia de monto", min_value=0.0, value=0.50, help="Diferencia máxima para considerar un match.")
         tol_dias = st.number_input("🗓️ Ventana de días entre banco y CxC", min_value=0, value=5, help="Diferencia máxima de fechas para match por monto.")
         irrisorio = st.number_input("🟦 Umbral de saldo irrisorio", min_value=0.0, value=5.0)
-        aging_cortes = st.multiselect("📊 Cortes de aging (días)", [30,60,90], default=[30,60,90])
+        aging_cortes = st.multiselect("📊 Cortes de aging (días)", [15,30,45,60,90,120,180,360], default=[30,60,90],
+                                      help="Los tramos se arman con los cortes elegidos: p. ej. 60 y 90 → 0-60, 61-90, 90+.")
+        aging_base = st.radio("📅 Aging desde", ["emision", "vencimiento"], horizontal=True,
+                              format_func={"emision": "Emisión", "vencimiento": "Vencimiento"}.get,
+                              help="Vencimiento: columna de fecha de vencimiento o, si no hay, emisión + plazo de crédito.")
+        plazo_dias = st.number_input("⏳ Plazo de crédito por defecto (días)", min_value=0, value=0,
+                                     help="Se usa para el vencimiento cuando CxC no trae vencimiento ni plazo por factura.")
+        compensar_nc6 = st.checkbox("🧾 Compensar NC/retenciones contra facturas", value=True,
+                                    help="Antes del cruce con el banco: cada NC o retención del cliente se aplica a la factura "
+                                         "que nombra en la observación o, si no, a la que corresponde por tasa de retención "
+                                         "o por monto exacto. Las facturas quedan con saldo neto.")
+        ventana_nc6 = st.number_input("🗓️ Días máximos entre factura y NC/retención", min_value=0, value=90,
+                                      disabled=not compensar_nc6)
+        detectar_parciales = st.checkbox("🧩 Detectar pagos agrupados/parciales", value=True,
+                                         help="Un depósito que paga varias facturas del cliente, o una factura pagada en cuotas.")
+        max_items_parcial = st.number_input("🔢 Máx. documentos por pago agrupado/parcial", min_value=2, max_value=6, value=4)
+        ventana_parcial = st.number_input("🗓️ Ventana de días para pagos agrupados/parciales", min_value=0, value=30)
+        umbral_ref6 = st.slider("🔤 Similitud mínima de referencia", min_value=0.5, max_value=1.0, value=0.8, step=0.05,
+                                help="Compara el número de factura con los tokens del concepto bancario (trigramas). "
+                                     "1.0 = solo referencias que aparecen tal cual.")
+        procesos6 = st.number_input("⚡ Procesos en paralelo", min_value=1, max_value=os.cpu_count() or 1, value=1,
+                                    help="Reparte candidatos (por cliente) y asignación (por componente) entre procesos; "
+                                         "el resultado es idéntico al de 1 proceso.")
+        incremental6 = st.checkbox("🗄️ Conciliación incremental (almacén local)", value=False,
+                                   help="Guarda los enlaces en SQLite y en la siguiente corrida solo concilia las partidas "
+                                        "nuevas o que quedaron abiertas.")
+        almacen6 = st.text_input("📁 Archivo del almacén", value="caat_conciliacion.sqlite", disabled=not incremental6)
+        segundo_plano6 = st.checkbox("⏳ Ejecutar en segundo plano (cola de trabajos)", value=False,
+                                     help="El trabajo corre en un proceso aparte: la app sigue respondiendo, se puede "
+                                          "cancelar y el resultado queda en disco para cualquier sesión del servidor. "
+                                          "En Excel se usa la primera hoja salvo que se haya elegido otra.")
+        etiqueta6 = st.text_input("👤 Analista / etiqueta del trabajo", value="", disabled=not segundo_plano6)
         ejecutar6 = st.button("🔍 Ejecutar conciliación CxC vs Bancos")
 
-    if file_cxc and file_bank and ejecutar6:
+    if ejecutar6 and segundo_plano6 and file_cxc and files_bank:
+        parametros6 = {"tol_monto": tol_monto, "tol_dias": tol_dias, "irrisorio": irrisorio,
+                       "aging_cortes": list(aging_cortes), "aging_base": aging_base, "plazo_dias": plazo_dias,
+                       "compensar_nc": compensar_nc6, "ventana_nc": ventana_nc6,
+                       "detectar_parciales": detectar_parciales, "max_items_parcial": max_items_parcial,
+                       "ventana_parcial": ventana_parcial, "umbral_ref": umbral_ref6, "procesos": procesos6,
+                       "almacen": os.path.abspath(almacen6) if incremental6 else None}
+        st.session_state["trabajo6"] = trabajos.enviar(
+            file_cxc, files_bank if len(files_bank) > 1 else files_bank[0], parametros6,
+            (st.session_state.get("sheet_cxc", 0), st.session_state.get("sheet_bank", 0)), etiqueta6,
+            tasas=file_tasas, moneda_base=moneda_base6, monedas=monedas6)
+        st.session_state["ejecutado6"] = False
+    elif ejecutar6:
+        st.session_state["ejecutado6"] = True
+        st.session_state.pop("ver_trabajo6", None)
+
+    if segundo_plano6 or st.session_state.get("trabajo6"):
+        # el panel se refresca solo (fragmento), sin volver a ejecutar el resto del script
+        @st.fragment(run_every=2)
+        def panel_trabajos6():
+            st.subheader("⏳ Trabajos en segundo plano")
+            lista = trabajos.listar(limite=20)
+            if not lista:
+                st.caption("No hay trabajos en la cola.")
+            propio = st.session_state.get("trabajo6")
+            for e in lista:
+                t1, t2 = st.columns([6, 1])
+                t1.progress(e["avance"], text=f"{'⭐ ' if e['id'] == propio else ''}{e['id']} · {e.get('etiqueta') or '—'} · "
+                                              f"{e['archivos']['cxc']} vs {e['archivos']['banco']} · "
+                                              f"{e['estado']}{' – ' + e['etapa'] if e['etapa'] else ''}")
+                if e["contadores"]:
+                    t1.caption(" · ".join(f"{k}: {v:,}" for k, v in e["contadores"].items()))
+                if e["estado"] == "error":
+                    t1.error(e["error"])
+                if e["estado"] not in trabajos.ESTADOS_FINALES:
+                    if t2.button("✖ Cancelar", key=f"cancelar_{e['id']}", disabled=e.get("cancelacion_pedida", False)):
+                        trabajos.cancelar(e["id"])
+                elif e["estado"] == "terminado" and t2.button("📥 Ver", key=f"ver_{e['id']}"):
+                    st.session_state["ver_trabajo6"] = e["id"]
+                    st.session_state["ejecutado6"] = False
+                    st.rerun(scope="app")
+        panel_trabajos6()
+
+    res6 = None
+    if file_cxc and files_bank and st.session_state.get("ejecutado6"):
+        cache_tablas = cache_sesion(st.session_state, "tablas")
+        cache_pares = cache_sesion(st.session_state, "pares")
         cxc = read_any(file_cxc, "sheet_cxc").rename(columns=lambda x: str(x).strip())
-        bank = read_any(file_bank, "sheet_bank").rename(columns=lambda x: str(x).strip())
-
-        # Heurísticas de columnas
-        def pick(df, choices):
-            for c in df.columns:
-                if c.lower() in [s.lower() for s in choices]: return c
-                if any(re.search(rf"\b{re.escape(s)}\b", c, flags=re.I) for s in choices): return c
-            return None
-
-        col_cli = pick(cxc, ["cliente","id_cliente","ruc","identificacion"])
-        col_ref_cxc = pick(cxc, ["numerofactura","numero_factura","referencia","documento","id_transaccion","id"])
-        col_fecha_cxc = pick(cxc, ["fecha","fecha_emision","fecha_documento"])
-        col_monto_cxc = pick(cxc, ["monto","importe","total","saldo","valor"])
-        col_obs_cxc = pick(cxc, ["observacion","glosa","detalle","descripcion"])
-
-        col_fecha_b = pick(bank, ["fecha","fec","date"])
-        col_monto_b = pick(bank, ["monto","importe","abono","deposito","cr","credito","valor"])
-        col_ref_b = pick(bank, ["referencia","ref","descripcion","concepto","detalle"])
-
-        # Validación mínima
-        req_ok = all([col_fecha_cxc, col_monto_cxc, col_fecha_b, col_monto_b])
-        if not req_ok:
-            st.error("❌ No se pudieron identificar las columnas mínimas (Fecha/Monto) en CxC o Banco.")
-            st.stop()
-
-        # Normalizaciones
-        cxc["_FECHA"] = coerce_date(cxc[col_fecha_cxc])
-        cxc["_MONTO"] = coerce_amount(cxc[col_monto_cxc])
-        cxc["_REF"] = cxc[col_ref_cxc].astype(str).str.strip().str.upper() if col_ref_cxc else ""
-        cxc["_CLI"] = cxc[col_cli].astype(str).str.strip() if col_cli else "SIN_CLIENTE"
-        cxc["_OBS"] = cxc[col_obs_cxc].astype(str) if col_obs_cxc else ""
-
-        bank["_FECHA"] = coerce_date(bank[col_fecha_b])
-        bank["_MONTO"] = coerce_amount(bank[col_monto_b])
-        bank["_REF"] = bank[col_ref_b].astype(str).str.strip().str.upper() if col_ref_b else ""
-
-        cxc = cxc.dropna(subset=["_FECHA","_MONTO"]).copy()
-        bank = bank.dropna(subset=["_FECHA","_MONTO"]).copy()
-
-        # 1) Match exacto por referencia (si hay)
-        matched_ref = pd.DataFrame()
-        if col_ref_cxc and col_ref_b:
-            matched_ref = cxc.merge(bank, on="_REF", suffixes=("_CxC","_Banco"))
-            # filtra por tolerancias también (opcional)
-            matched_ref = matched_ref[(matched_ref["_MONTO_CxC"] - matched_ref["_MONTO_Banco"]).abs() <= tol_monto]
-
-        # 2) Match por monto (+/- tolerancia) y fecha cercana
-        # Redondeo por tolerancia: discretizamos en bandas de tolerancia
-        def band_amount(s, tol):
-            return (s / max(tol, 0.01)).round(0) if tol > 0 else s.round(2)
-
-        cxc["_BANDA"] = band_amount(cxc["_MONTO"].abs(), tol_monto)
-        bank["_BANDA"] = band_amount(bank["_MONTO"].abs(), tol_monto)
-
-        approx = cxc.merge(bank, on="_BANDA", suffixes=("_CxC","_Banco"))
-        approx["_DIF_MONTO"] = (approx["_MONTO_CxC"].abs() - approx["_MONTO_Banco"].abs()).abs()
-        approx["_DIF_DIAS"] = (approx["_FECHA_CxC"] - approx["_FECHA_Banco"]).abs().dt.days
-        approx = approx[(approx["_DIF_MONTO"] <= tol_monto) & (approx["_DIF_DIAS"] <= tol_dias)]
-
-        # Evita duplicidad: prioriza matches por referencia
-        if not matched_ref.empty:
-            keys_ref = set(zip(matched_ref.index, matched_ref["_REF"]))
-            approx = approx[~approx["_REF_CxC"].isin(matched_ref["_REF"])]
-
-        conciliados = pd.concat([matched_ref, approx], ignore_index=True, sort=False).drop_duplicates()
-
-        # 3) Pendientes en CxC (no conciliados) y pagos de banco no aplicados
-        idx_cxc_conc = set(conciliados.index)  # NO sirve: cambia index por concat; mejor marcar
-        cxc["_ROWID"] = np.arange(len(cxc)); bank["_ROWID"] = np.arange(len(bank))
-        if not conciliados.empty:
-            if "_ROWID_CxC" not in conciliados.columns and "_ROWID_Banco" not in conciliados.columns:
-                # reconstruye rowids por merge alternativo
-                conciliados = conciliados.merge(cxc[["_ROWID","_FECHA","_MONTO","_REF","_CLI"]], left_on=["_FECHA_CxC","_MONTO_CxC","_REF_CxC","_CLI_CxC"], right_on=["_FECHA","_MONTO","_REF","_CLI"], how="left")
-                conciliados = conciliados.rename(columns={"_ROWID":"_ROWID_CxC"}).drop(columns=["_FECHA","_MONTO","_REF","_CLI"])
-                conciliados = conciliados.merge(bank[["_ROWID","_FECHA","_MONTO","_REF"]], left_on=["_FECHA_Banco","_MONTO_Banco","_REF_Banco"], right_on=["_FECHA","_MONTO","_REF"], how="left")
-                conciliados = conciliados.rename(columns={"_ROWID":"_ROWID_Banco"}).drop(columns=["_FECHA","_MONTO","_REF"])
-        pend_cxc = cxc[~cxc["_ROWID"].isin(conciliados.get("_ROWID_CxC", pd.Series(dtype=int)))].copy()
-        pagos_no_aplicados = bank[~bank["_ROWID"].isin(conciliados.get("_ROWID_Banco", pd.Series(dtype=int)))].copy()
-
-        # 4) Aging de pendientes CxC (por días de vencimiento respecto a hoy/fecha más reciente)
-        hoy = max(pd.Timestamp.today().normalize(), cxc["_FECHA"].max())
-        dias = (hoy - pend_cxc["_FECHA"]).dt.days
-        def bucket(d):
-            if d <= (aging_cortes[0] if len(aging_cortes)>0 else 30): return "0-30"
-            if len(aging_cortes)>1 and d <= aging_cortes[1]: return "31-60"
-            if len(aging_cortes)>2 and d <= aging_cortes[2]: return "61-90"
-            return "90+"
-        if len(pend_cxc):
-            pend_cxc["Aging_dias"] = dias
-            pend_cxc["Aging_bucket"] = pend_cxc["Aging_dias"].apply(bucket)
-        aging = pend_cxc.groupby("Aging_bucket", dropna=False).agg(N=("Aging_dias","count"),
-                                                                  Suma=("_MONTO","sum")).reset_index().sort_values("Aging_bucket")
-
-        # 5) Saldos irrisorios
-        irrisorios_df = pend_cxc[(pend_cxc["_MONTO"].abs() <= irrisorio)].copy()
-
-        # 6) Heurística NC/Retenciones en CxC (orientativa)
-        pos_nc = cxc[(cxc["_MONTO"] < 0) | (cxc["_OBS"].str.contains(r"\b(NC|nota de crédito|retenc)", case=False, na=False))]
-        posibles_nc = pos_nc.copy()
+        bancos6 = read_many(files_bank, "sheet_bank")
+        clave_archivos = (_hash(file_cxc), st.session_state.get("sheet_cxc"))
+        for i, f in enumerate(files_bank):
+            clave_archivos += (_hash(f), st.session_state.get("sheet_bank" if i == 0 else f"sheet_bank_{i}"))
+        if consolidar6:
+            tasas6 = read_any(file_tasas, "sheet_tasas") if file_tasas is not None else None
+            clave_archivos += (_hash(file_tasas) if file_tasas is not None else None,
+                               moneda_base6, tuple(sorted(monedas6.items())))
+
+            def consolidar_bancos6():
+                try:
+                    with etapa("consolidar bancos", cuentas=len(bancos6)):
+                        return consolidar_bancos({cuenta_de_archivo(f.name): df for f, df in zip(files_bank, bancos6)},
+                                                 tasas6, moneda_base6, monedas6)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                    st.stop()
+            bank = cache_tablas.obtener(("bancos6",) + clave_archivos, consolidar_bancos6)
+        else:
+            bank = bancos6[0].rename(columns=lambda x: str(x).strip())
+
+        def normalizar6(cxc, bank):
+            try:
+                with etapa("normalizar", filas_cxc=len(cxc), filas_banco=len(bank)):
+                    return cxc_bancos.normalizar(cxc, bank)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+
+        # Nivel 1: tablas normalizadas por contenido; nivel 2: enlaces por (archivos, tolerancias)
+        cxc, bank, hay_ref = cache_tablas.obtener(("norm6",) + clave_archivos, lambda: normalizar6(cxc, bank))
+        compensaciones6 = None
+        if compensar_nc6:
+            def compensar6(cxc):
+                with etapa("compensar NC/retenciones"):
+                    return cxc_bancos.compensar_nc(cxc, tol_monto, ventana_nc=ventana_nc6)
+            cxc, compensaciones6 = cache_tablas.obtener(("nc6",) + clave_archivos + (tol_monto, ventana_nc6),
+                                                        lambda: compensar6(cxc))
+        cxc, bank = cxc.copy(deep=False), bank.copy(deep=False)
+        clave_pares = ("enlaces6",) + clave_archivos + (compensar_nc6 and ventana_nc6, tol_monto, tol_dias,
+                                                        detectar_parciales, max_items_parcial, ventana_parcial, umbral_ref6)
+        with etapa("emparejar"):
+            if incremental6:
+                enlaces, resumen_inc = conciliar_incremental(cxc, bank, hay_ref, almacen6, tol_monto, tol_dias,
+                                                             detectar_parciales, max_items_parcial, ventana_parcial,
+                                                             procesos6, umbral_ref6)
+                st.caption("🗄️ Incremental: " + " · ".join(f"{k}: {v:,}" for k, v in resumen_inc.items()))
+            else:
+                enlaces = cache_pares.obtener(clave_pares, lambda: cxc_bancos.emparejar(
+                    cxc, bank, hay_ref, tol_monto, tol_dias, detectar_parciales, max_items_parcial, ventana_parcial,
+                    procesos6, umbral_ref6))
+            contar("enlaces", len(enlaces))
+
+        def resultados6():
+            with etapa("resultados"):
+                return cxc_bancos.resultados(cxc, bank, enlaces, irrisorio, aging_cortes, aging_base=aging_base,
+                                             plazo_dias=plazo_dias, compensaciones=compensaciones6)
+        # con almacén incremental los enlaces dependen del estado del SQLite: no se cachean
+        clave6 = clave_pares + (irrisorio, tuple(aging_cortes), aging_base, plazo_dias)
+        res6 = resultados6() if incremental6 else resultado(("res6",) + clave6, resultados6)
+        clave6 = None if incremental6 else clave6
+        p6 = {"tol_monto": tol_monto, "tol_dias": tol_dias, "irrisorio": irrisorio, "aging_cortes": aging_cortes}
+        nombres6 = (file_cxc.name, ", ".join(f.name for f in files_bank))
+    elif st.session_state.get("ver_trabajo6"):
+        # resultado de un trabajo en segundo plano, con los parámetros con que se envió
+        e6 = trabajos.estado(st.session_state["ver_trabajo6"])
+        clave6 = ("trabajo6", e6["id"])
+        res6 = resultado(clave6, lambda: trabajos.resultado(e6["id"]))
+        p6 = {**cxc_bancos.PARAMETROS, **e6["parametros"]}
+        nombres6 = (e6["archivos"]["cxc"], e6["archivos"]["banco"])
+        st.info(f"📥 Resultado del trabajo {e6['id']} ({nombres6[0]} vs {nombres6[1]}).")
+
+    if res6 is not None:
+        conciliados, pend_cxc, pagos_no_aplicados = res6["conciliados"], res6["pend_cxc"], res6["pagos_no_aplicados"]
+        aging, irrisorios_df, posibles_nc = res6["aging"], res6["irrisorios"], res6["posibles_nc"]
 
         # MÉTRICAS
         c_conc = len(conciliados)
         c_pend = len(pend_cxc)
         c_noap = len(pagos_no_aplicados)
         c_irri = len(irrisorios_df)
+        compensaciones = res6.get("compensaciones", pd.DataFrame())
         st.subheader("📊 Métricas clave")
-        c1,c2,c3,c4 = st.columns(4)
+        c1,c2,c3,c4,c5 = st.columns(5)
         c1.metric("Conciliados", c_conc)
         c2.metric("Pendientes CxC", c_pend)
         c3.metric("Pagos no aplicados (Banco)", c_noap)
         c4.metric("Saldos irrisorios", c_irri)
-        st.caption(f"Ventana ±{tol_dias} días, tolerancia de monto ±{tol_monto:,.2f}")
-
-        with st.expander("🔎 Conciliados", expanded=False): st.dataframe(conciliados.head(1000))
-        with st.expander("🟥 Pendientes en CxC", expanded=False): st.dataframe(pend_cxc.head(1000))
-        with st.expander("🟧 Pagos en banco no aplicados", expanded=False): st.dataframe(pagos_no_aplicados.head(1000))
-        with st.expander("📆 Aging pendientes", expanded=False): st.dataframe(aging)
+        c5.metric("NC/Retenciones compensadas", len(compensaciones))
+        st.caption(f"Ventana ±{p6['tol_dias']} días, tolerancia de monto ±{p6['tol_monto']:,.2f}")
+
+        with st.expander("🔎 Conciliados", expanded=False): ver_tabla(conciliados, "conciliados6", clave6)
+        with st.expander("🟥 Pendientes en CxC", expanded=False): ver_tabla(pend_cxc, "pend_cxc6", clave6)
+        with st.expander("🟧 Pagos en banco no aplicados", expanded=False):
+            ver_tabla(pagos_no_aplicados, "pagos_no_aplicados6", clave6)
+        with st.expander("📆 Aging pendientes", expanded=False):
+            st.dataframe(aging)
+            st.caption("Saldo por cliente y tramo")
+            st.dataframe(res6["aging_cliente"].pivot_table(index="Cliente", columns="Aging_bucket", values="Suma",
+                                                           observed=True, aggfunc="sum", fill_value=0).head(1000))
         if len(irrisorios_df): 
-            with st.expander("🟦 Saldos irrisorios", expanded=False): st.dataframe(irrisorios_df.head(1000))
+            with st.expander("🟦 Saldos irrisorios", expanded=False): ver_tabla(irrisorios_df, "irrisorios6", clave6)
+        if len(res6.get("por_cuenta", [])):
+            with st.expander("🏦 Desglose por cuenta", expanded=True):
+                st.dataframe(res6["por_cuenta"])
+                st.caption("Monto_base en la moneda base; Monto_moneda en la moneda de cada cuenta.")
+        if len(compensaciones):
+            with st.expander("🧾 NC/Retenciones compensadas contra facturas", expanded=False):
+                ver_tabla(compensaciones, "compensaciones6", clave6)
         if len(posibles_nc):
-            with st.expander("🟪 Posibles NC/Retenciones", expanded=False): st.dataframe(posibles_nc.head(1000))
-
-        # XLSX
-        sheets = {
-            "Resumen": pd.DataFrame({
-                "Métrica":["Conciliados","PendientesCxC","PagosNoAplicadosBanco","SaldosIrrisorios","VentanaDias","TolMonto"],
-                "Valor":[c_conc, c_pend, c_noap, c_irri, tol_dias, tol_monto]
-            }),
-            "Conciliados": conciliados,
-            "PendientesCxC": pend_cxc,
-            "PagosNoAplicadosBanco": pagos_no_aplicados,
-            "Aging": aging,
-            "SaldosIrrisorios": irrisorios_df,
-            "PosiblesNC_Retenciones": posibles_nc
-        }
-        st.download_button("⬇️ Descargar hallazgos CxC vs Bancos (XLSX)",
-                           to_xlsx_bytes(sheets), "cxc_bancos_hallazgos.xlsx",
-                           "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            with st.expander("🟪 Posibles NC/Retenciones sin compensar", expanded=False):
+                ver_tabla(posibles_nc, "posibles_nc6", clave6)
+
+        # XLSX (o CSV.gz / Parquet): se genera al pulsar la descarga, en streaming a un archivo temporal
+        formato6 = st.radio("Formato de hallazgos", list(FORMATOS), horizontal=True,
+                            help="XLSX parte las hojas de más de 1.048.576 filas; CSV.gz y Parquet van en un ZIP con un archivo por hoja.")
+        with etapa("hojas de hallazgos"):
+            hojas6 = cxc_bancos.hojas_xlsx(res6, p6["tol_monto"], p6["tol_dias"])
+        ext6, mime6 = FORMATOS[formato6]
+        st.download_button(f"⬇️ Descargar hallazgos CxC vs Bancos ({formato6.upper()})",
+                           lambda: exportar(hojas6, formato=formato6), f"cxc_bancos_hallazgos{ext6}",
+                           mime6)
 
         # DOCX – recomendaciones
-        recs = [
-            "Automatizar el cruce de pagos banco ↔ facturas con ventana de días y tolerancia de monto.",
-            "Parametrizar aging (0–30/31–60/61–90/90+) con alertas a Cobranzas desde 31+ días.",
-            "Saneamiento mensual de saldos irrisorios conforme política (p. ej., ≤ 5 USD).",
-            "Forzar aplicación de NC/retenciones contra las facturas correspondientes antes del cierre.",
-            "Revisión quincenal conjunta Tesorería–Cobranzas y bitácora de pagos no identificados.",
-            "Incluir referencia obligatoria en depósitos (n° factura/cliente) y validar en interfaz bancaria."
-        ]
-        resumen_doc = [
-            f"Archivo CxC: {file_cxc.name} | Banco: {file_bank.name}",
-            f"Conciliados: {c_conc} | Pendientes CxC: {c_pend} | Pagos no aplicados: {c_noap}",
-            f"Saldos irrisorios (≤ {irrisorio:.2f}): {c_irri}",
-            f"Parámetros: Ventana ±{tol_dias} días, tolerancia ±{tol_monto:.2f}"
-        ]
-        top_focus = []
-        if len(aging):
-            worst = aging.sort_values("Suma", ascending=False).head(1)
-            if len(worst):
-                b = worst.iloc[0]["Aging_bucket"]; s = worst.iloc[0]["Suma"]
-                top_focus.append(f"Aging crítico: {b} con {s:,.2f}")
-        if c_noap>0: top_focus.append(f"Pagos banco no aplicados: {c_noap}")
-        if c_pend>0: top_focus.append(f"Pendientes CxC: {c_pend}")
-        if len(posibles_nc)>0: top_focus.append(f"Posibles NC/Retenciones sin cruzar: {len(posibles_nc)}")
-        if not top_focus: top_focus.append("Sin focos críticos detectados.")
-
-        sections = [
-            ("RESUMEN EJECUTIVO", [f"• {x}" for x in resumen_doc]),
-            ("HALLAZGOS RELEVANTES", [f"• {x}" for x in top_focus]),
-            ("RECOMENDACIONES", [f"• {x}" for x in recs]),
-            ("TRAZABILIDAD XLSX", ["• Ver 'cxc_bancos_hallazgos.xlsx' (todas las hojas)."])
-        ]
+        with etapa("reporte DOCX"):
+            sections = cxc_bancos.secciones_docx(res6, *nombres6, p6["tol_monto"], p6["tol_dias"], p6["irrisorio"],
+                                                 p6["aging_cortes"])
+            docx6 = docx_from_sections(cxc_bancos.TITULO_DOCX, sections)
         st.download_button("⬇️ Descargar reporte CxC vs Bancos (DOCX)",
-                           docx_from_sections("CxC vs Bancos + Aging – Reporte de Auditoría", sections),
+                           docx6,
                            "reporte_cxc_bancos.docx",
-                           "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+                           MIME_DOCX)
 
-# ------------------------- Resumen gráfico (para 1–5) -------------------------
-if opcion in PRUEBAS[:5] and sum(conteo_resultados.values()) > 0:
+# ------------------------- Resumen gráfico (para 1–5 y modo combinado) -------------------------
+if opcion in PRUEBAS[:5] + [PRUEBAS[6]] and sum(conteo_resultados.values()) > 0:
     st.subheader("📊 Resumen gráfico de pruebas CAAT")
     fig, ax = plt.subplots(figsize=(8, 4))
     ax.barh(list(conteo_resultados.keys()), list(conteo_resultados.values()), color="steelblue")
@@ -441,20 +643,18 @@ if opcion in PRUEBAS[:5] and sum(conteo_resultados.values()) > 0:
     st.pyplot(fig)
 
     st.subheader("🧠 Recomendaciones Automáticas")
-    recomendaciones = [
-        generar_recomendacion("Transacciones Conciliadas", conteo_resultados["Conciliadas"], 0,
-                              "Conciliación correcta.", "Verifica registros coincidentes."),
-        generar_recomendacion("Transacciones Faltantes", conteo_resultados["Faltantes en destino"], 2,
-                              "Sin omisiones relevantes.", "Posibles errores u omisiones en registro."),
-        generar_recomendacion("Transacciones Inesperadas", conteo_resultados["Inesperadas en destino"], 2,
-                              "Sin ingresos inesperados.", "Revisar ingresos no respaldados por origen."),
-        generar_recomendacion("Discrepancias de Valor", conteo_resultados["Discrepancias de valor"], 2,
-                              "Fechas y montos alineados.", "Existen valores que no coinciden."),
-        generar_recomendacion("Duplicados Internos", conteo_resultados["Duplicados"], 2,
-                              "No hay duplicaciones.", "Registros repetidos requieren revisión.")
-    ]
-    for reco in recomendaciones:
+    for reco in recomendaciones(conteo_resultados):
         st.markdown(reco)
 
     st.subheader("🧾 Conclusión del Análisis")
     st.markdown(generar_conclusion_conteo(conteo_resultados))
+
+# ------------------------- Rendimiento (etapas de esta ejecución) -------------------------
+if perfil_app is not None and perfil_app.etapas:
+    with st.expander("⏱️ Rendimiento", expanded=False):
+        st.dataframe(perfil_app.tabla(), hide_index=True)
+        st.caption("La exportación de hallazgos se genera al descargar y no aparece aquí; "
+                   "la traza Chrome se abre en chrome://tracing o ui.perfetto.dev.")
+        r1, r2 = st.columns(2)
+        r1.download_button("⬇ Perfil (JSON)", perfil_app.a_json(), "caat_perfil.json", "application/json")
+        r2.download_button("⬇ Traza Chrome", perfil_app.a_chrome_trace(), "caat_traza.json", "application/json")
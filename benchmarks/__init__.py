@@ -0,0 +1 @@
+# benchmarks – mediciones reproducibles de los núcleos de caat
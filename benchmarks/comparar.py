@@ -0,0 +1,50 @@
+# comparar.py – diferencias entre dos corridas de benchmarks.escalabilidad
+"""Compara dos JSON de ``benchmarks.escalabilidad`` por (filas, prueba, etapa).
+
+Uso::
+
+    python -m benchmarks.comparar base.json nuevo.json [--umbral 1.2]
+
+Imprime segundos y pico de RSS de ambas corridas con el cociente nuevo/base, y sale
+con código 1 si alguna etapa es más lenta que ``umbral`` veces la base.
+"""
+import argparse
+import json
+import sys
+
+import pandas as pd
+
+CLAVES = ["filas", "prueba", "etapa"]
+
+
+def cargar(ruta) -> pd.DataFrame:
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    df = pd.DataFrame([r for r in datos["resultados"] if "error" not in r])
+    return df.reindex(columns=CLAVES + ["segundos", "rss_pico_mb"])
+
+
+def comparar(base: pd.DataFrame, nuevo: pd.DataFrame) -> pd.DataFrame:
+    tabla = base.merge(nuevo, on=CLAVES, how="outer", suffixes=("_base", "_nuevo"))
+    tabla["x_tiempo"] = (tabla["segundos_nuevo"] / tabla["segundos_base"]).round(2)
+    tabla["x_rss"] = (tabla["rss_pico_mb_nuevo"] / tabla["rss_pico_mb_base"]).round(2)
+    return tabla.sort_values(CLAVES, kind="stable", ignore_index=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.comparar", description=__doc__.splitlines()[0])
+    ap.add_argument("base")
+    ap.add_argument("nuevo")
+    ap.add_argument("--umbral", type=float, default=1.2, help="cociente de tiempo que cuenta como regresión")
+    args = ap.parse_args(argv)
+    tabla = comparar(cargar(args.base), cargar(args.nuevo))
+    print(tabla.to_string(index=False))
+    lentas = tabla[tabla["x_tiempo"] > args.umbral]
+    if len(lentas):
+        print(f"\n{len(lentas)} etapa(s) más lentas que {args.umbral}× la base", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
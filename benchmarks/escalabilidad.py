@@ -0,0 +1,197 @@
+# escalabilidad.py – tiempos y memoria de las pruebas CAAT 1–6 por tamaño
+"""Corre cada prueba por etapas sobre datos de ``benchmarks.generadores`` y guarda JSON.
+
+Uso::
+
+    python -m benchmarks.escalabilidad [--filas 10000 100000 ...] [--pruebas 1 2 3 4 5 1-5 6]
+                                       [--formato xlsx|csv.gz|parquet] [--salida bench.json]
+
+Por tamaño:
+
+* pruebas 1–5: ``leer`` y ``normalizar`` (una vez), y por prueba ``conciliar`` (las
+  mismas operaciones que la app; ``1-5`` es la pasada única de ``conciliar_todo``) y
+  ``exportar``;
+* prueba 6: ``leer``, ``normalizar``, ``emparejar``, ``resultados``, ``aging`` y ``exportar``.
+
+Cada tamaño corre en un proceso nuevo, así el pico de RSS de una etapa (muestreado
+cada pocos milisegundos) no arrastra memoria de tamaños anteriores. El JSON lleva
+commit, versiones y máquina; ``python -m benchmarks.comparar`` compara dos corridas.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generadores import escribir, generar_cxc_banco, generar_origen_destino
+
+TAMANOS = [10_000, 100_000, 1_000_000, 10_000_000]
+PRUEBAS = ["1", "2", "3", "4", "5", "1-5", "6"]
+INTERVALO_RSS = 0.005
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource                     # sin /proc: pico de toda la vida del proceso
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+class _PicoRSS:
+    """Muestrea el RSS en un hilo mientras dura el bloque ``with``."""
+
+    def __enter__(self):
+        self.pico = self.inicio = _rss_mb()
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def _muestrear(self):
+        while not self._fin.wait(INTERVALO_RSS):
+            self.pico = max(self.pico, _rss_mb())
+
+    def __exit__(self, *exc):
+        self._fin.set(); self._hilo.join()
+        self.pico = max(self.pico, _rss_mb())
+
+
+def _medir(filas, n, prueba, etapa, f, *args):
+    with _PicoRSS() as rss:
+        t0 = time.perf_counter()
+        salida = f(*args)
+        segundos = time.perf_counter() - t0
+    fila = {"filas": n, "prueba": prueba, "etapa": etapa, "segundos": round(segundos, 4),
+            "rss_inicio_mb": round(rss.inicio, 1), "rss_pico_mb": round(rss.pico, 1)}
+    if isinstance(salida, pd.DataFrame):
+        fila["filas_salida"] = len(salida)
+    filas.append(fila)
+    print(f"  {n:>11,} {prueba:>4} {etapa:<11} {segundos:9.3f}s  pico {rss.pico:8.1f} MB", flush=True)
+    return salida
+
+
+# ------------------------- Pruebas 1–5 (mismas operaciones que la app) -------------------------
+def _prueba(clave, df1, df2):
+    from caat.pruebas import CAMPOS_CLAVE, CAMPOS_ID, conciliar_todo
+    if clave == "1":
+        return pd.merge(df1, df2, how="inner", on=CAMPOS_CLAVE)
+    if clave in ("2", "3"):
+        a, b = (df1, df2) if clave == "2" else (df2, df1)
+        m = pd.merge(a, b, how="left", on=CAMPOS_CLAVE, indicator=True)
+        return m[m["_merge"] == "left_only"].drop(columns="_merge")
+    if clave == "4":
+        m = pd.merge(df1, df2, on=CAMPOS_ID, how="inner", suffixes=("_origen", "_destino"))
+        return m[(m["Monto_origen"] != m["Monto_destino"]) | (m["Fecha_origen"] != m["Fecha_destino"])]
+    if clave == "5":
+        return df2[df2.duplicated(subset=CAMPOS_CLAVE, keep=False)]
+    return conciliar_todo(df1, df2)
+
+
+def _origen_destino(n, directorio, pruebas, formato, semilla, entrada):
+    from caat.entregables import exportar
+    from caat.motor import leer_archivo
+    from caat.normalizacion import a_fecha
+    filas = []
+    origen, destino = generar_origen_destino(n, semilla)
+    rutas = [escribir(df, os.path.join(directorio, f"od_{k}.{entrada}")) for k, df in (("origen", origen), ("destino", destino))]
+    del origen, destino
+    df1, df2 = _medir(filas, n, "1-5", "leer", lambda: tuple(leer_archivo(r) for r in rutas))
+    df1, df2 = _medir(filas, n, "1-5", "normalizar",
+                      lambda: (df1.assign(Fecha=a_fecha(df1["Fecha"])), df2.assign(Fecha=a_fecha(df2["Fecha"]))))
+    for clave in pruebas:
+        salida = _medir(filas, n, clave, "conciliar", _prueba, clave, df1, df2)
+        hojas = salida if isinstance(salida, dict) else {f"prueba_{clave}": salida}
+        _medir(filas, n, clave, "exportar", exportar, hojas, os.path.join(directorio, f"od_{clave}.out"), formato)
+        del salida, hojas
+    return filas
+
+
+def _cxc_bancos(n, directorio, formato, semilla, entrada):
+    from caat import cxc_bancos
+    from caat.aging import agregar_aging, tramos_aging
+    from caat.entregables import exportar
+    from caat.motor import leer_archivo
+    filas = []
+    cxc, banco = generar_cxc_banco(n, semilla)
+    rutas = [escribir(df, os.path.join(directorio, f"cb_{k}.{entrada}")) for k, df in (("cxc", cxc), ("banco", banco))]
+    del cxc, banco
+    p = cxc_bancos.PARAMETROS
+    cxc, banco = _medir(filas, n, "6", "leer", lambda: tuple(leer_archivo(r) for r in rutas))
+    cxc, banco, hay_ref = _medir(filas, n, "6", "normalizar", cxc_bancos.normalizar, cxc, banco)
+    enlaces = _medir(filas, n, "6", "emparejar", cxc_bancos.emparejar, cxc, banco, hay_ref, p["tol_monto"], p["tol_dias"])
+    hoy = cxc["_FECHA"].max()
+    res = _medir(filas, n, "6", "resultados", cxc_bancos.resultados, cxc, banco, enlaces, p["irrisorio"],
+                 p["aging_cortes"], hoy)
+    pend = res["pend_cxc"]
+    _medir(filas, n, "6", "aging",
+           lambda: agregar_aging(pend["_CLI"], tramos_aging(pend["_FECHA"], hoy, p["aging_cortes"])[1], pend["_MONTO"]))
+    hojas = cxc_bancos.hojas_xlsx(res, p["tol_monto"], p["tol_dias"])
+    _medir(filas, n, "6", "exportar", exportar, hojas, os.path.join(directorio, "cb.out"), formato)
+    return filas
+
+
+def medir_tamano(n, pruebas=PRUEBAS, formato="xlsx", semilla=0, entrada="csv") -> list:
+    """Filas de resultados de un tamaño (pensado para correr en un proceso nuevo)."""
+    filas = []
+    with tempfile.TemporaryDirectory(prefix="caat_bench_") as directorio:
+        od = [p for p in pruebas if p != "6"]
+        if od:
+            filas += _origen_destino(n, directorio, od, formato, semilla, entrada)
+        if "6" in pruebas:
+            filas += _cxc_bancos(n, directorio, formato, semilla, entrada)
+    return filas
+
+
+def metadatos() -> dict:
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=raiz, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"commit": commit, "fecha": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "plataforma": platform.platform(), "cpus": os.cpu_count()}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.escalabilidad", description=__doc__.splitlines()[0])
+    ap.add_argument("--filas", type=int, nargs="+", default=TAMANOS, help="tamaños (filas de origen / facturas)")
+    ap.add_argument("--pruebas", nargs="+", choices=PRUEBAS, default=PRUEBAS)
+    ap.add_argument("--formato", choices=["xlsx", "csv.gz", "parquet"], default="xlsx", help="formato de exportación")
+    ap.add_argument("--entrada", choices=["csv", "parquet"], default="csv", help="formato de los archivos leídos")
+    ap.add_argument("--semilla", type=int, default=0)
+    ap.add_argument("--salida", default="bench_caat.json")
+    args = ap.parse_args(argv)
+
+    resultado = {"meta": metadatos(), "parametros": {k: v for k, v in vars(args).items() if k != "salida"},
+                 "resultados": []}
+    for n in args.filas:
+        print(f"— {n:,} filas", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as ex:
+            try:
+                resultado["resultados"] += ex.submit(medir_tamano, n, args.pruebas, args.formato, args.semilla,
+                                                     args.entrada).result()
+            except Exception as e:                      # p. ej. MemoryError o proceso terminado por el sistema
+                resultado["resultados"].append({"filas": n, "error": f"{type(e).__name__}: {e}"})
+                print(f"  {n:,}: {type(e).__name__}: {e}", flush=True)
+        with open(args.salida, "w", encoding="utf-8") as f:        # parcial tras cada tamaño
+            json.dump(resultado, f, ensure_ascii=False, indent=1)
+    print(f"→ {args.salida}")
+    return resultado
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# generadores.py – datos sintéticos para las pruebas CAAT 1–6
+"""Generadores reproducibles (misma semilla → mismos datos) de:
+
+* ``generar_origen_destino`` – pares origen/destino con ``CAMPOS_CLAVE`` y tasas
+  controladas de faltantes, inesperadas, discrepancias y duplicados;
+* ``generar_cxc_banco`` – CxC y extracto bancario con pagos que se concilian, pagos
+  parciales (una factura en varios depósitos), ruido en la referencia del concepto,
+  desfase de fechas, depósitos duplicados, notas de crédito y retenciones.
+
+``sesgo`` controla la asimetría: montos log-normales con ``sigma = sesgo`` y clientes
+o entidades con frecuencia Zipf (``sesgo = 0`` → uniforme).
+
+Uso::
+
+    python -m benchmarks.generadores DIR --filas 100000 [--prueba cxc_bancos] [--formato parquet]
+
+escribe ``bench_origen/bench_destino`` o ``bench6_cxc/bench6_banco``, listos para ``python -m caat DIR``.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+TASAS_RETENCION = [0.01, 0.02, 0.08, 0.10]
+COLUMNA_VERDAD = "FacturaPagada"        # ``generar_cxc_banco(verdad=True)``: fuera de las columnas que lee la prueba 6
+FECHA_INICIAL = pd.Timestamp("2024-01-01")
+DIAS_RANGO = 365
+
+
+def _montos(rng, n, sesgo):
+    m = rng.lognormal(mean=5.0, sigma=max(sesgo, 1e-6), size=n) if sesgo > 0 else rng.uniform(10, 1000, n)
+    return np.round(np.maximum(m, 0.01), 2)
+
+
+def _zipf(rng, n, categorias, sesgo):
+    """Índices 0..categorias-1 con probabilidad ∝ 1/(k+1)^sesgo."""
+    p = 1.0 / np.arange(1, categorias + 1) ** sesgo
+    return rng.choice(categorias, size=n, p=p / p.sum())
+
+
+def _fechas(rng, n):
+    return FECHA_INICIAL + pd.to_timedelta(rng.integers(0, DIAS_RANGO, n), unit="D")
+
+
+def generar_origen_destino(n, semilla=0, faltantes=0.02, inesperadas=0.02, discrepancias=0.02, duplicados=0.01,
+                           sesgo=1.0, jitter_dias=3, entidades=1_000) -> tuple:
+    """``(origen, destino)`` con ``n`` filas de origen (el destino tiene ≈ n)."""
+    rng = np.random.default_rng(semilla)
+    origen = pd.DataFrame({"ID_Transaccion": np.arange(1, n + 1, dtype="int64"),
+                           "Fecha": _fechas(rng, n), "Monto": _montos(rng, n, sesgo),
+                           "ID_Entidad": _zipf(rng, n, entidades, sesgo).astype("int64") + 1})
+    destino = origen[rng.random(n) >= faltantes].reset_index(drop=True)
+
+    # discrepancias: mismo ID con monto o fecha distintos
+    cambia = rng.random(len(destino)) < discrepancias
+    en_monto = cambia & (rng.random(len(destino)) < 0.5)
+    destino.loc[en_monto, "Monto"] = np.round(destino.loc[en_monto, "Monto"] * rng.uniform(0.5, 1.5, en_monto.sum()), 2)
+    en_fecha = cambia & ~en_monto
+    destino.loc[en_fecha, "Fecha"] += pd.to_timedelta(rng.integers(1, max(jitter_dias, 1) + 1, en_fecha.sum()), unit="D")
+
+    n_nuevas = int(round(n * inesperadas))
+    nuevas = pd.DataFrame({"ID_Transaccion": np.arange(n + 1, n + 1 + n_nuevas, dtype="int64"),
+                           "Fecha": _fechas(rng, n_nuevas), "Monto": _montos(rng, n_nuevas, sesgo),
+                           "ID_Entidad": _zipf(rng, n_nuevas, entidades, sesgo).astype("int64") + 1})
+    destino = pd.concat([destino, nuevas], ignore_index=True)
+
+    origen = pd.concat([origen, origen.sample(frac=duplicados, random_state=semilla)], ignore_index=True)
+    destino = pd.concat([destino, destino.sample(frac=duplicados, random_state=semilla + 1)], ignore_index=True)
+    return origen, destino
+
+
+def _conceptos(rng, refs, ruido_ref):
+    """Concepto bancario a partir de la referencia: exacto o con ruido (formato, prefijo, sin serie, typo, vacío)."""
+    refs = pd.Series(refs, dtype=object)
+    tipo = np.where(rng.random(len(refs)) < ruido_ref, rng.integers(1, 6, len(refs)), 0)
+    nucleo = refs.str.split("-").str[-1].str.lstrip("0")
+    typo = refs.str[:-1] + ((refs.str[-1].astype(int) + 1) % 10).astype(str)
+    conceptos = np.select([tipo == 0, tipo == 1, tipo == 2, tipo == 3, tipo == 4],
+                          [refs, "TRANSF " + refs + " CLIENTE", "DEP FACT " + refs.str.replace("-", "", regex=False),
+                           "PAGO " + nucleo, "TRF " + typo], "DEPOSITO EFECTIVO")
+    return conceptos
+
+
+def generar_cxc_banco(n, semilla=0, pagadas=0.6, parciales=0.05, ruido_ref=0.3, jitter_dias=3, duplicados=0.0,
+                      sesgo=1.0, clientes=500, notas_credito=0.02, retenciones=0.0, verdad=False) -> tuple:
+    """``(cxc, banco)``: ``n`` facturas; una fracción ``pagadas`` tiene depósito(s) en el banco.
+
+    De las pagadas, ``parciales`` se pagan en 2–3 depósitos dentro de 30 días. De las pagadas
+    en un solo depósito, ``retenciones`` tienen además una retención en CxC (fila negativa a
+    una tasa de ``TASAS_RETENCION``, la mitad con el número de factura en la observación) y
+    el depósito llega neto de la retención. Con ``verdad`` el banco trae ``COLUMNA_VERDAD``
+    (la factura que paga cada depósito) para medir la precisión del emparejamiento.
+    """
+    rng = np.random.default_rng(semilla)
+    numero = pd.Series(np.arange(1, n + 1)).astype(str).str.zfill(9)
+    serie = pd.Series(rng.integers(1, 20, n) if n else np.array([], dtype="int64")).astype(str).str.zfill(3)
+    cxc = pd.DataFrame({"Cliente": "C" + pd.Series(_zipf(rng, n, clientes, sesgo)).astype(str).str.zfill(5),
+                        "NumeroFactura": ("001-" + serie + "-" + numero).to_numpy(),
+                        "Fecha": _fechas(rng, n), "Monto": _montos(rng, n, sesgo), "Observacion": ""})
+    nc = rng.random(n) < notas_credito
+    cxc.loc[nc, "Monto"] = -cxc.loc[nc, "Monto"]
+    cxc.loc[nc, "Observacion"] = "NC devolución"
+
+    pag = np.flatnonzero((rng.random(n) < pagadas) & ~nc)
+    es_parcial = rng.random(len(pag)) < parciales
+    cuotas = np.where(es_parcial, rng.integers(2, 4, len(pag)), 1)
+    fila = np.repeat(pag, cuotas)
+    k = np.arange(len(fila)) - np.repeat(np.cumsum(cuotas) - cuotas, cuotas)
+    cent = np.round(cxc["Monto"].to_numpy()[fila] * 100).astype("int64")
+    cuota = cent // np.repeat(cuotas, cuotas)
+    ultimo = k == np.repeat(cuotas, cuotas) - 1
+    monto = np.where(ultimo, cent - cuota * (np.repeat(cuotas, cuotas) - 1), cuota) / 100
+    desfase = np.where(np.repeat(cuotas, cuotas) > 1, rng.integers(0, 31, len(fila)), rng.integers(0, jitter_dias + 1, len(fila)))
+    banco = pd.DataFrame({"Fecha": cxc["Fecha"].to_numpy()[fila] + pd.to_timedelta(desfase, unit="D").to_numpy(),
+                          "Monto": monto,
+                          "Concepto": _conceptos(rng, cxc["NumeroFactura"].to_numpy()[fila], ruido_ref)})
+    if verdad:
+        banco[COLUMNA_VERDAD] = cxc["NumeroFactura"].to_numpy()[fila]
+    if retenciones:
+        con_ret = np.flatnonzero((np.repeat(cuotas, cuotas) == 1) & (rng.random(len(fila)) < retenciones))
+        f = fila[con_ret]
+        tasa = rng.choice(TASAS_RETENCION, len(f))
+        ret = np.rint(cent[con_ret] * tasa).astype("int64")
+        banco.loc[con_ret, "Monto"] = (cent[con_ret] - ret) / 100
+        obs = pd.Series(["Retención IR " + f"{t:.2%}".replace(".00%", "%") for t in tasa], dtype=object)
+        con_ref = rng.random(len(f)) < 0.5
+        obs[con_ref] = obs[con_ref] + " FAC " + cxc["NumeroFactura"].to_numpy()[f][con_ref]
+        cxc = pd.concat([cxc, pd.DataFrame({
+            "Cliente": cxc["Cliente"].to_numpy()[f],
+            "NumeroFactura": ("RET-" + pd.Series(np.arange(1, len(f) + 1)).astype(str).str.zfill(9)).to_numpy(),
+            "Fecha": cxc["Fecha"].to_numpy()[f] + pd.to_timedelta(rng.integers(0, 6, len(f)), unit="D").to_numpy(),
+            "Monto": -ret / 100, "Observacion": obs.to_numpy()})], ignore_index=True)
+    if duplicados:
+        banco = pd.concat([banco, banco.sample(frac=duplicados, random_state=semilla)], ignore_index=True)
+    banco = banco.sample(frac=1.0, random_state=semilla).reset_index(drop=True)      # orden de extracto, no de factura
+    return cxc, banco
+
+
+def escribir(df, ruta):
+    """CSV o Parquet según la extensión."""
+    if str(ruta).lower().endswith((".parquet", ".pq")):
+        df.to_parquet(ruta, index=False)
+    else:
+        df.to_csv(ruta, index=False)
+    return ruta
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.generadores", description="Datos sintéticos CAAT")
+    ap.add_argument("directorio")
+    ap.add_argument("--filas", type=int, default=100_000)
+    ap.add_argument("--prueba", choices=["origen_destino", "cxc_bancos"], default="origen_destino")
+    ap.add_argument("--formato", choices=["csv", "parquet"], default="csv")
+    ap.add_argument("--semilla", type=int, default=0)
+    ap.add_argument("--sesgo", type=float, default=1.0)
+    ap.add_argument("--duplicados", type=float, default=0.01)
+    ap.add_argument("--ruido-ref", type=float, default=0.3)
+    ap.add_argument("--jitter-dias", type=int, default=3)
+    ap.add_argument("--parciales", type=float, default=0.05)
+    ap.add_argument("--retenciones", type=float, default=0.0)
+    args = ap.parse_args(argv)
+    os.makedirs(args.directorio, exist_ok=True)
+    if args.prueba == "origen_destino":
+        a, b = generar_origen_destino(args.filas, args.semilla, duplicados=args.duplicados, sesgo=args.sesgo,
+                                      jitter_dias=args.jitter_dias)
+        nombres = ("bench_origen", "bench_destino")
+    else:
+        a, b = generar_cxc_banco(args.filas, args.semilla, parciales=args.parciales, ruido_ref=args.ruido_ref,
+                                 jitter_dias=args.jitter_dias, duplicados=args.duplicados, sesgo=args.sesgo,
+                                 retenciones=args.retenciones)
+        nombres = ("bench6_cxc", "bench6_banco")
+    for df, nombre in zip((a, b), nombres):
+        print(escribir(df, os.path.join(args.directorio, f"{nombre}.{args.formato}")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# ingesta_legado.py – lectura anterior de read_any vs caat.ingesta.leer_tabular
+"""Benchmark de ingesta.
+
+Uso::
+
+    python -m benchmarks.ingesta_legado archivo.csv [archivo.csv ...]
+
+Lee cada archivo con el camino anterior de ``read_any`` (motor python del Sniffer con
+reintentos, ``leer_csv_legado``) y con ``caat.ingesta.leer_tabular`` (plan de tipos
+para ``CAMPOS_ID``, ``Monto`` y ``Fecha``) e imprime filas, segundos, filas/s y pico
+de memoria (``tracemalloc``) de ambos.
+"""
+import csv
+import io
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from caat.ingesta import DELIMITADORES, leer_tabular
+from caat.pruebas import CAMPOS_ID
+
+
+def leer_csv_legado(fuente):
+    """Camino anterior de ``read_any`` (motor python, reintentos)."""
+    if hasattr(fuente, "read"):
+        data = fuente.read()
+    else:
+        with open(fuente, "rb") as f:
+            data = f.read()
+    try:
+        delim = csv.Sniffer().sniff(data[:4096].decode("utf-8", errors="ignore"), delimiters=DELIMITADORES).delimiter
+    except Exception:
+        delim = None
+    bio = io.BytesIO(data)
+    if delim:
+        try: return pd.read_csv(bio, sep=delim, engine="python")
+        except Exception: pass
+    bio.seek(0)
+    try: return pd.read_csv(bio, sep=None, engine="python")
+    except Exception:
+        bio.seek(0); return pd.read_csv(bio, sep=None, engine="python", encoding="latin-1")
+
+
+def comparar_con_legado(ruta, ids=(), montos=(), fechas=()) -> pd.DataFrame:
+    """Filas/s y pico de memoria de ``leer_tabular`` frente a ``leer_csv_legado``."""
+    filas = []
+    _, m = leer_tabular(ruta, ids=ids, montos=montos, fechas=fechas, medir_memoria=True)
+    filas.append(m)
+    tracemalloc.start(); t0 = time.perf_counter()
+    try:
+        df = leer_csv_legado(ruta)
+        seg = time.perf_counter() - t0; pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    filas.append({"archivo": m["archivo"], "motor": "python (legado)", "filas": len(df),
+                  "segundos": round(seg, 4), "filas_s": round(len(df) / seg) if seg > 0 else None,
+                  "pico_mb": round(pico / 2**20, 1)})
+    return pd.DataFrame(filas)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(__doc__)
+        return None
+    res = pd.concat([comparar_con_legado(r, ids=CAMPOS_ID, montos=["Monto"], fechas=["Fecha"]) for r in argv],
+                    ignore_index=True)
+    print(res.to_string(index=False))
+    return res
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# micro_normalizacion.py – coerce_amount/coerce_date anteriores vs caat.normalizacion
+"""Microbenchmarks de normalización.
+
+Uso::
+
+    python -m benchmarks.micro_normalizacion [filas ...]
+
+Compara, para cada tamaño, los caminos anteriores de la app (``str.replace`` sobre
+``astype(str)`` y ``to_datetime(dayfirst=True)`` fila a fila) con los núcleos de
+``caat.normalizacion`` sobre texto europeo, texto US, montos ya numéricos y fechas
+``dd/mm/aaaa``. Imprime una tabla con segundos (mejor de 3) y la aceleración.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from caat.normalizacion import a_centavos, a_fecha
+
+TAMANOS = [10_000, 100_000, 1_000_000]
+REPETICIONES = 3
+
+
+def monto_legado(series):
+    s = series.astype(str).str.replace(r"\.", "", regex=True).str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
+def fecha_legado(series):
+    return pd.to_datetime(series, errors="coerce", dayfirst=True)
+
+
+def _datos(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    cent = rng.integers(-10_000_000, 100_000_000, n)
+    ent, dec = np.abs(cent) // 100, np.abs(cent) % 100
+    signo = np.where(cent < 0, "-", "")
+    miles_eu = pd.Series(ent).map("{:,}".format).str.replace(",", ".", regex=False)
+    miles_us = pd.Series(ent).map("{:,}".format)
+    dec_txt = pd.Series(dec).astype(str).str.zfill(2)
+    dias = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 2_000, n), unit="D")
+    return {
+        "monto_eu": signo + miles_eu + "," + dec_txt,
+        "monto_us": signo + miles_us + "." + dec_txt,
+        "monto_num": pd.Series(cent / 100),
+        "fecha_dmy": pd.Series(dias.strftime("%d/%m/%Y")),
+    }, cent
+
+
+def _mejor(f, x):
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        t0 = time.perf_counter(); f(x); mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def medir(n) -> pd.DataFrame:
+    datos, cent = _datos(n)
+    casos = [("monto_eu", monto_legado, a_centavos), ("monto_us", monto_legado, a_centavos),
+             ("monto_num", monto_legado, a_centavos), ("fecha_dmy", fecha_legado, a_fecha)]
+    filas = []
+    for col, legado, nuevo in casos:
+        t_leg, t_new = _mejor(legado, datos[col]), _mejor(nuevo, datos[col])
+        fila = {"filas": n, "caso": col, "legado_s": round(t_leg, 4), "nuevo_s": round(t_new, 4),
+                "aceleracion": round(t_leg / t_new, 1) if t_new > 0 else None}
+        if col.startswith("monto"):
+            # exactitud: el camino anterior falla con US y con floats (quita todos los puntos)
+            fila["legado_ok"] = bool(np.array_equal((legado(datos[col]) * 100).round().fillna(0).to_numpy(), cent))
+            fila["nuevo_ok"] = bool(np.array_equal(nuevo(datos[col]).to_numpy(dtype="int64"), cent))
+        filas.append(fila)
+    return pd.DataFrame(filas)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    tamanos = [int(a) for a in argv] or TAMANOS
+    res = pd.concat([medir(n) for n in tamanos], ignore_index=True)
+    print(res.to_string(index=False))
+    return res
+
+
+if __name__ == "__main__":
+    main()
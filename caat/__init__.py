@@ -0,0 +1 @@
+# caat – motores de conciliación usados por la app Streamlit (Aplicación_2.py)
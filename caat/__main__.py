@@ -0,0 +1,6 @@
+# python -m caat – ejecución por lotes (ver caat.cli)
+import sys
+
+from caat.cli import main
+
+sys.exit(main())
@@ -0,0 +1,184 @@
+# asignacion.py – asignación uno a uno de depósitos bancarios a facturas
+"""Asignación óptima uno a uno sobre pares candidatos (i_cxc, i_banco, costo).
+
+1. Los pares se agrupan en componentes conexas del grafo bipartito factura–depósito
+   (sin matriz densa global: solo aristas candidatas).
+2. Pasada codiciosa vectorizada: en cada ronda se toman las aristas que son la mejor
+   opción de *ambos* extremos (equivale al greedy global por costo).
+3. Las componentes pequeñas con ambos lados ≥ 2 se resuelven exactamente (húngaro:
+   primero máxima cardinalidad, luego mínimo costo), en paralelo si hay muchas y
+   ``workers > 1``.
+
+Cada factura y cada depósito se usa como máximo una vez. Con ``prioridad`` se
+resuelven niveles en orden (p. ej. referencia exacta antes que monto/fecha) y los
+nodos usados en un nivel no participan en los siguientes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+LIMITE_EXACTO = 64          # nodos por lado para resolver una componente con el húngaro
+MIN_COMPONENTES_PARALELO = 256
+
+
+def componentes(ia, ib) -> np.ndarray:
+    """Etiqueta de componente conexa por arista (ia = lado CxC, ib = lado Banco)."""
+    ia = np.asarray(ia, dtype="int64"); ib = np.asarray(ib, dtype="int64")
+    if len(ia) == 0:
+        return np.array([], dtype="int64")
+    _, ua = np.unique(ia, return_inverse=True)
+    _, ub = np.unique(ib, return_inverse=True)
+    na = int(ua.max()) + 1
+    u, v = ua, ub + na
+    lab = np.arange(na + int(ub.max()) + 1)
+    while True:
+        lu, lv = lab[u], lab[v]
+        m = np.minimum(lu, lv)
+        nuevo = lab.copy()
+        # enganche de raíces: cada raíz apunta a la menor etiqueta vecina (nunca forma ciclos)
+        np.minimum.at(nuevo, lu, m); np.minimum.at(nuevo, lv, m)
+        while True:                              # salto de punteros hasta que todo nodo apunte a su raíz
+            s = nuevo[nuevo]
+            if np.array_equal(s, nuevo):
+                break
+            nuevo = s
+        if np.array_equal(nuevo, lab):
+            break
+        lab = nuevo
+    return np.unique(lab[u], return_inverse=True)[1]
+
+
+def _greedy(ia, ib, rango) -> np.ndarray:
+    """Greedy por rango (menor = mejor) mediante rondas de aristas mutuamente óptimas."""
+    elegido = np.zeros(len(ia), dtype=bool)
+    vivas = np.arange(len(ia))
+    if len(ia) == 0:
+        return elegido
+    _, ua = np.unique(ia, return_inverse=True)
+    _, ub = np.unique(ib, return_inverse=True)
+    usado_a = np.zeros(int(ua.max()) + 1, dtype=bool)
+    usado_b = np.zeros(int(ub.max()) + 1, dtype=bool)
+    inf = np.iinfo("int64").max
+    while len(vivas):
+        a, b, r = ua[vivas], ub[vivas], rango[vivas]
+        mejor_a = np.full(len(usado_a), inf); np.minimum.at(mejor_a, a, r)
+        mejor_b = np.full(len(usado_b), inf); np.minimum.at(mejor_b, b, r)
+        mutuas = (mejor_a[a] == r) & (mejor_b[b] == r)
+        sel = vivas[mutuas]
+        elegido[sel] = True
+        usado_a[ua[sel]] = True; usado_b[ub[sel]] = True
+        vivas = vivas[~(usado_a[ua[vivas]] | usado_b[ub[vivas]])]
+    return elegido
+
+
+def _hungaro(costo: np.ndarray) -> np.ndarray:
+    """Asignación de mínimo costo para una matriz n×m con n ≤ m (columna por fila)."""
+    n, m = costo.shape
+    u = np.zeros(n + 1); v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int); camino = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        p[0] = i; j0 = 0
+        minv = np.full(m + 1, np.inf); usado = np.zeros(m + 1, dtype=bool)
+        while True:
+            usado[j0] = True
+            i0 = p[j0]
+            libres = ~usado[1:]
+            cur = costo[i0 - 1] - u[i0] - v[1:]
+            mejora = libres & (cur < minv[1:])
+            minv[1:][mejora] = cur[mejora]
+            camino[1:][mejora] = j0
+            cand = np.where(libres, minv[1:], np.inf)
+            j1 = int(np.argmin(cand)) + 1
+            delta = cand[j1 - 1]
+            u[p[usado]] += delta; v[usado] -= delta
+            minv[1:][libres] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = camino[j0]; p[j0] = p[j1]; j0 = j1
+    fila_col = np.full(n, -1)
+    for j in range(1, m + 1):
+        if p[j]:
+            fila_col[p[j] - 1] = j - 1
+    return fila_col
+
+
+def _exacto(args):
+    """Resuelve una componente: devuelve posiciones (locales) de las aristas elegidas."""
+    ia, ib, costo = args
+    fa, ua = np.unique(ia, return_inverse=True)
+    fb, ub = np.unique(ib, return_inverse=True)
+    transp = len(fa) > len(fb)
+    if transp:
+        ua, ub = ub, ua
+    n, m = int(ua.max()) + 1, int(ub.max()) + 1
+    # Aristas inexistentes con costo "grande": prima la cardinalidad y luego el costo
+    grande = (n + 1) * (float(np.abs(costo).max()) + 1.0)
+    mat = np.full((n, m), grande)
+    mejor = np.full((n, m), -1)
+    orden = np.argsort(costo, kind="stable")[::-1]   # si hay aristas repetidas gana la de menor costo
+    mat[ua[orden], ub[orden]] = costo[orden]
+    mejor[ua[orden], ub[orden]] = orden
+    col = _hungaro(mat)
+    filas = np.arange(n)
+    e = mejor[filas, col]
+    return e[e >= 0]
+
+
+def _resolver_exactos(tareas, workers):
+    if workers and workers > 1 and len(tareas) >= MIN_COMPONENTES_PARALELO:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(_exacto, tareas, chunksize=max(1, len(tareas) // (workers * 4))))
+    return [_exacto(t) for t in tareas]
+
+
+def _asignar_nivel(ia, ib, costo, limite_exacto, workers) -> np.ndarray:
+    # rango estricto: costo y, a igualdad, el orden de entrada (resultado determinista)
+    rango = np.empty(len(ia), dtype="int64")
+    rango[np.lexsort((np.arange(len(ia)), costo))] = np.arange(len(ia))
+    elegido = _greedy(ia, ib, rango)
+
+    comp = componentes(ia, ib)
+    orden = np.argsort(comp, kind="stable")
+    cortes = np.flatnonzero(np.diff(comp[orden])) + 1
+    tareas, posiciones = [], []
+    for grupo in np.split(orden, cortes):
+        if len(grupo) < 2:
+            continue
+        na, nb = len(np.unique(ia[grupo])), len(np.unique(ib[grupo]))
+        if min(na, nb) < 2 or max(na, nb) > limite_exacto:
+            continue                          # estrella (greedy es óptimo) o demasiado grande
+        tareas.append((ia[grupo], ib[grupo], costo[grupo])); posiciones.append(grupo)
+    for grupo, sel in zip(posiciones, _resolver_exactos(tareas, workers)):
+        elegido[grupo] = False
+        elegido[grupo[sel]] = True
+    return elegido
+
+
+def asignar_uno_a_uno(pares: pd.DataFrame, costo="costo", prioridad=None,
+                      limite_exacto=LIMITE_EXACTO, workers=1) -> pd.DataFrame:
+    """Filtra ``pares`` (columnas i_cxc, i_banco, costo) a una asignación uno a uno.
+
+    Con ``workers > 1`` las componentes exactas se reparten en un pool de procesos.
+    """
+    if pares.empty:
+        return pares.copy()
+    ia_all = pares["i_cxc"].to_numpy(dtype="int64")
+    ib_all = pares["i_banco"].to_numpy(dtype="int64")
+    c_all = pares[costo].to_numpy(dtype="float64")
+    niveles = pares[prioridad].to_numpy() if prioridad else np.zeros(len(pares), dtype=int)
+
+    elegido = np.zeros(len(pares), dtype=bool)
+    usado_a = np.zeros(int(ia_all.max()) + 1, dtype=bool)
+    usado_b = np.zeros(int(ib_all.max()) + 1, dtype=bool)
+    for nivel in np.unique(niveles):
+        pos = np.flatnonzero(niveles == nivel)
+        pos = pos[~(usado_a[ia_all[pos]] | usado_b[ib_all[pos]])]
+        if not len(pos):
+            continue
+        sel = pos[_asignar_nivel(ia_all[pos], ib_all[pos], c_all[pos], limite_exacto, workers)]
+        elegido[sel] = True
+        usado_a[ia_all[sel]] = True; usado_b[ib_all[sel]] = True
+    return pares[elegido]
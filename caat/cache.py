@@ -0,0 +1,153 @@
+# cache.py – caché por contenido (LRU con tope de memoria) para reruns de Streamlit
+"""Cada interacción con un widget vuelve a ejecutar el script completo. Este módulo
+guarda en la sesión los resultados caros, indexados por el hash del contenido de
+los archivos subidos:
+
+* nivel 1 (``"tablas"``): archivos leídos y DataFrames normalizados;
+* nivel 2 (``"pares"``): pares candidatos/asignaciones, indexados por
+  (hashes de archivos, tolerancias);
+* ``"vistas"``: órdenes, filtros y páginas Arrow del visor paginado (``caat.visor``).
+
+Los resultados que viven en disco (modo streaming) se guardan con su
+``DirectorioTemporal``: el directorio se borra cuando la entrada sale de la caché o
+la sesión se libera.
+
+Al cambiar parámetros que solo afectan pasos posteriores (umbral irrisorio, cortes de
+aging) las claves de ambos niveles no cambian y solo se recalcula lo de abajo. El
+botón "Vaciar caché" de la app descarta todos los niveles (``CacheLRU.limpiar``).
+"""
+from collections import OrderedDict
+import hashlib
+import shutil
+import sys
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+TOPE_MB = {"tablas": 1024, "pares": 512, "vistas": 256}
+MAX_HASHES = 64
+
+
+def hash_archivo(file) -> str:
+    """Hash del contenido de un archivo subido (o ruta) sin copiarlo."""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+    elif hasattr(file, "getbuffer"):
+        h.update(file.getbuffer())
+    else:
+        pos = file.tell(); file.seek(0)
+        for bloque in iter(lambda: file.read(1 << 20), b""):
+            h.update(bloque)
+        file.seek(pos)
+    return h.hexdigest()
+
+
+def hash_sesion(estado, file) -> str:
+    """``hash_archivo`` memoizado en ``estado`` por (``file_id``, tamaño) del archivo subido.
+
+    Cada rerun vuelve a pedir el hash de los mismos archivos en varios puntos del
+    script; así el contenido se recorre una sola vez por subida. Objetos sin
+    ``file_id`` (rutas, buffers) se hashean siempre.
+    """
+    file_id = getattr(file, "file_id", None)
+    if file_id is None:
+        return hash_archivo(file)
+    memo = estado.setdefault("_caat_hashes", OrderedDict())
+    clave = (file_id, getattr(file, "size", None))
+    if clave in memo:
+        memo.move_to_end(clave)
+        return memo[clave]
+    memo[clave] = hash_archivo(file)
+    while len(memo) > MAX_HASHES:
+        memo.popitem(last=False)
+    return memo[clave]
+
+
+def tamano_bytes(obj) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray) or hasattr(obj, "nbytes"):          # también pyarrow.Table
+        return int(obj.nbytes)
+    if isinstance(obj, (tuple, list)):
+        return sum(tamano_bytes(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(tamano_bytes(o) for o in obj.values())
+    return sys.getsizeof(obj)
+
+
+class DirectorioTemporal:
+    """Directorio temporal que se borra al liberarse el objeto (o al terminar el proceso)."""
+
+    def __init__(self, prefijo="caat_"):
+        self.ruta = tempfile.mkdtemp(prefix=prefijo)
+        self._borrar = weakref.finalize(self, shutil.rmtree, self.ruta, True)
+
+    def borrar(self):
+        self._borrar()
+
+
+class CacheLRU:
+    """LRU con tope de bytes: al superarlo se descartan las entradas menos usadas."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.datos = OrderedDict()
+        self.bytes = 0
+        self.aciertos = self.fallos = 0
+
+    def __contains__(self, clave):
+        return clave in self.datos
+
+    def get(self, clave, defecto=None):
+        if clave in self.datos:
+            self.datos.move_to_end(clave)
+            self.aciertos += 1
+            return self.datos[clave][0]
+        self.fallos += 1
+        return defecto
+
+    def put(self, clave, valor):
+        if clave in self.datos:
+            self.bytes -= self.datos.pop(clave)[1]
+        tam = tamano_bytes(valor)
+        if tam > self.max_bytes:
+            return valor                    # no cabe: no se guarda
+        self.datos[clave] = (valor, tam)
+        self.bytes += tam
+        while self.bytes > self.max_bytes:
+            _, (_, t) = self.datos.popitem(last=False)
+            self.bytes -= t
+        return valor
+
+    def obtener(self, clave, calcular):
+        """Devuelve el valor cacheado o lo calcula con ``calcular()`` y lo guarda."""
+        if clave in self.datos:
+            return self.get(clave)
+        self.fallos += 1
+        return self.put(clave, calcular())
+
+    def descartar(self, clave):
+        """Quita ``clave`` si está (sin contar acierto ni fallo) y devuelve su valor (``None`` si no estaba)."""
+        if clave not in self.datos:
+            return None
+        valor, tam = self.datos.pop(clave)
+        self.bytes -= tam
+        return valor
+
+    def limpiar(self):
+        self.datos.clear(); self.bytes = 0
+
+
+def cache_sesion(estado, nivel) -> CacheLRU:
+    """Caché del ``nivel`` guardado en ``estado`` (``st.session_state``)."""
+    clave = f"_caat_cache_{nivel}"
+    if clave not in estado:
+        estado[clave] = CacheLRU(TOPE_MB[nivel] * 2**20)
+    return estado[clave]
@@ -0,0 +1,118 @@
+# candidatos.py – generación de pares candidatos CxC ↔ Banco por ventana ordenada
+"""Motor de candidatos por ventana de monto y fecha.
+
+Reemplaza el merge por ``_BANDA``: ambos lados se ordenan y, con ``searchsorted``,
+cada fila de CxC obtiene su ventana de filas de banco con |Δmonto| ≤ tol_monto y
+|Δdías| ≤ tol_dias. La ventana se abre sobre el eje (monto o fecha) que genere menos
+expansiones y se procesa por bloques, de modo que la memoria crece con el número de
+pares candidatos y no con el tamaño de la banda al cuadrado.
+
+Las posiciones ``i_cxc``/``i_banco`` de todos los marcos de pares son ``TIPO_FILA``
+(int32): identifican la fila normalizada y el resto de columnas se trae por posición
+recién al materializar (``materializar_pares``).
+"""
+import numpy as np
+import pandas as pd
+
+NS_DIA = 86_400 * 10**9
+TIPO_FILA = np.int32
+REF_VACIAS = ["", "NAN", "NONE", "NAT"]        # referencias que no identifican un documento
+
+
+def _a_float(monto) -> np.ndarray:
+    return np.asarray(monto, dtype="float64")
+
+
+def _a_ns(fecha) -> np.ndarray:
+    return pd.to_datetime(pd.Series(fecha)).to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def _pares_vacios() -> pd.DataFrame:
+    return pd.DataFrame({"i_cxc": np.array([], dtype=TIPO_FILA), "i_banco": np.array([], dtype=TIPO_FILA),
+                         "_DIF_MONTO": np.array([], dtype="float64"), "_DIF_DIAS": np.array([], dtype="int64")})
+
+
+def _ventanas(clave_a, clave_b_ord, radio_izq, radio_der):
+    lo = np.searchsorted(clave_b_ord, clave_a - radio_izq, side="left")
+    hi = np.searchsorted(clave_b_ord, clave_a + radio_der, side="right")
+    return lo, hi
+
+
+def candidatos_ventana(monto_cxc, fecha_cxc, monto_banco, fecha_banco, tol_monto, tol_dias,
+                       max_pares_bloque=2_000_000) -> pd.DataFrame:
+    """Pares (i_cxc, i_banco) con |Δmonto| ≤ tol_monto y |Δdías| ≤ tol_dias.
+
+    ``i_cxc``/``i_banco`` son posiciones (0..n-1) en las entradas. Los montos se
+    comparan tal cual llegan (la app pasa valores absolutos) y los días como
+    ``abs(fecha_cxc - fecha_banco).days``, igual que el filtro previo sobre el merge.
+    El resultado viene ordenado por (i_cxc, i_banco).
+    """
+    a_m, b_m = _a_float(monto_cxc), _a_float(monto_banco)
+    a_f, b_f = _a_ns(fecha_cxc), _a_ns(fecha_banco)
+    if len(a_m) == 0 or len(b_m) == 0:
+        return _pares_vacios()
+    tol_monto = float(tol_monto); tol_dias = int(tol_dias)
+
+    # Ventana por monto: se ensancha un epsilon y luego se filtra con la fórmula exacta
+    eps = 1e-9 * max(1.0, float(np.nanmax(np.abs(a_m))), float(np.nanmax(np.abs(b_m))))
+    ord_m = np.argsort(b_m, kind="stable")
+    lo_m, hi_m = _ventanas(a_m, b_m[ord_m], tol_monto + eps, tol_monto + eps)
+    # Ventana por fecha: días truncados ≤ tol ⇔ |Δns| < (tol+1) días
+    ord_f = np.argsort(b_f, kind="stable")
+    radio = (tol_dias + 1) * NS_DIA - 1
+    lo_f, hi_f = _ventanas(a_f, b_f[ord_f], radio, radio)
+
+    n_m, n_f = (hi_m - lo_m), (hi_f - lo_f)
+    if n_m.sum() <= n_f.sum():
+        orden, lo, n = ord_m, lo_m, n_m
+    else:
+        orden, lo, n = ord_f, lo_f, n_f
+
+    bloques = []
+    acum = np.cumsum(n)
+    inicio = 0
+    while inicio < len(a_m):
+        base = acum[inicio - 1] if inicio else 0
+        fin = int(np.searchsorted(acum, base + max_pares_bloque, side="right"))
+        fin = max(fin, inicio + 1)
+        cnt = n[inicio:fin]
+        total = int(cnt.sum())
+        if total:
+            ia = np.repeat(np.arange(inicio, fin), cnt)
+            desp = np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+            ib = orden[np.repeat(lo[inicio:fin], cnt) + desp]
+            dm = np.abs(a_m[ia] - b_m[ib])
+            dd = np.abs(a_f[ia] - b_f[ib]) // NS_DIA
+            ok = (dm <= tol_monto) & (dd <= tol_dias)
+            if ok.any():
+                bloques.append((ia[ok].astype(TIPO_FILA), ib[ok].astype(TIPO_FILA), dm[ok], dd[ok]))
+        inicio = fin
+
+    if not bloques:
+        return _pares_vacios()
+    ia, ib, dm, dd = (np.concatenate(x) for x in zip(*bloques))
+    o = np.lexsort((ib, ia))
+    return pd.DataFrame({"i_cxc": ia[o], "i_banco": ib[o], "_DIF_MONTO": dm[o], "_DIF_DIAS": dd[o]})
+
+
+def candidatos_fuerza_bruta(monto_cxc, fecha_cxc, monto_banco, fecha_banco, tol_monto, tol_dias) -> pd.DataFrame:
+    """Referencia O(n·m) para validar ``candidatos_ventana`` en entradas pequeñas."""
+    a_m, b_m = _a_float(monto_cxc), _a_float(monto_banco)
+    a_f, b_f = _a_ns(fecha_cxc), _a_ns(fecha_banco)
+    dm = np.abs(a_m[:, None] - b_m[None, :])
+    dd = np.abs(a_f[:, None] - b_f[None, :]) // NS_DIA
+    ia, ib = np.nonzero((dm <= float(tol_monto)) & (dd <= int(tol_dias)))
+    if len(ia) == 0:
+        return _pares_vacios()
+    return pd.DataFrame({"i_cxc": ia.astype(TIPO_FILA), "i_banco": ib.astype(TIPO_FILA),
+                         "_DIF_MONTO": dm[ia, ib], "_DIF_DIAS": dd[ia, ib]})
+
+
+def materializar_pares(izq: pd.DataFrame, der: pd.DataFrame, i_izq, i_der, suffixes=("_CxC", "_Banco")) -> pd.DataFrame:
+    """Une filas por posición con la misma convención de sufijos que ``DataFrame.merge``."""
+    comunes = set(izq.columns) & set(der.columns)
+    a = izq.iloc[np.asarray(i_izq)].reset_index(drop=True)
+    b = der.iloc[np.asarray(i_der)].reset_index(drop=True)
+    a = a.rename(columns={c: f"{c}{suffixes[0]}" for c in comunes})
+    b = b.rename(columns={c: f"{c}{suffixes[1]}" for c in comunes})
+    return pd.concat([a, b], axis=1)
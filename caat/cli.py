@@ -0,0 +1,160 @@
+# cli.py – ejecución por lotes de las pruebas CAAT: python -m caat MANIFIESTO -o SALIDA
+"""Procesa un manifiesto de pares de archivos en paralelo (un proceso por par).
+
+El manifiesto puede ser:
+
+* un CSV con columnas ``nombre,prueba,origen,destino`` (``prueba``: ``origen_destino``
+  o ``cxc_bancos``; rutas relativas al CSV). En la prueba 6 ``destino`` puede listar
+  varios extractos separados por ``;`` y una columna opcional ``tasas`` da la tabla de
+  tipos de cambio;
+* un directorio con ``manifiesto.csv``, o con archivos emparejados por nombre:
+  ``<nombre>_origen.*`` + ``<nombre>_destino.*`` (pruebas 1–5) y
+  ``<nombre>_cxc.*`` + ``<nombre>_banco*.*`` (prueba 6; varios ``<nombre>_banco_<cuenta>.*``
+  se consolidan por cuenta, con ``<nombre>_tasas.*`` si hay cuentas en otra moneda).
+
+Por cada par escribe ``<nombre>_hallazgos.xlsx`` (o ``.csv.gz.zip``/``.parquet.zip`` con
+``--formato``) y ``<nombre>_reporte.docx``, y al final ``resumen.csv``. Con
+``--almacen DIR`` la prueba 6 es incremental (un SQLite por par).
+
+Este módulo solo importa la biblioteca estándar: pandas y el motor se cargan en los
+procesos de trabajo, así el arranque (``--help``, lectura del manifiesto) es inmediato.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+MANIFIESTO = "manifiesto.csv"
+SUFIJOS = {"origen_destino": ("_origen", "_destino"), "cxc_bancos": ("_cxc", "_banco")}
+EXTENSIONES = (".csv", ".txt", ".xlsx", ".xls", ".parquet", ".pq", ".feather", ".arrow")
+
+
+def leer_manifiesto(ruta) -> list:
+    """Lista de trabajos ``{"nombre", "prueba", "origen", "destino"}``."""
+    if os.path.isdir(ruta):
+        if os.path.exists(os.path.join(ruta, MANIFIESTO)):
+            return leer_manifiesto(os.path.join(ruta, MANIFIESTO))
+        return _emparejar_directorio(ruta)
+    base = os.path.dirname(os.path.abspath(ruta))
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        filas = list(csv.DictReader(f))
+    trabajos = []
+    for i, fila in enumerate(filas):
+        if not fila.get("origen") or not fila.get("destino"):
+            raise ValueError(f"{ruta}: la fila {i + 2} no tiene 'origen' y 'destino'")
+        destinos = [os.path.join(base, d.strip()) for d in fila["destino"].split(";") if d.strip()]
+        trabajo = {"nombre": fila.get("nombre") or f"par_{i + 1:04d}",
+                   "prueba": fila.get("prueba") or "origen_destino",
+                   "origen": os.path.join(base, fila["origen"]),
+                   "destino": destinos[0] if len(destinos) == 1 else destinos}
+        if fila.get("tasas"):
+            trabajo["tasas"] = os.path.join(base, fila["tasas"])
+        trabajos.append(trabajo)
+    return trabajos
+
+
+def _emparejar_directorio(ruta) -> list:
+    archivos = {}
+    for nombre in sorted(os.listdir(ruta)):
+        raiz, ext = os.path.splitext(nombre)
+        if ext.lower() in EXTENSIONES:
+            archivos.setdefault(raiz.lower(), os.path.join(ruta, nombre))
+    trabajos = []
+    for prueba, (suf_a, suf_b) in SUFIJOS.items():
+        for raiz, ruta_a in archivos.items():
+            if not raiz.endswith(suf_a):
+                continue
+            nombre = raiz[:-len(suf_a)]
+            if prueba != "cxc_bancos":
+                if nombre + suf_b in archivos:
+                    trabajos.append({"nombre": nombre, "prueba": prueba, "origen": ruta_a,
+                                     "destino": archivos[nombre + suf_b]})
+                continue
+            bancos = [r for k, r in archivos.items() if k == nombre + suf_b or k.startswith(nombre + suf_b + "_")]
+            if bancos:
+                trabajos.append({"nombre": nombre, "prueba": prueba, "origen": ruta_a,
+                                 "destino": bancos[0] if len(bancos) == 1 else bancos})
+                if nombre + "_tasas" in archivos:
+                    trabajos[-1]["tasas"] = archivos[nombre + "_tasas"]
+    return trabajos
+
+
+def _ejecutar(trabajo, dir_salida, parametros, formato, traza=False):
+    from caat.motor import procesar
+    try:
+        return procesar(trabajo, dir_salida, parametros, formato, traza)
+    except Exception as e:          # un par con datos inválidos no detiene el lote
+        return {"nombre": trabajo["nombre"], "prueba": trabajo.get("prueba"), "error": f"{type(e).__name__}: {e}"}
+
+
+def _escribir_resumen(filas, ruta):
+    columnas = list(dict.fromkeys(c for f in filas for c in f))
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=columnas)
+        w.writeheader(); w.writerows(filas)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="caat", description="Pruebas CAAT por lotes (origen/destino y CxC vs Bancos).")
+    ap.add_argument("manifiesto", help="CSV de manifiesto o directorio con los archivos")
+    ap.add_argument("-o", "--salida", default="salida_caat", help="directorio de entregables (por defecto: salida_caat)")
+    ap.add_argument("-j", "--procesos", type=int, default=os.cpu_count() or 1, help="procesos en paralelo")
+    ap.add_argument("--formato", choices=["xlsx", "csv.gz", "parquet"], default="xlsx", help="formato de las hojas de hallazgos")
+    ap.add_argument("--tol-monto", type=float, default=0.50, help="prueba 6: tolerancia de monto")
+    ap.add_argument("--tol-dias", type=int, default=5, help="prueba 6: ventana de días")
+    ap.add_argument("--irrisorio", type=float, default=5.0, help="prueba 6: umbral de saldo irrisorio")
+    ap.add_argument("--umbral-ref", type=float, default=0.8, help="prueba 6: similitud mínima de referencia (1.0 = exacta)")
+    ap.add_argument("--cortes", default="30,60,90", help="prueba 6: cortes de aging en días, separados por coma")
+    ap.add_argument("--aging-base", choices=["emision", "vencimiento"], default="emision",
+                    help="prueba 6: aging desde la emisión o desde el vencimiento")
+    ap.add_argument("--plazo-dias", type=int, default=0, help="prueba 6: plazo de crédito por defecto para el vencimiento")
+    ap.add_argument("--sin-parciales", action="store_true", help="prueba 6: no buscar pagos agrupados/parciales")
+    ap.add_argument("--moneda-base", default="USD", help="prueba 6: moneda a la que se convierten los extractos")
+    ap.add_argument("--moneda", action="append", default=[], metavar="CUENTA=MONEDA",
+                    help="prueba 6: moneda de un extracto sin columna de moneda (repetible)")
+    ap.add_argument("--almacen", metavar="DIR", help="prueba 6: conciliación incremental con <DIR>/<nombre>.sqlite")
+    ap.add_argument("--traza", action="store_true", help="tiempos y memoria por etapa en <nombre>_traza.json (Chrome trace)")
+    args = ap.parse_args(argv)
+
+    trabajos = leer_manifiesto(args.manifiesto)
+    if not trabajos:
+        print(f"caat: no hay pares para procesar en {args.manifiesto}", file=sys.stderr)
+        return 2
+    os.makedirs(args.salida, exist_ok=True)
+    monedas = dict(m.split("=", 1) for m in args.moneda if "=" in m)
+    for t in trabajos:
+        if t["prueba"] == "cxc_bancos":
+            t.update(moneda_base=args.moneda_base, monedas=monedas)
+    parametros = {"tol_monto": args.tol_monto, "tol_dias": args.tol_dias, "irrisorio": args.irrisorio,
+                  "detectar_parciales": not args.sin_parciales, "umbral_ref": args.umbral_ref,
+                  "aging_cortes": [int(c) for c in args.cortes.split(",") if c.strip()],
+                  "aging_base": args.aging_base, "plazo_dias": args.plazo_dias}
+    if args.almacen:
+        os.makedirs(args.almacen, exist_ok=True)
+        parametros["almacen"] = os.path.abspath(args.almacen)
+
+    t0 = time.perf_counter()
+    filas = []
+    if args.procesos <= 1 or len(trabajos) == 1:
+        for t in trabajos:
+            filas.append(_ejecutar(t, args.salida, parametros, args.formato, args.traza)); _informar(filas[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.procesos, len(trabajos))) as ex:
+            futuros = [ex.submit(_ejecutar, t, args.salida, parametros, args.formato, args.traza) for t in trabajos]
+            for fut in as_completed(futuros):
+                filas.append(fut.result()); _informar(filas[-1])
+    orden = {t["nombre"]: i for i, t in enumerate(trabajos)}
+    filas.sort(key=lambda f: orden[f["nombre"]])
+    _escribir_resumen(filas, os.path.join(args.salida, "resumen.csv"))
+    errores = sum("error" in f for f in filas)
+    print(f"caat: {len(filas) - errores}/{len(filas)} pares en {time.perf_counter() - t0:.1f}s → {args.salida}")
+    return 1 if errores else 0
+
+
+def _informar(fila):
+    if "error" in fila:
+        print(f"  ✗ {fila['nombre']}: {fila['error']}", file=sys.stderr)
+    else:
+        print(f"  ✓ {fila['nombre']} ({fila['prueba']}, {fila['segundos']}s)")
@@ -0,0 +1,127 @@
+# consolidacion.py – prueba 6 con varias cuentas bancarias y monedas contra un mismo mayor de CxC
+"""Consolidación de extractos bancarios antes de la prueba 6.
+
+* ``leer_extractos`` – lee los extractos en hilos (la lectura es E/S y el lector de
+  pyarrow libera el GIL), conservando el orden;
+* ``consolidar_bancos`` – un solo extracto con ``Cuenta`` y ``Moneda`` por fila y el monto
+  convertido a la moneda base. Las primeras columnas son ``Cuenta``, ``Moneda``, ``Fecha``,
+  ``Monto`` (moneda base), ``Referencia``, ``Monto_original`` y ``Tasa_cambio``; las demás
+  columnas de cada extracto se conservan para mostrar;
+* ``convertir`` – tipo de cambio por fecha con ``merge_asof`` hacia atrás por moneda: cada
+  movimiento usa la última tasa publicada a su fecha.
+
+La tabla de tasas trae fecha, moneda y tasa (unidades de moneda base por unidad de la
+moneda). La cuenta sale de una columna del extracto (``cuenta``/``account``) o, si no hay,
+del nombre del archivo; la moneda, de una columna (``moneda``/``currency``) o de
+``monedas[cuenta]`` (por defecto la moneda base). ``ValueError`` si falta una tasa.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+import pandas as pd
+
+from caat.cxc_bancos import COLUMNAS_BANCO, CUENTA, MONEDA, pick
+from caat.normalizacion import _a_punto, a_centavos, a_fecha, detectar_formato_monto
+from caat.perfil import contar, etapa
+
+MONEDA_BASE = "USD"
+COLUMNAS_TASAS = {"fecha": ["fecha", "date"], "moneda": ["moneda", "currency", "divisa"],
+                  "tasa": ["tasa", "tipo_cambio", "tc", "rate", "cambio"]}
+COLUMNAS_EXTRACTO = {"cuenta": ["cuenta", "numero_cuenta", "nro_cuenta", "account"],
+                     "moneda": COLUMNAS_TASAS["moneda"]}
+
+
+def leer_extractos(fuentes, leer, trabajadores=None) -> list:
+    """``[leer(f) for f in fuentes]`` en hilos, medido como una sola etapa (los hilos no ven el perfil activo)."""
+    fuentes = list(fuentes)
+    with etapa("leer extractos", archivos=len(fuentes)):
+        if len(fuentes) <= 1:
+            dfs = [leer(f) for f in fuentes]
+        else:
+            with ThreadPoolExecutor(max_workers=trabajadores or min(len(fuentes), 2 * (os.cpu_count() or 1))) as ex:
+                dfs = list(ex.map(leer, fuentes))
+        contar("filas", sum(len(df) for df in dfs))
+    return dfs
+
+
+def cuenta_de_archivo(nombre, prefijo="") -> str:
+    """Nombre de archivo → etiqueta de cuenta (sin carpeta, extensión ni ``prefijo``)."""
+    raiz = os.path.splitext(os.path.basename(str(nombre)))[0]
+    if prefijo and raiz.lower().startswith(prefijo.lower()):
+        raiz = raiz[len(prefijo):]
+    return raiz.strip("_- ") or raiz
+
+
+def _a_tasa(s: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(s):
+        return pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64")
+    s = s.astype("string").str.strip()
+    decimal, miles = detectar_formato_monto(s)
+    return pd.to_numeric(_a_punto(s, decimal, miles), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def leer_tasas(df) -> pd.DataFrame:
+    """Tabla de tasas → ``Fecha``, ``Moneda``, ``Tasa`` ordenada por fecha (``ValueError`` si faltan columnas)."""
+    df = df.rename(columns=lambda x: str(x).strip())
+    col = {k: pick(df, v) for k, v in COLUMNAS_TASAS.items()}
+    if not all(col.values()):
+        raise ValueError("La tabla de tipos de cambio debe tener columnas de fecha, moneda y tasa.")
+    tasas = pd.DataFrame({"Fecha": a_fecha(df[col["fecha"]]).to_numpy(dtype="datetime64[ns]"),
+                          MONEDA: df[col["moneda"]].astype(str).str.strip().str.upper().to_numpy(dtype=object),
+                          "Tasa": _a_tasa(df[col["tasa"]])})
+    tasas = tasas.dropna()
+    return tasas[tasas["Tasa"] > 0].sort_values("Fecha", kind="stable").reset_index(drop=True)
+
+
+def convertir(fechas, monedas, tasas, moneda_base=MONEDA_BASE) -> np.ndarray:
+    """Tasa de cada movimiento (1 en la moneda base); ``ValueError`` si alguna moneda no tiene tasa a su fecha."""
+    mov = pd.DataFrame({"Fecha": pd.Series(fechas).to_numpy(dtype="datetime64[ns]"),
+                        MONEDA: np.asarray(monedas, dtype=object), "_POS": np.arange(len(monedas))})
+    tasa = np.ones(len(mov))
+    ext = mov[(mov[MONEDA] != moneda_base).to_numpy() & mov["Fecha"].notna().to_numpy()]
+    if not len(ext):
+        return tasa
+    if tasas is None or not len(tasas):
+        raise ValueError(f"Hay movimientos en {', '.join(sorted(ext[MONEDA].unique()))} y no hay tabla de tipos de cambio.")
+    # merge_asof exige ambos lados ordenados por la clave; "by" separa las monedas
+    unido = pd.merge_asof(ext.sort_values("Fecha", kind="stable"), tasas, on="Fecha", by=MONEDA, direction="backward")
+    faltan = unido[unido["Tasa"].isna()]
+    if len(faltan):
+        f = faltan.iloc[0]
+        raise ValueError(f"Sin tipo de cambio para {f[MONEDA]} al {f['Fecha']:%Y-%m-%d} "
+                         f"({len(faltan)} movimientos sin tasa).")
+    tasa[unido["_POS"].to_numpy()] = unido["Tasa"].to_numpy()
+    return tasa
+
+
+def consolidar_bancos(extractos: dict, tasas=None, moneda_base=MONEDA_BASE, monedas=None) -> pd.DataFrame:
+    """``{cuenta: DataFrame}`` → un extracto en moneda base con ``Cuenta`` y ``Moneda`` (ver módulo).
+
+    ``tasas`` es la tabla de tipos de cambio tal como se leyó; ``monedas`` es ``{cuenta: moneda}``
+    para los extractos sin columna de moneda.
+    """
+    monedas = {k: str(v).strip().upper() for k, v in (monedas or {}).items()}
+    moneda_base = str(moneda_base).strip().upper()
+    partes = []
+    for cuenta, df in extractos.items():
+        df = df.rename(columns=lambda x: str(x).strip())
+        col = {k: pick(df, v) for k, v in {**COLUMNAS_BANCO, **COLUMNAS_EXTRACTO}.items()}
+        if not (col["fecha"] and col["monto"]):
+            raise ValueError(f"No se pudieron identificar las columnas mínimas (Fecha/Monto) en el extracto '{cuenta}'.")
+        n = len(df)
+        parte = pd.DataFrame({
+            CUENTA: (df[col["cuenta"]].astype(str).str.strip().to_numpy(dtype=object) if col["cuenta"]
+                     else np.full(n, str(cuenta), dtype=object)),
+            MONEDA: (df[col["moneda"]].astype(str).str.strip().str.upper().to_numpy(dtype=object) if col["moneda"]
+                     else np.full(n, monedas.get(cuenta, moneda_base), dtype=object)),
+            "Fecha": a_fecha(df[col["fecha"]]).to_numpy(dtype="datetime64[ns]"),
+            "Referencia": df[col["ref"]].astype(str).to_numpy(dtype=object) if col["ref"] else np.full(n, "", dtype=object),
+            "Monto_original": a_centavos(df[col["monto"]]).astype("Float64").div(100).to_numpy(dtype="float64", na_value=np.nan)})
+        usadas = [c for c in col.values() if c]
+        partes.append(pd.concat([parte, df.drop(columns=usadas).reset_index(drop=True)], axis=1))
+    banco = pd.concat(partes, ignore_index=True, sort=False)
+    tasa = convertir(banco["Fecha"], banco[MONEDA], None if tasas is None else leer_tasas(tasas), moneda_base)
+    banco.insert(3, "Monto", np.round(banco["Monto_original"].to_numpy() * tasa, 2))
+    banco.insert(6, "Tasa_cambio", tasa)
+    return banco
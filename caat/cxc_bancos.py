@@ -0,0 +1,394 @@
+# cxc_bancos.py – prueba 6: CxC vs Bancos + Aging (sin Streamlit)
+"""Motor de la prueba 6 por etapas, para que la app pueda cachear cada una:
+
+* ``normalizar``  – columnas detectadas por nombre → ``Transacciones`` (``caat.transacciones``):
+  núcleo con ``_CENT``/``_DIA``/``_REF``/``_CLI``/``_OBS`` (y ``_DIA_VENCE``/``_PLAZO`` si CxC trae
+  vencimiento o plazo de crédito) y el archivo leído como carga;
+* ``compensar_nc`` – NC y retenciones aplicadas a sus facturas (``caat.notas_credito``):
+  el cruce con el banco parte de saldos netos;
+* ``emparejar``   – referencia (exacta o aproximada, ``caat.referencias``), monto/fecha uno a
+  uno y pagos agrupados/parciales (``enlaces``), en serie o en paralelo por cliente
+  (``caat.paralelo``);
+* ``resultados``  – conciliados, pendientes, pagos no aplicados, aging (``caat.aging``), irrisorios, posibles NC
+  y, si el banco viene de varias cuentas (``caat.consolidacion``), el desglose por cuenta;
+* ``hojas_xlsx`` / ``secciones_docx`` – contenido de los entregables.
+
+``conciliar_cxc_bancos`` encadena las etapas con ``PARAMETROS`` por defecto.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from caat.aging import CORTES, agregar_aging, etiquetas_aging, fecha_base, tramos_aging
+from caat.asignacion import asignar_uno_a_uno
+from caat.candidatos import TIPO_FILA, candidatos_ventana, materializar_pares
+from caat.normalizacion import a_centavos, a_fecha
+from caat.notas_credito import SIN_CLASIFICAR, TASAS_RETENCION, VENTANA_DIAS as VENTANA_NC, clasificar, compensar
+from caat.pagos_parciales import COLUMNAS_AFINIDAD, buscar_pagos_parciales
+from caat.perfil import contar, etapa
+from caat.referencias import UMBRAL_SIMILITUD, candidatos_referencia_difusa, pares_similares
+from caat.transacciones import SIN_DIA, Transacciones, categoria, dias
+
+PARAMETROS = {"tol_monto": 0.50, "tol_dias": 5, "irrisorio": 5.0, "aging_cortes": [30, 60, 90],
+              "aging_base": "emision", "plazo_dias": 0,
+              "compensar_nc": True, "ventana_nc": VENTANA_NC, "tasas_retencion": TASAS_RETENCION,
+              "detectar_parciales": True, "max_items_parcial": 4, "ventana_parcial": 30, "umbral_ref": UMBRAL_SIMILITUD,
+              "procesos": 1, "almacen": None}
+COLUMNAS_BANCO = {"fecha": ["fecha","fec","date"], "monto": ["monto","importe","abono","deposito","cr","credito","valor"],
+                  "ref": ["referencia","ref","descripcion","concepto","detalle"]}
+CUENTA, MONEDA = "Cuenta", "Moneda"
+COLUMNAS_CUENTAS = [CUENTA, MONEDA, "Movimientos", "Monto_moneda", "Monto_base", "Aplicados", "Monto_aplicado",
+                    "NoAplicados", "Monto_no_aplicado", "Pct_aplicado"]
+TITULO_DOCX = "CxC vs Bancos + Aging – Reporte de Auditoría"
+# {tramos}, {alerta} e {irrisorio} se completan en ``recomendaciones`` con los parámetros de la corrida
+RECOMENDACIONES = [
+    "Automatizar el cruce de pagos banco ↔ facturas con ventana de días y tolerancia de monto.",
+    "Parametrizar aging ({tramos}) con alertas a Cobranzas desde {alerta}+ días.",
+    "Saneamiento mensual de saldos irrisorios conforme política (p. ej., ≤ {irrisorio:,.2f}).",
+    "Forzar aplicación de NC/retenciones contra las facturas correspondientes antes del cierre.",
+    "Revisión quincenal conjunta Tesorería–Cobranzas y bitácora de pagos no identificados.",
+    "Incluir referencia obligatoria en depósitos (n° factura/cliente) y validar en interfaz bancaria."
+]
+
+
+def pick(df, choices):
+    """Primera columna cuyo nombre coincide (o contiene como palabra) alguna de ``choices``."""
+    for c in df.columns:
+        if c.lower() in [s.lower() for s in choices]: return c
+        if any(re.search(rf"\b{re.escape(s)}\b", c, flags=re.I) for s in choices): return c
+    return None
+
+
+def normalizar(cxc, bank):
+    """Devuelve ``(cxc, bank, hay_ref)`` como ``Transacciones``. ``ValueError`` si faltan Fecha/Monto.
+
+    Las filas sin fecha o monto interpretables quedan fuera del núcleo (siguen en la carga).
+    """
+    cxc = cxc.rename(columns=lambda x: str(x).strip())
+    bank = bank.rename(columns=lambda x: str(x).strip())
+    col_cli = pick(cxc, ["cliente","id_cliente","ruc","identificacion"])
+    col_ref_cxc = pick(cxc, ["numerofactura","numero_factura","referencia","documento","id_transaccion","id"])
+    col_fecha_cxc = pick(cxc, ["fecha","fecha_emision","fecha_documento"])
+    col_monto_cxc = pick(cxc, ["monto","importe","total","saldo","valor"])
+    col_obs_cxc = pick(cxc, ["observacion","glosa","detalle","descripcion"])
+    col_vence_cxc = pick(cxc, ["fecha_vencimiento","vencimiento","fecha_vence","due_date"])
+    col_plazo_cxc = pick(cxc, ["plazo","plazo_dias","dias_credito","dias_plazo","condicion_pago"])
+
+    col_fecha_b = pick(bank, COLUMNAS_BANCO["fecha"])
+    col_monto_b = pick(bank, COLUMNAS_BANCO["monto"])
+    col_ref_b = pick(bank, COLUMNAS_BANCO["ref"])
+
+    if not all([col_fecha_cxc, col_monto_cxc, col_fecha_b, col_monto_b]):
+        raise ValueError("No se pudieron identificar las columnas mínimas (Fecha/Monto) en CxC o Banco.")
+
+    # núcleo angosto; identidad de fila = posición en el archivo leído (se conserva al descartar filas inválidas)
+    n_cxc = pd.DataFrame({"_FILA": np.arange(len(cxc), dtype=TIPO_FILA),
+                          "_CENT": a_centavos(cxc[col_monto_cxc]).array,
+                          "_DIA": dias(a_fecha(cxc[col_fecha_cxc]))})
+    n_cxc["_REF"] = categoria(cxc[col_ref_cxc].astype(str).str.strip().str.upper() if col_ref_cxc else [""] * len(cxc))
+    n_cxc["_CLI"] = categoria(cxc[col_cli].astype(str).str.strip() if col_cli else ["SIN_CLIENTE"] * len(cxc))
+    n_cxc["_OBS"] = categoria(cxc[col_obs_cxc].astype(str) if col_obs_cxc else [""] * len(cxc))
+    if col_vence_cxc:
+        n_cxc["_DIA_VENCE"] = dias(a_fecha(cxc[col_vence_cxc]))
+    if col_plazo_cxc:
+        # "30", "30 días", "Neto 30" → 30
+        n_cxc["_PLAZO"] = pd.to_numeric(cxc[col_plazo_cxc].astype(str).str.extract(r"(\d+)", expand=False),
+                                        errors="coerce").to_numpy(dtype="float32")
+
+    n_bank = pd.DataFrame({"_FILA": np.arange(len(bank), dtype=TIPO_FILA),
+                           "_CENT": a_centavos(bank[col_monto_b]).array,
+                           "_DIA": dias(a_fecha(bank[col_fecha_b]))})
+    n_bank["_REF"] = categoria(bank[col_ref_b].astype(str).str.strip().str.upper() if col_ref_b else [""] * len(bank))
+    return _compactar(n_cxc, cxc), _compactar(n_bank, bank), bool(col_ref_cxc and col_ref_b)
+
+
+def _compactar(nucleo, carga):
+    valido = (nucleo["_DIA"].to_numpy() != SIN_DIA) & nucleo["_CENT"].notna().to_numpy()
+    nucleo = nucleo[valido].reset_index(drop=True)
+    nucleo["_CENT"] = nucleo["_CENT"].to_numpy(dtype="int64")
+    for c in nucleo.columns[nucleo.dtypes == "category"]:
+        nucleo[c] = nucleo[c].cat.remove_unused_categories()
+    return Transacciones(nucleo, carga)
+
+
+def compensar_nc(cxc, tol_monto, tasas_retencion=TASAS_RETENCION, ventana_nc=VENTANA_NC):
+    """``(cxc_neto, compensaciones)``: CxC con NC/retenciones aplicadas y la tabla factura ↔ crédito.
+
+    ``compensaciones`` tiene las columnas de la factura (``_Factura``) y del crédito (``_NC``)
+    más ``_APLICADO``, ``_TIPO_NC`` y ``_CRITERIO`` (ver ``caat.notas_credito.compensar``).
+    """
+    cxc_neto, enlaces = compensar(cxc, round(tol_monto * 100), tasas_retencion, ventana_nc)
+    contar("compensaciones", len(enlaces))
+    i_f, i_c = enlaces["i_factura"].to_numpy(), enlaces["i_credito"].to_numpy()
+    compensaciones = materializar_pares(cxc.materializar(i_f), cxc.materializar(i_c), np.arange(len(i_f)),
+                                        np.arange(len(i_c)), suffixes=("_Factura", "_NC"))
+    compensaciones["_APLICADO"] = enlaces["_CENT_APLICADO"].to_numpy() / 100
+    compensaciones["_TIPO_NC"] = enlaces["_TIPO_NC"].to_numpy()
+    compensaciones["_CRITERIO"] = enlaces["_CRITERIO"].to_numpy()
+    return cxc_neto, compensaciones
+
+
+def emparejar(cxc, bank, hay_ref, tol_monto, tol_dias, detectar_parciales=True, max_items_parcial=4, ventana_parcial=30,
+              procesos=1, umbral_ref=UMBRAL_SIMILITUD):
+    """Enlaces ``i_cxc``/``i_banco`` con ``_DIF_MONTO``, ``_DIF_DIAS``, ``_TIPO_MATCH`` (y ``_GRUPO`` si hay agrupados).
+
+    Con ``procesos > 1`` los candidatos y la asignación se calculan en paralelo
+    (``caat.paralelo``); el resultado es idéntico al serial. ``umbral_ref`` es la
+    similitud mínima (Dice de trigramas) para un match por referencia aproximada;
+    con 1.0 solo cuentan las referencias que aparecen tal cual en el concepto.
+    """
+    if procesos > 1 and len(cxc) and len(bank):
+        from caat.paralelo import candidatos_y_asignacion
+        with etapa("candidatos y asignación (paralelo)", procesos=procesos):
+            asignados = candidatos_y_asignacion(cxc, bank, hay_ref, tol_monto, tol_dias, procesos, umbral_ref)
+            contar("enlaces", len(asignados))
+    else:
+        # 1) Match por referencia (si hay): exacta o aproximada contra los tokens del concepto
+        with etapa("candidatos referencia"):
+            pares_ref = pares_referencia(cxc, bank, hay_ref, tol_monto, umbral_ref)
+            contar("pares", len(pares_ref))
+
+        # 2) Match por monto (+/- tolerancia) y fecha cercana
+        # Ventana ordenada (searchsorted) en vez de merge por bandas: sin explosión n×m ni cortes de banda
+        with etapa("candidatos monto/fecha"):
+            pares = candidatos_ventana(cxc["_MONTO"].abs(), cxc["_FECHA"], bank["_MONTO"].abs(), bank["_FECHA"],
+                                       tol_monto, tol_dias)
+            contar("pares", len(pares))
+        with etapa("asignación uno a uno", candidatos=len(pares_ref) + len(pares)):
+            candidatos = combinar_candidatos(pares_ref, pares, tol_monto, tol_dias)
+            asignados = asignar_uno_a_uno(candidatos, costo="_COSTO", prioridad="_PRIORIDAD", workers=procesos)
+            contar("enlaces", len(asignados))
+    asignados = asignados.sort_values("i_cxc")
+    enlaces = asignados[["i_cxc","i_banco","_DIF_MONTO","_DIF_DIAS","_TIPO_MATCH"]]
+
+    # 2b) Pagos agrupados (N facturas ↔ 1 depósito) y parciales (1 factura ↔ N depósitos)
+    if detectar_parciales:
+        with etapa("pagos parciales"):
+            libre_c = np.ones(len(cxc), dtype=bool); libre_c[asignados["i_cxc"].to_numpy(dtype=int)] = False
+            libre_b = np.ones(len(bank), dtype=bool); libre_b[asignados["i_banco"].to_numpy(dtype=int)] = False
+            dias_cxc = cxc["_DIA"].to_numpy(dtype="int64")
+            dias_bank = bank["_DIA"].to_numpy(dtype="int64")
+            grupos = buscar_pagos_parciales(
+                pd.DataFrame({"i_cxc": np.flatnonzero(libre_c), "cent": cxc["_CENT"].to_numpy(dtype="int64")[libre_c],
+                              "dia": dias_cxc[libre_c], "cli": cxc["_CLI"][libre_c].to_numpy()}),
+                pd.DataFrame({"i_banco": np.flatnonzero(libre_b), "cent": bank["_CENT"].to_numpy(dtype="int64")[libre_b],
+                              "dia": dias_bank[libre_b]}),
+                afinidad(cxc, bank, hay_ref, libre_c, libre_b, umbral_ref),
+                tol_cent=round(tol_monto * 100), ventana_dias=ventana_parcial, max_items=max_items_parcial)
+            if len(grupos):
+                grupos["_DIF_DIAS"] = np.abs(dias_cxc[grupos["i_cxc"]] - dias_bank[grupos["i_banco"]])
+                enlaces = pd.concat([enlaces, grupos], ignore_index=True, sort=False)
+            contar("enlaces", len(grupos))
+    return enlaces.astype({"i_cxc": TIPO_FILA, "i_banco": TIPO_FILA}).reset_index(drop=True)
+
+
+def pares_referencia(cxc, bank, hay_ref, tol_monto, umbral_ref=UMBRAL_SIMILITUD):
+    """Candidatos por referencia con ``_SIM`` (vacío si no hay columnas de referencia)."""
+    if not hay_ref:
+        return pd.DataFrame(columns=["i_cxc","i_banco","_DIF_MONTO","_DIF_DIAS","_SIM"])
+    return candidatos_referencia_difusa(cxc["_REF"], bank["_REF"], cxc["_MONTO"], bank["_MONTO"],
+                                        cxc["_FECHA"], bank["_FECHA"], tol_monto, umbral_ref)
+
+
+def afinidad(cxc, bank, hay_ref, libre_c, libre_b, umbral_ref=UMBRAL_SIMILITUD) -> pd.DataFrame:
+    """Depósitos libres cuyo concepto nombra una factura abierta (``COLUMNAS_AFINIDAD``), para ``buscar_pagos_parciales``."""
+    if not hay_ref or not libre_c.any() or not libre_b.any():
+        return pd.DataFrame(columns=COLUMNAS_AFINIDAD)
+    i_c, i_b = np.flatnonzero(libre_c), np.flatnonzero(libre_b)
+    pares = pares_similares(cxc["_REF"].to_numpy()[i_c], bank["_REF"].to_numpy()[i_b], umbral_ref)
+    i_c = i_c[pares["i_cxc"].to_numpy(dtype="int64")]
+    return pd.DataFrame({"i_banco": i_b[pares["i_banco"].to_numpy(dtype="int64")], "i_cxc": i_c,
+                         "cli": cxc["_CLI"].to_numpy()[i_c], "sim": pares["_SIM"].to_numpy()})
+
+
+def combinar_candidatos(pares_ref, pares, tol_monto, tol_dias):
+    """Asignación uno a uno: primero referencias, luego monto/fecha (menor desvío relativo gana).
+
+    Entre referencias, la menos parecida (``1 - _SIM``) suma al costo.
+    """
+    sim = pares_ref["_SIM"].astype(float) if "_SIM" in pares_ref.columns else pd.Series(1.0, index=pares_ref.index)
+    tipo_ref = np.where(sim.to_numpy() >= 1, "Referencia", "Referencia aproximada")
+    candidatos = pd.concat([pares_ref.drop(columns="_SIM", errors="ignore").assign(_TIPO_MATCH=tipo_ref, _PRIORIDAD=0),
+                            pares.assign(_TIPO_MATCH="Monto/Fecha", _PRIORIDAD=1)], ignore_index=True)
+    candidatos["_COSTO"] = (candidatos["_DIF_MONTO"].astype(float) / max(tol_monto, 0.01)
+                            + candidatos["_DIF_DIAS"].astype(float) / max(tol_dias, 1)
+                            + np.concatenate([1 - sim.to_numpy(), np.zeros(len(pares))]))
+    return candidatos
+
+
+def resultados(cxc, bank, enlaces, irrisorio=5.0, aging_cortes=(30, 60, 90), hoy=None, aging_base="emision",
+               plazo_dias=0, compensaciones=None) -> dict:
+    """Tablas de hallazgos a partir de los enlaces (ver ``emparejar``).
+
+    El aging cuenta desde la emisión o desde el vencimiento (``caat.aging.fecha_base``).
+    ``compensaciones`` es la tabla de ``compensar_nc`` (vacía si no se compensó).
+    """
+    # los enlaces solo llevan posiciones; las columnas originales (carga) se traen recién aquí y solo para las
+    # filas de salida (``_FILA_CxC``/``_FILA_Banco`` identifican la fila de cada archivo)
+    i_c, i_b = enlaces["i_cxc"].to_numpy(), enlaces["i_banco"].to_numpy()
+    conciliados = materializar_pares(cxc.materializar(i_c), bank.materializar(i_b), np.arange(len(i_c)),
+                                     np.arange(len(i_b)), suffixes=("_CxC","_Banco"))
+    for c in enlaces.columns.drop(["i_cxc","i_banco"]):
+        conciliados[c] = enlaces[c].to_numpy()
+
+    # 3) Pendientes en CxC (no conciliados) y pagos de banco no aplicados: máscara por posición, sin joins
+    conc_c = np.zeros(len(cxc), dtype=bool); conc_c[i_c] = True
+    conc_b = np.zeros(len(bank), dtype=bool); conc_b[i_b] = True
+    pend_cxc = cxc.materializar(np.flatnonzero(~conc_c))
+    pagos_no_aplicados = bank.materializar(np.flatnonzero(~conc_b))
+
+    # 4) Aging de pendientes CxC (días respecto a hoy/fecha más reciente) por tramo y por cliente × tramo
+    if hoy is None:
+        hoy = max(pd.Timestamp.today().normalize(), cxc["_FECHA"].max())
+    pend_cxc["Aging_dias"], pend_cxc["Aging_bucket"] = tramos_aging(fecha_base(pend_cxc, aging_base, plazo_dias),
+                                                                    hoy, aging_cortes)
+    aging_cliente, aging = agregar_aging(pend_cxc["_CLI"], pend_cxc["Aging_bucket"].array, pend_cxc["_MONTO"])
+
+    # 5) Saldos irrisorios
+    irrisorios_df = pend_cxc[(pend_cxc["_MONTO"].abs() <= irrisorio)].copy()
+
+    # 6) NC/Retenciones que siguen en CxC (las compensadas ya salieron): signo o palabras clave
+    tipo = clasificar(cxc["_OBS"])
+    negativo = cxc["_CENT"].to_numpy() < 0
+    es_nc = np.flatnonzero(negativo | (tipo != ""))
+    posibles_nc = cxc.materializar(es_nc)
+    posibles_nc["_TIPO_NC"] = np.where(tipo[es_nc] == "", SIN_CLASIFICAR, tipo[es_nc])
+
+    return {"por_cuenta": resumen_cuentas(bank, conc_b),
+            "conciliados": conciliados, "pend_cxc": pend_cxc, "pagos_no_aplicados": pagos_no_aplicados,
+            "aging": aging, "aging_cliente": aging_cliente, "irrisorios": irrisorios_df, "posibles_nc": posibles_nc,
+            "compensaciones": pd.DataFrame() if compensaciones is None else compensaciones}
+
+
+def resumen_cuentas(bank, aplicado) -> pd.DataFrame:
+    """``COLUMNAS_CUENTAS`` por cuenta y moneda del banco consolidado (vacío con una sola cuenta sin ``CUENTA``).
+
+    ``aplicado`` marca los movimientos del núcleo con algún enlace. ``Monto_moneda`` suma en la
+    moneda de la cuenta; el resto de montos van en moneda base.
+    """
+    if CUENTA not in bank.carga.columns:
+        return pd.DataFrame(columns=COLUMNAS_CUENTAS)
+    filas, monto = bank["_FILA"].to_numpy(), bank["_MONTO"].to_numpy()
+    carga = bank.carga
+    d = pd.DataFrame({CUENTA: carga[CUENTA].to_numpy()[filas],
+                      MONEDA: carga[MONEDA].to_numpy()[filas] if MONEDA in carga.columns else "",
+                      "Monto_moneda": (carga["Monto_original"].to_numpy(dtype="float64")[filas]
+                                       if "Monto_original" in carga.columns else monto),
+                      "Monto_base": monto, "Aplicados": aplicado, "Monto_aplicado": np.where(aplicado, monto, 0.0)})
+    r = d.groupby([CUENTA, MONEDA], sort=True).agg(
+        Movimientos=("Monto_base", "size"), Monto_moneda=("Monto_moneda", "sum"), Monto_base=("Monto_base", "sum"),
+        Aplicados=("Aplicados", "sum"), Monto_aplicado=("Monto_aplicado", "sum")).reset_index()
+    r["NoAplicados"] = r["Movimientos"] - r["Aplicados"]
+    r["Monto_no_aplicado"] = (r["Monto_base"] - r["Monto_aplicado"]).round(2)
+    r["Pct_aplicado"] = (100 * r["Aplicados"] / r["Movimientos"]).round(1)
+    return r[COLUMNAS_CUENTAS].round({"Monto_moneda": 2, "Monto_base": 2, "Monto_aplicado": 2})
+
+
+def metricas(res) -> dict:
+    return {"Conciliados": len(res["conciliados"]), "Pendientes CxC": len(res["pend_cxc"]),
+            "Pagos no aplicados (Banco)": len(res["pagos_no_aplicados"]), "Saldos irrisorios": len(res["irrisorios"]),
+            "NC/Retenciones compensadas": len(res.get("compensaciones", ()))}
+
+
+def hojas_xlsx(res, tol_monto, tol_dias) -> dict:
+    m = metricas(res)
+    resumen = pd.DataFrame({
+        "Métrica":["Conciliados","PendientesCxC","PagosNoAplicadosBanco","SaldosIrrisorios","NCRetencionesCompensadas",
+                   "VentanaDias","TolMonto"],
+        "Valor":[m["Conciliados"], m["Pendientes CxC"], m["Pagos no aplicados (Banco)"], m["Saldos irrisorios"],
+                 m["NC/Retenciones compensadas"], tol_dias, tol_monto]
+    })
+    por_cuenta = res.get("por_cuenta", pd.DataFrame())
+    if len(por_cuenta):
+        # una fila por cuenta y métrica, bajo las generales
+        filas = [(f"{c[CUENTA]} ({c[MONEDA]}) – {k}", c[k]) for _, c in por_cuenta.iterrows()
+                 for k in ("Movimientos", "Aplicados", "NoAplicados", "Monto_no_aplicado")]
+        resumen = pd.concat([resumen, pd.DataFrame(filas, columns=["Métrica", "Valor"])], ignore_index=True)
+    hojas = {
+        "Resumen": resumen,
+        "Conciliados": res["conciliados"],
+        "PendientesCxC": res["pend_cxc"],
+        "PagosNoAplicadosBanco": res["pagos_no_aplicados"],
+        "Aging": res["aging"],
+        "AgingCliente": res["aging_cliente"],
+        "SaldosIrrisorios": res["irrisorios"],
+        "PosiblesNC_Retenciones": res["posibles_nc"],
+        "CompensacionesNC": res.get("compensaciones", pd.DataFrame())
+    }
+    if len(por_cuenta):
+        hojas["PorCuenta"] = por_cuenta
+    return hojas
+
+
+def recomendaciones(aging_cortes=CORTES, irrisorio=5.0) -> list:
+    """``RECOMENDACIONES`` con los tramos de ``etiquetas_aging(aging_cortes)`` y el umbral irrisorio."""
+    tramos = etiquetas_aging(aging_cortes)[1:]           # sin "Por vencer"
+    alerta = int(tramos[0].split("-")[1]) + 1             # desde el segundo tramo
+    return [r.format(tramos="/".join(tramos), alerta=alerta, irrisorio=irrisorio) for r in RECOMENDACIONES]
+
+
+def secciones_docx(res, nombre_cxc, nombre_banco, tol_monto, tol_dias, irrisorio, aging_cortes=CORTES) -> list:
+    m = metricas(res)
+    c_conc, c_pend, c_noap, c_irri, c_comp = m.values()
+    aging, posibles_nc = res["aging"], res["posibles_nc"]
+    resumen_doc = [
+        f"Archivo CxC: {nombre_cxc} | Banco: {nombre_banco}",
+        f"Conciliados: {c_conc} | Pendientes CxC: {c_pend} | Pagos no aplicados: {c_noap}",
+        f"Saldos irrisorios (≤ {irrisorio:.2f}): {c_irri} | NC/retenciones compensadas contra facturas: {c_comp}",
+        f"Parámetros: Ventana ±{tol_dias} días, tolerancia ±{tol_monto:.2f}"
+    ]
+    top_focus = []
+    if len(aging):
+        worst = aging.sort_values("Suma", ascending=False).head(1)
+        if len(worst):
+            b = worst.iloc[0]["Aging_bucket"]; s = worst.iloc[0]["Suma"]
+            top_focus.append(f"Aging crítico: {b} con {s:,.2f}")
+    if len(res["aging_cliente"]):
+        ultimo = res["aging_cliente"][res["aging_cliente"]["Aging_bucket"] == res["aging_cliente"]["Aging_bucket"].max()]
+        peor = ultimo.sort_values("Suma", ascending=False).iloc[0]
+        top_focus.append(f"Cliente con mayor saldo en {peor['Aging_bucket']}: {peor['Cliente']} ({peor['Suma']:,.2f})")
+    if c_noap>0: top_focus.append(f"Pagos banco no aplicados: {c_noap}")
+    if c_pend>0: top_focus.append(f"Pendientes CxC: {c_pend}")
+    if len(posibles_nc)>0: top_focus.append(f"Posibles NC/Retenciones sin cruzar: {len(posibles_nc)}")
+    if not top_focus: top_focus.append("Sin focos críticos detectados.")
+
+    secciones = [
+        ("RESUMEN EJECUTIVO", [f"• {x}" for x in resumen_doc]),
+        ("HALLAZGOS RELEVANTES", [f"• {x}" for x in top_focus]),
+        ("RECOMENDACIONES", [f"• {x}" for x in recomendaciones(aging_cortes, irrisorio)]),
+        ("TRAZABILIDAD XLSX", ["• Ver 'cxc_bancos_hallazgos.xlsx' (todas las hojas)."])
+    ]
+    por_cuenta = res.get("por_cuenta", pd.DataFrame())
+    if len(por_cuenta):
+        secciones.insert(2, ("DESGLOSE POR CUENTA", [
+            f"• {c[CUENTA]} ({c[MONEDA]}): {c['Movimientos']} movimientos, {c['Aplicados']} aplicados "
+            f"({c['Pct_aplicado']:.1f}%), {c['NoAplicados']} no aplicados por {c['Monto_no_aplicado']:,.2f} en moneda base"
+            for _, c in por_cuenta.iterrows()]))
+    return secciones
+
+
+def conciliar_cxc_bancos(cxc, bank, **parametros) -> dict:
+    """Prueba 6 completa (DataFrames crudos → tablas de hallazgos). Ver ``PARAMETROS``.
+
+    Con ``almacen`` (ruta SQLite) el emparejamiento es incremental (``caat.incremental``).
+    """
+    p = {**PARAMETROS, **parametros}
+    with etapa("normalizar", filas_cxc=len(cxc), filas_banco=len(bank)):
+        cxc, bank, hay_ref = normalizar(cxc, bank)
+    opciones = (p["tol_monto"], p["tol_dias"], p["detectar_parciales"], p["max_items_parcial"],
+                p["ventana_parcial"], p["procesos"], p["umbral_ref"])
+    compensaciones = None
+    if p["compensar_nc"]:
+        with etapa("compensar NC/retenciones"):
+            cxc, compensaciones = compensar_nc(cxc, p["tol_monto"], p["tasas_retencion"], p["ventana_nc"])
+    with etapa("emparejar"):
+        if p["almacen"]:
+            from caat.incremental import conciliar_incremental
+            enlaces, _ = conciliar_incremental(cxc, bank, hay_ref, p["almacen"], *opciones)
+        else:
+            enlaces = emparejar(cxc, bank, hay_ref, *opciones)
+        contar("enlaces", len(enlaces))
+    with etapa("resultados"):
+        return resultados(cxc, bank, enlaces, p["irrisorio"], p["aging_cortes"], p.get("hoy"), p["aging_base"],
+                          p["plazo_dias"], compensaciones)
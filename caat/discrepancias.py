@@ -0,0 +1,109 @@
+# discrepancias.py – prueba 4 con tolerancias y resumen de diferencias por columna
+"""Discrepancias de valor entre origen y destino con el mismo ``CAMPOS_ID``.
+
+En lugar de ``pd.merge(df1, df2, on=CAMPOS_ID)`` (que multiplica filas cuando un ID se
+repite) cada lado recibe un código de clave (``ngroup`` sobre ambos archivos juntos) y
+un número de ocurrencia; la k-ésima fila de un ID en origen se empareja con la k-ésima
+en destino mediante un índice único, así cada fila aparece a lo sumo una vez.
+
+Comparaciones tipadas y vectorizadas:
+
+* ``Monto`` en centavos enteros: discrepancia si |Δ| > ``tol_monto``;
+* ``Fecha`` en días: discrepancia si |Δ| > ``tol_dias``;
+* el resto de columnas comunes: numéricas con |Δ| > 1e-9, fechas por día y texto sin
+  espacios al borde. Dos nulos son iguales; un nulo contra un valor es diferencia.
+
+El resumen por columna (diferencias, suma y máximo de |Δ|) sale de los mismos
+vectores de diferencias, sin agrupar de nuevo.
+"""
+import numpy as np
+import pandas as pd
+
+from caat.normalizacion import a_centavos, a_dias, a_fecha
+from caat.pruebas import CAMPOS_ID, _unir
+
+COLUMNAS_RESUMEN = ["Columna", "Diferencias", "Suma_dif", "Max_dif"]
+_NAT_DIAS = np.iinfo("int32").min
+_EPS = 1e-9
+
+
+def _emparejar(df1, df2) -> tuple:
+    """Posiciones ``(fo, fd)`` de los pares 1 a 1 por (clave, ocurrencia)."""
+    claves = pd.concat([df1[CAMPOS_ID], df2[CAMPOS_ID]], ignore_index=True)
+    codigo = claves.groupby(CAMPOS_ID, sort=False, dropna=False).ngroup().to_numpy(dtype="int64")
+    c1, c2 = codigo[:len(df1)], codigo[len(df1):]
+    o1 = pd.Series(c1).groupby(c1).cumcount().to_numpy(dtype="int64")
+    o2 = pd.Series(c2).groupby(c2).cumcount().to_numpy(dtype="int64")
+    base = max(int(o1.max(initial=0)), int(o2.max(initial=0))) + 1
+    fd = pd.Index(c2 * base + o2).get_indexer(c1 * base + o1)
+    fo = np.flatnonzero(fd >= 0)
+    return fo, fd[fo]
+
+
+def _fecha(s):
+    return s if pd.api.types.is_datetime64_any_dtype(s) else a_fecha(s)
+
+
+def _delta(a: pd.Series, b: pd.Series, tol=None) -> tuple:
+    """``(distinto, delta)`` para dos columnas alineadas; ``delta`` es None si no es numérica.
+
+    ``tol`` es la diferencia admitida (días para fechas); por defecto 0 en fechas y 1e-9 en números.
+    """
+    if pd.api.types.is_datetime64_any_dtype(a) and pd.api.types.is_datetime64_any_dtype(b):
+        da, db = a_dias(a).astype("int64"), a_dias(b).astype("int64")
+        na, nb = da == _NAT_DIAS, db == _NAT_DIAS
+        delta = np.where(na | nb, 0, np.abs(da - db))
+        return (na != nb) | (delta > (tol or 0)), delta
+    if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b) \
+            and not (pd.api.types.is_bool_dtype(a) or pd.api.types.is_bool_dtype(b)):
+        va, vb = a.to_numpy(dtype="float64", na_value=np.nan), b.to_numpy(dtype="float64", na_value=np.nan)
+        na, nb = np.isnan(va), np.isnan(vb)
+        delta = np.where(na | nb, 0.0, np.abs(va - vb))
+        return (na != nb) | (delta > (_EPS if tol is None else tol)), delta
+    ta, tb = a.astype("string").str.strip(), b.astype("string").str.strip()
+    na, nb = ta.isna().to_numpy(), tb.isna().to_numpy()
+    return (na != nb) | (ta != tb).fillna(False).to_numpy(dtype=bool), None
+
+
+def discrepancias(df1, df2, tol_monto=0.0, tol_dias=0, columnas=None) -> tuple:
+    """``(tabla, resumen)`` de pares con el mismo ID y algún valor distinto fuera de tolerancia.
+
+    ``tabla`` tiene el layout de ``pd.merge(df1, df2, on=CAMPOS_ID, suffixes=("_origen",
+    "_destino"))`` más ``_DIF_MONTO`` (|Δ| en moneda), ``_DIF_DIAS`` y ``_COLUMNAS`` (las que
+    difieren). ``columnas`` limita las columnas extra comparadas (por defecto todas las
+    comunes). ``resumen`` tiene ``COLUMNAS_RESUMEN``, una fila por columna comparada.
+    """
+    faltantes = [c for c in CAMPOS_ID + ["Monto", "Fecha"] if c not in df1.columns or c not in df2.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas para comparar: {', '.join(faltantes)}")
+    fo, fd = _emparejar(df1, df2)
+    a, b = df1.iloc[fo].reset_index(drop=True), df2.iloc[fd].reset_index(drop=True)
+
+    ca, cb = a_centavos(a["Monto"]), a_centavos(b["Monto"])
+    na, nb = ca.isna().to_numpy(), cb.isna().to_numpy()
+    dif_cent = np.where(na | nb, 0, np.abs(ca.fillna(0).to_numpy(dtype="int64") - cb.fillna(0).to_numpy(dtype="int64")))
+    distinto = {"Monto": (na != nb) | (dif_cent > round(tol_monto * 100))}
+    delta = {"Monto": dif_cent / 100}
+    distinto["Fecha"], delta["Fecha"] = _delta(_fecha(a["Fecha"]), _fecha(b["Fecha"]), tol_dias)
+
+    comunes = [c for c in df1.columns if c in df2.columns and c not in CAMPOS_ID + ["Monto", "Fecha"]]
+    for c in (comunes if columnas is None else [c for c in columnas if c in comunes]):
+        distinto[c], delta[c] = _delta(a[c], b[c])
+
+    nombres = list(distinto)
+    matriz = np.column_stack([distinto[c] for c in nombres]) if len(fo) else np.zeros((0, len(nombres)), dtype=bool)
+    fila = matriz.any(axis=1)
+    resumen = pd.DataFrame({
+        "Columna": nombres, "Diferencias": matriz.sum(axis=0),
+        "Suma_dif": [float(delta[c][distinto[c]].sum()) if delta[c] is not None else np.nan for c in nombres],
+        "Max_dif": [float(delta[c][distinto[c]].max(initial=0)) if delta[c] is not None else np.nan for c in nombres]})
+
+    tabla = _unir(df1, df2, fo[fila], fd[fila], CAMPOS_ID, ("_origen", "_destino"))
+    tabla["_DIF_MONTO"] = delta["Monto"][fila]
+    tabla["_DIF_DIAS"] = delta["Fecha"][fila]
+    # lista de columnas distintas por fila: una concatenación de texto por columna, sin apply
+    etiquetas = np.full(int(fila.sum()), "", dtype=object)
+    for j, c in enumerate(nombres):
+        etiquetas = np.where(matriz[fila, j], etiquetas + np.where(etiquetas == "", "", ", ") + c, etiquetas)
+    tabla["_COLUMNAS"] = etiquetas
+    return tabla, resumen
@@ -0,0 +1,218 @@
+# duplicados.py – prueba 5 fuera de memoria: duplicados exactos y casi duplicados
+"""Motor de duplicados para archivos mayores que la RAM.
+
+El archivo se lee por bloques y de cada fila se guardan solo las claves normalizadas:
+``_ID`` (ID_Transaccion como texto), ``_ENT`` (ID_Entidad), ``_DIA`` (día entero),
+``_CENT`` (monto en centavos) y ``_H``, un hash de 64 bits de esas cuatro. Las claves
+se reparten a baldes en disco por hash de (entidad, centavos), así que todas las
+reglas se resuelven balde por balde con la memoria acotada por ``presupuesto_mb``:
+
+* ``exacto`` – misma clave normalizada (``CAMPOS_CLAVE``). Solo las filas cuyo ``_H``
+  se repite pasan a la comparación exacta, que separa las colisiones de hash;
+* ``ventana`` – misma entidad y monto con fechas a ≤ ``ventana_dias`` días (encadenadas),
+  excluyendo grupos que son solo duplicados exactos;
+* ``transpuesto`` – misma entidad y monto con ID_Transaccion que difiere en dos
+  caracteres contiguos intercambiados (``12345`` ↔ ``12435``).
+
+``detectar_duplicados`` devuelve ``(grupos, resumen)``: una fila por (fila del archivo,
+regla) con ``_GRUPO`` y ``_N``, sin materializar la tabla. ``filas_duplicadas`` hace una
+segunda pasada y trae solo las filas que están en algún grupo.
+"""
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from caat.asignacion import componentes
+from caat.candidatos import TIPO_FILA
+from caat.ingesta import bytes_por_fila, leer_por_bloques
+from caat.normalizacion import a_centavos, a_dias, a_fecha
+from caat.particiones import EXPANSION, _tamano
+from caat.pruebas import CAMPOS_CLAVE, CAMPOS_ID
+
+REGLAS = {"exacto": "Exacto", "ventana": "Entidad y monto ± días", "transpuesto": "ID transpuesto"}
+VENTANA_DIAS = 3
+COLUMNAS_GRUPOS = ["_FILA", "_REGLA", "_GRUPO", "_N"]
+_CLAVES = ["_ID", "_ENT", "_DIA", "_CENT"]
+_CLAVE_HASH = "caatduplicados01"
+_NAT_DIAS = np.iinfo("int32").min
+_SIN_MONTO = np.iinfo("int64").min
+
+
+def _texto(s: pd.Series) -> pd.Series:
+    # 1, 1.0 y " 1" son el mismo ID aunque un bloque lo lea como float por tener nulos
+    if pd.api.types.is_float_dtype(s):
+        entero = s.dropna()
+        if (entero == entero.round()).all():
+            s = s.astype("Int64")
+    return s.astype("string").str.strip().fillna("").astype(object)
+
+
+def claves_normalizadas(bloque: pd.DataFrame, inicio=0) -> pd.DataFrame:
+    """Claves de un bloque (ver módulo); ``_FILA`` es la posición en el archivo a partir de ``inicio``."""
+    faltantes = [c for c in CAMPOS_CLAVE if c not in bloque.columns]
+    if faltantes:
+        raise ValueError(f"El archivo no contiene las columnas necesarias: {', '.join(faltantes)}")
+    fecha = bloque["Fecha"] if pd.api.types.is_datetime64_any_dtype(bloque["Fecha"]) else a_fecha(bloque["Fecha"])
+    claves = pd.DataFrame({
+        "_FILA": np.arange(inicio, inicio + len(bloque), dtype=TIPO_FILA),
+        "_ID": _texto(bloque["ID_Transaccion"]).to_numpy(),
+        "_ENT": _texto(bloque["ID_Entidad"]).to_numpy(),
+        "_DIA": a_dias(fecha),
+        "_CENT": a_centavos(bloque["Monto"]).fillna(_SIN_MONTO).to_numpy(dtype="int64")})
+    claves["_H"] = pd.util.hash_pandas_object(claves[_CLAVES], index=False, hash_key=_CLAVE_HASH).to_numpy()
+    return claves
+
+
+def _bloques(fuente, filas_por_bloque):
+    if isinstance(fuente, pd.DataFrame):
+        for i in range(0, len(fuente), filas_por_bloque):
+            yield fuente.iloc[i:i + filas_por_bloque]
+        return
+    yield from leer_por_bloques(fuente, filas_por_bloque, ids=CAMPOS_ID, montos=["Monto"], fechas=["Fecha"])
+
+
+def _repartir(bloques, dir_baldes, n) -> tuple:
+    partes, filas = {}, 0
+    for k, bloque in enumerate(bloques):
+        claves = claves_normalizadas(bloque, filas)
+        filas += len(bloque)
+        h = pd.util.hash_pandas_object(claves[["_ENT", "_CENT"]], index=False, hash_key=_CLAVE_HASH).to_numpy()
+        for b, parte in claves.groupby((h % np.uint64(n)).astype("int64"), sort=False):
+            ruta = os.path.join(dir_baldes, f"{b:05d}_{k:06d}.pkl")
+            parte.to_pickle(ruta)
+            partes.setdefault(b, []).append(ruta)
+    return partes, filas
+
+
+# ------------------------- Reglas (sobre un balde) -------------------------
+def _grupos(filas, etiqueta) -> pd.DataFrame:
+    """``(_FILA, _GRUPO)`` con etiquetas locales; descarta grupos de una sola fila."""
+    etiqueta = np.asarray(etiqueta, dtype="int64")
+    n = np.bincount(etiqueta)[etiqueta] if len(etiqueta) else etiqueta
+    ok = n >= 2
+    return pd.DataFrame({"_FILA": np.asarray(filas, dtype=TIPO_FILA)[ok],
+                         "_GRUPO": pd.factorize(etiqueta[ok])[0], "_N": n[ok]})
+
+
+def _exactos(b) -> pd.DataFrame:
+    _, inversa, cuenta = np.unique(b["_H"].to_numpy(), return_inverse=True, return_counts=True)
+    cand = b[cuenta[inversa] >= 2]
+    # comparación exacta de las claves: dos claves distintas con el mismo hash quedan en grupos distintos
+    return _grupos(cand["_FILA"], cand.groupby(_CLAVES, sort=False).ngroup())
+
+
+def _validas(b):
+    return b[(b["_DIA"] != _NAT_DIAS) & (b["_CENT"] != _SIN_MONTO)]
+
+
+def _ventana(b, dias) -> pd.DataFrame:
+    v = _validas(b).sort_values(["_ENT", "_CENT", "_DIA"], kind="stable")
+    if len(v) < 2:
+        return _grupos([], [])
+    ent, cent, dia = v["_ENT"].to_numpy(), v["_CENT"].to_numpy(), v["_DIA"].to_numpy(dtype="int64")
+    corte = np.r_[True, (ent[1:] != ent[:-1]) | (cent[1:] != cent[:-1]) | (np.diff(dia) > dias)]
+    etiqueta = np.cumsum(corte) - 1
+    # los grupos que son una sola clave exacta ya los informa la regla "exacto"
+    distintas = pd.Series(v["_H"].to_numpy()).groupby(etiqueta).nunique().to_numpy()
+    ok = distintas[etiqueta] > 1
+    return _grupos(v["_FILA"].to_numpy()[ok], etiqueta[ok])
+
+
+def _transpuestos(b) -> pd.DataFrame:
+    v = _validas(b)
+    v = v[v.groupby(["_ENT", "_CENT"], sort=False)["_ID"].transform("nunique") >= 2]
+    if v.empty:
+        return _grupos([], [])
+    ids = pd.Series(v["_ID"].to_numpy(), dtype="string")
+    largo = ids.str.len().to_numpy()
+    variantes = []
+    for k in range(int(largo.max()) - 1):
+        ok = (largo > k + 1) & (ids.str[k] != ids.str[k + 1]).fillna(False).to_numpy(dtype=bool)
+        if ok.any():
+            s = ids[ok]
+            variantes.append(pd.DataFrame({"_ENT": v["_ENT"].to_numpy()[ok], "_CENT": v["_CENT"].to_numpy()[ok],
+                                           "_ID": (s.str[:k] + s.str[k + 1] + s.str[k] + s.str[k + 2:]).astype(object)
+                                           .to_numpy(), "a": v["_FILA"].to_numpy()[ok]}))
+    if not variantes:
+        return _grupos([], [])
+    pares = pd.concat(variantes, ignore_index=True).merge(
+        v[["_ENT", "_CENT", "_ID", "_FILA"]].rename(columns={"_FILA": "b"}), on=["_ENT", "_CENT", "_ID"])
+    if pares.empty:
+        return _grupos([], [])
+    # componentes() es bipartito: la arista (x, x) une las dos copias de cada fila
+    nodos = np.unique(np.r_[pares["a"].to_numpy(), pares["b"].to_numpy()])
+    etiqueta = componentes(np.r_[pares["a"].to_numpy(), nodos], np.r_[pares["b"].to_numpy(), nodos])[len(pares):]
+    return _grupos(nodos, etiqueta)
+
+
+_FUNCIONES = {"exacto": lambda b, dias: _exactos(b), "ventana": _ventana, "transpuesto": lambda b, dias: _transpuestos(b)}
+
+
+# ------------------------- API -------------------------
+def detectar_duplicados(fuente, reglas=("exacto",), ventana_dias=VENTANA_DIAS, presupuesto_mb=512,
+                        filas_por_bloque=None) -> tuple:
+    """Grupos de duplicados de ``fuente`` (ruta, archivo o DataFrame) según ``reglas`` (claves de ``REGLAS``).
+
+    Devuelve ``(grupos, resumen)``: ``grupos`` con ``COLUMNAS_GRUPOS`` (``_REGLA`` es la
+    etiqueta de ``REGLAS``, ``_GRUPO`` numera los grupos de cada regla desde 0 y ``_N`` es
+    su tamaño) y ``resumen`` con grupos y filas por regla. ``ValueError`` si faltan
+    columnas de ``CAMPOS_CLAVE`` o la regla no existe.
+    """
+    desconocidas = [r for r in reglas if r not in REGLAS]
+    if desconocidas:
+        raise ValueError(f"Regla de duplicado desconocida: {', '.join(desconocidas)} (use {', '.join(REGLAS)})")
+    limite = presupuesto_mb * 2**20
+    if isinstance(fuente, pd.DataFrame):
+        tam, bpf = int(fuente.memory_usage(deep=False).sum()), 64.0
+    else:
+        tam, bpf = _tamano(fuente), bytes_por_fila(fuente)
+    if filas_por_bloque is None:
+        filas_por_bloque = max(1_000, int(limite / (bpf * EXPANSION * 2)))
+    n = max(1, math.ceil(tam * EXPANSION / limite))
+
+    dir_baldes = tempfile.mkdtemp(prefix="caat_dup_")
+    partes_regla = {r: [] for r in reglas}
+    desde = dict.fromkeys(reglas, 0)
+    try:
+        partes, _ = _repartir(_bloques(fuente, filas_por_bloque), dir_baldes, n)
+        for b in sorted(partes):
+            balde = pd.concat([pd.read_pickle(r) for r in partes[b]], ignore_index=True)
+            for r in reglas:
+                g = _FUNCIONES[r](balde, ventana_dias)
+                if len(g):
+                    g["_GRUPO"] += desde[r]
+                    desde[r] = int(g["_GRUPO"].max()) + 1
+                partes_regla[r].append(g)
+            for ruta in partes[b]:
+                os.remove(ruta)
+    finally:
+        shutil.rmtree(dir_baldes, ignore_errors=True)
+
+    grupos = [pd.concat(partes_regla[r] or [_grupos([], [])], ignore_index=True).assign(_REGLA=REGLAS[r])
+              for r in reglas]
+    grupos = (pd.concat(grupos, ignore_index=True) if grupos else _grupos([], []).assign(_REGLA=""))[COLUMNAS_GRUPOS]
+    grupos = grupos.sort_values(["_REGLA", "_GRUPO", "_FILA"], kind="stable", ignore_index=True)
+    resumen = pd.DataFrame({"Regla": [REGLAS[r] for r in reglas], "Grupos": [desde[r] for r in reglas],
+                            "Filas": [int((grupos["_REGLA"] == REGLAS[r]).sum()) for r in reglas]})
+    return grupos, resumen
+
+
+def filas_duplicadas(fuente, grupos, filas_por_bloque=200_000) -> pd.DataFrame:
+    """Segunda pasada: las filas de ``fuente`` que están en ``grupos``, con ``_REGLA``/``_GRUPO``/``_N``."""
+    grupos = grupos.sort_values("_FILA", kind="stable")
+    pos = grupos["_FILA"].to_numpy(dtype="int64")
+    partes, inicio = [], 0
+    for bloque in _bloques(fuente, filas_por_bloque):
+        en = grupos.iloc[np.searchsorted(pos, inicio):np.searchsorted(pos, inicio + len(bloque))]
+        if len(en):
+            filas = bloque.iloc[en["_FILA"].to_numpy() - inicio].reset_index(drop=True)
+            partes.append(pd.concat([filas, en[COLUMNAS_GRUPOS].reset_index(drop=True)], axis=1))
+        inicio += len(bloque)
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS_GRUPOS)
+    return pd.concat(partes, ignore_index=True).sort_values(["_REGLA", "_GRUPO", "_FILA"], kind="stable",
+                                                            ignore_index=True)
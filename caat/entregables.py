@@ -0,0 +1,143 @@
+# entregables.py – XLSX/CSV.gz/Parquet y DOCX de hallazgos
+"""Generación de entregables. ``openpyxl``, ``pyarrow`` y ``python-docx`` se importan
+solo al generar el archivo (arranque rápido de la CLI).
+
+Las hojas se escriben en streaming directamente a un archivo (ruta, archivo abierto o
+temporal): el XLSX usa el modo *write-only* de openpyxl (memoria constante, filas por
+bloques) y una hoja con más filas que el límite de Excel se parte en ``Hoja``,
+``Hoja_2``, ... Las alternativas CSV.gz y Parquet mantienen la misma organización: un
+ZIP con un archivo por hoja.
+"""
+import gzip
+import io
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from caat.perfil import etapa
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MIME_ZIP = "application/zip"
+MAX_FILAS_EXCEL = 1_048_576          # incluye la fila de encabezado
+FILAS_BLOQUE = 50_000
+FORMATOS = {"xlsx": (".xlsx", MIME_XLSX), "csv.gz": (".csv.gz.zip", MIME_ZIP), "parquet": (".parquet.zip", MIME_ZIP)}
+
+
+def _df(df):
+    return df if isinstance(df, pd.DataFrame) else pd.DataFrame(df)
+
+
+def partir_hojas(sheets: dict, max_filas=MAX_FILAS_EXCEL) -> list:
+    """``[(nombre_hoja, df)]`` con nombres de ≤ 31 caracteres y cada hoja partida a ``max_filas`` (con encabezado)."""
+    por_hoja = max_filas - 1
+    partes = []
+    for name, df in sheets.items():
+        df, nm = _df(df), str(name)[:31]
+        if len(df) <= por_hoja:
+            partes.append((nm, df)); continue
+        for k, ini in enumerate(range(0, len(df), por_hoja), start=1):
+            sufijo = "" if k == 1 else f"_{k}"
+            partes.append((nm[:31 - len(sufijo)] + sufijo, df.iloc[ini:ini + por_hoja]))
+    return partes
+
+
+def _filas(df):
+    """Filas como tuplas de valores Python (nulos → celda vacía, igual que ``to_excel``)."""
+    for ini in range(0, len(df), FILAS_BLOQUE):
+        bloque = df.iloc[ini:ini + FILAS_BLOQUE]
+        columnas = []
+        for _, s in bloque.items():
+            if pd.api.types.is_datetime64_any_dtype(s):
+                v = np.array(s.dt.to_pydatetime(), dtype=object)
+            else:
+                v = s.to_numpy(dtype=object, na_value=None)
+            columnas.append(np.where(s.isna().to_numpy(), None, v))
+        yield from zip(*columnas)
+
+
+def escribir_xlsx(sheets: dict, destino, max_filas=MAX_FILAS_EXCEL):
+    """Escribe ``sheets`` en ``destino`` (ruta o archivo binario) en modo write-only."""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    partes = partir_hojas(sheets, max_filas) or [("Hoja1", pd.DataFrame())]
+    for nm, df in partes:
+        ws = wb.create_sheet(nm)
+        ws.append([c if isinstance(c, (str, int, float)) else str(c) for c in df.columns])
+        for fila in _filas(df):
+            ws.append(fila)
+    wb.save(destino)
+
+
+def escribir_csv_gz(sheets: dict, destino):
+    """ZIP con un ``<hoja>.csv.gz`` por hoja (sin límite de filas)."""
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as zf:
+        for name, df in sheets.items():
+            df = _df(df)
+            with zf.open(f"{name}.csv.gz", "w", force_zip64=True) as f, gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                for ini in range(0, max(len(df), 1), FILAS_BLOQUE):
+                    df.iloc[ini:ini + FILAS_BLOQUE].to_csv(gz, index=False, header=ini == 0, encoding="utf-8")
+
+
+def _tabla_arrow(df):
+    import pyarrow as pa
+    df = df.rename(columns=str)
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # columnas object con tipos mezclados (p. ej. IDs numéricos y texto): se guardan como texto
+        obj = df.select_dtypes(include="object").columns
+        return pa.Table.from_pandas(df.astype({c: "string" for c in obj}), preserve_index=False)
+
+
+def escribir_parquet(sheets: dict, destino):
+    """ZIP con un ``<hoja>.parquet`` por hoja."""
+    import pyarrow.parquet as pq
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as zf:
+        for name, df in sheets.items():
+            with tempfile.TemporaryDirectory(prefix="caat_pq_") as tmp:
+                ruta = os.path.join(tmp, "hoja.parquet")
+                pq.write_table(_tabla_arrow(_df(df)), ruta)
+                zf.write(ruta, f"{name}.parquet")
+
+
+_ESCRITORES = {"xlsx": escribir_xlsx, "csv.gz": escribir_csv_gz, "parquet": escribir_parquet}
+
+
+def exportar(sheets: dict, destino=None, formato="xlsx"):
+    """Escribe ``sheets`` en ``formato`` (ver ``FORMATOS``) y devuelve el destino.
+
+    Sin ``destino`` se usa un archivo temporal anónimo (se borra al cerrarlo) y se
+    devuelve abierto y rebobinado, listo para ``st.download_button``.
+    """
+    if formato not in _ESCRITORES:
+        raise ValueError(f"Formato desconocido: {formato!r} (use {', '.join(FORMATOS)})")
+    with etapa(f"exportar {formato}", hojas=len(sheets), filas=sum(len(df) for df in sheets.values())):
+        if destino is None:
+            destino = tempfile.TemporaryFile(prefix="caat_export_")
+            _ESCRITORES[formato](sheets, destino)
+            destino.seek(0)
+            return destino
+        _ESCRITORES[formato](sheets, destino)
+        return destino
+
+
+def to_xlsx_bytes(sheets: dict):
+    buf = io.BytesIO()
+    escribir_xlsx(sheets, buf)
+    return buf.getvalue()
+
+
+def docx_from_sections(title: str, sections: list[tuple[str, list[str]]]) -> bytes:
+    from docx import Document
+    from docx.shared import Pt
+    d = Document(); d.add_heading(title, level=1)
+    for heading, bullets in sections:
+        d.add_heading(heading, level=2)
+        for item in bullets:
+            p = d.add_paragraph(item, style="List Bullet")
+            p.style.font.size = Pt(11)
+    bio = io.BytesIO(); d.save(bio); return bio.getvalue()
@@ -0,0 +1,139 @@
+# incremental.py – conciliación CxC vs Bancos incremental con almacén SQLite
+"""Almacén local de la prueba 6 para no volver a conciliar lo ya conciliado.
+
+Cada fila normalizada recibe una **huella** estable (hash de ``_DIA``, ``_CENT``,
+``_REF``, ``_CLI`` y el número de ocurrencia entre filas idénticas). El almacén guarda:
+
+* ``enlaces``  – pares conciliados (huella CxC, huella banco, tipo, desvíos, grupo);
+* ``partidas`` – estado de cada huella vista (``conciliado`` / ``abierto``);
+* ``meta``     – parámetros de la última corrida.
+
+En una nueva corrida los enlaces cuyas dos huellas siguen presentes se reutilizan, los
+que perdieron un lado se descartan (el otro lado vuelve a quedar abierto) y solo las
+partidas abiertas o nuevas pasan por ``cxc_bancos.emparejar``. Si no hay partidas
+nuevas ni enlaces rotos no se empareja nada. Un cambio de parámetros reinicia el almacén.
+"""
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from caat.candidatos import TIPO_FILA
+from caat.cxc_bancos import emparejar
+from caat.referencias import UMBRAL_SIMILITUD
+
+VERSION = 2              # 2: huella sobre el núcleo compacto (``_DIA`` en lugar de ``_FECHA``)
+COLUMNAS_HUELLA = ["_DIA", "_CENT", "_REF", "_CLI"]
+_CLAVE_HASH = "caatincremental1"
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE IF NOT EXISTS partidas (lado TEXT, huella INTEGER, estado TEXT, PRIMARY KEY (lado, huella));
+CREATE TABLE IF NOT EXISTS enlaces (huella_cxc INTEGER, huella_banco INTEGER, tipo TEXT,
+                                    dif_monto REAL, dif_dias INTEGER, grupo INTEGER);
+CREATE INDEX IF NOT EXISTS enlaces_cxc ON enlaces (huella_cxc);
+CREATE INDEX IF NOT EXISTS enlaces_banco ON enlaces (huella_banco);
+"""
+
+
+def huellas(df: pd.DataFrame) -> np.ndarray:
+    """Huella int64 por fila; filas idénticas se distinguen por su orden de aparición."""
+    cols = [c for c in COLUMNAS_HUELLA if c in df.columns]
+    base = pd.util.hash_pandas_object(df[cols], index=False, hash_key=_CLAVE_HASH)
+    ocurrencia = base.groupby(base.to_numpy()).cumcount()
+    h = pd.util.hash_pandas_object(pd.DataFrame({"b": base.to_numpy(), "o": ocurrencia.to_numpy()}),
+                                   index=False, hash_key=_CLAVE_HASH)
+    return h.to_numpy().view("int64")
+
+
+def _leer(con, sql) -> pd.DataFrame:
+    return pd.read_sql_query(sql, con)
+
+
+def _estado_previo(vistas, lado, h) -> np.ndarray:
+    """Estado guardado de cada huella de ``h`` (``None`` si no se había visto)."""
+    v = vistas[vistas["lado"] == lado]
+    pos = pd.Index(v["huella"].to_numpy()).get_indexer(h)
+    return np.where(pos >= 0, v["estado"].to_numpy(dtype=object)[np.maximum(pos, 0)] if len(v) else None, None)
+
+
+def conciliar_incremental(cxc, bank, hay_ref, ruta, tol_monto, tol_dias, detectar_parciales=True,
+                          max_items_parcial=4, ventana_parcial=30, procesos=1, umbral_ref=UMBRAL_SIMILITUD):
+    """Como ``cxc_bancos.emparejar`` pero reutilizando el almacén SQLite en ``ruta``.
+
+    Devuelve ``(enlaces, resumen)``; ``resumen`` cuenta partidas nuevas, enlaces reutilizados y nuevos.
+    """
+    h_c, h_b = huellas(cxc), huellas(bank)
+    parametros = json.dumps({"version": VERSION, "tol_monto": tol_monto, "tol_dias": tol_dias,
+                             "detectar_parciales": detectar_parciales, "max_items_parcial": max_items_parcial,
+                             "ventana_parcial": ventana_parcial, "umbral_ref": umbral_ref}, sort_keys=True)
+    con = sqlite3.connect(ruta)
+    try:
+        con.executescript(_ESQUEMA)
+        previo = con.execute("SELECT valor FROM meta WHERE clave = 'parametros'").fetchone()
+        if previo is None or previo[0] != parametros:
+            con.executescript("DELETE FROM partidas; DELETE FROM enlaces;")
+            con.execute("INSERT OR REPLACE INTO meta VALUES ('parametros', ?)", (parametros,))
+
+        # 1) Enlaces previos con ambos lados presentes
+        guardados = _leer(con, "SELECT rowid AS id, huella_cxc, huella_banco, tipo, dif_monto, dif_dias, grupo FROM enlaces")
+        idx_c, idx_b = pd.Index(h_c), pd.Index(h_b)
+        vigente = guardados["huella_cxc"].isin(h_c) & guardados["huella_banco"].isin(h_b)
+        # un grupo (pago agrupado/parcial) se conserva solo si siguen todas sus filas
+        rotos = guardados.loc[~vigente & guardados["grupo"].notna(), "grupo"].unique()
+        vigente &= ~guardados["grupo"].isin(rotos)
+        viejos = guardados[vigente]
+        pos_c, pos_b = idx_c.get_indexer(viejos["huella_cxc"]), idx_b.get_indexer(viejos["huella_banco"])
+        con.executemany("DELETE FROM enlaces WHERE rowid = ?", [(int(i),) for i in guardados.loc[~vigente, "id"]])
+
+        # 2) Emparejar solo lo abierto o nuevo
+        libre_c = np.ones(len(cxc), dtype=bool); libre_c[pos_c] = False
+        libre_b = np.ones(len(bank), dtype=bool); libre_b[pos_b] = False
+        vistas = _leer(con, "SELECT lado, huella, estado FROM partidas")
+        previo_c, previo_b = _estado_previo(vistas, "cxc", h_c), _estado_previo(vistas, "banco", h_b)
+        nuevas_c, nuevas_b = pd.isna(previo_c), pd.isna(previo_b)
+        hay_cambios = nuevas_c.any() or nuevas_b.any() or (~vigente).any()
+        nuevos = pd.DataFrame(columns=["i_cxc", "i_banco", "_DIF_MONTO", "_DIF_DIAS", "_TIPO_MATCH", "_GRUPO"])
+        if hay_cambios and libre_c.any() and libre_b.any():
+            ic, ib = np.flatnonzero(libre_c), np.flatnonzero(libre_b)
+            nuevos = emparejar(cxc.filas(ic), bank.filas(ib), hay_ref,
+                               tol_monto, tol_dias, detectar_parciales, max_items_parcial, ventana_parcial, procesos,
+                               umbral_ref)
+            nuevos["i_cxc"] = ic[nuevos["i_cxc"].to_numpy(dtype="int64")]
+            nuevos["i_banco"] = ib[nuevos["i_banco"].to_numpy(dtype="int64")]
+            if "_GRUPO" in nuevos.columns:
+                base = int(guardados["grupo"].max()) + 1 if guardados["grupo"].notna().any() else 0
+                nuevos["_GRUPO"] = nuevos["_GRUPO"] + base
+            con.executemany("INSERT INTO enlaces VALUES (?, ?, ?, ?, ?, ?)", zip(
+                h_c[nuevos["i_cxc"]].tolist(), h_b[nuevos["i_banco"]].tolist(), nuevos["_TIPO_MATCH"].tolist(),
+                nuevos["_DIF_MONTO"].astype(float).tolist(), nuevos["_DIF_DIAS"].astype("int64").tolist(),
+                [None if pd.isna(g) else int(g) for g in nuevos.get("_GRUPO", pd.Series([None] * len(nuevos)))]))
+
+        # 3) Estado de las partidas: solo se escriben las nuevas y las que cambiaron
+        viejos_idx = pd.DataFrame({"i_cxc": pos_c, "i_banco": pos_b,
+                                   "_DIF_MONTO": viejos["dif_monto"].to_numpy(), "_DIF_DIAS": viejos["dif_dias"].to_numpy(),
+                                   "_TIPO_MATCH": viejos["tipo"].to_numpy(), "_GRUPO": viejos["grupo"].to_numpy()})
+        conc_c = np.zeros(len(cxc), dtype=bool); conc_c[pd.concat([viejos_idx["i_cxc"], nuevos["i_cxc"]]).to_numpy(dtype="int64")] = True
+        conc_b = np.zeros(len(bank), dtype=bool); conc_b[pd.concat([viejos_idx["i_banco"], nuevos["i_banco"]]).to_numpy(dtype="int64")] = True
+        for lado, h, conc, previo in (("cxc", h_c, conc_c, previo_c), ("banco", h_b, conc_b, previo_b)):
+            ya = vistas.loc[vistas["lado"] == lado, "huella"]
+            con.executemany("DELETE FROM partidas WHERE lado = ? AND huella = ?",
+                            ((lado, int(x)) for x in ya[~ya.isin(h)]))          # ya no vienen en el archivo
+            estado = np.where(conc, "conciliado", "abierto")
+            cambia = estado != previo
+            con.executemany("INSERT OR REPLACE INTO partidas VALUES (?, ?, ?)",
+                            zip([lado] * int(cambia.sum()), h[cambia].tolist(), estado[cambia].tolist()))
+        con.commit()
+    finally:
+        con.close()
+
+    enlaces = pd.concat([viejos_idx, nuevos], ignore_index=True, sort=False)
+    if enlaces["_GRUPO"].isna().all():
+        enlaces = enlaces.drop(columns="_GRUPO")
+    unos = enlaces["_GRUPO"].isna() if "_GRUPO" in enlaces.columns else pd.Series(True, index=enlaces.index)
+    enlaces = pd.concat([enlaces[unos].sort_values("i_cxc", kind="stable"), enlaces[~unos]], ignore_index=True)
+    enlaces = enlaces.astype({"i_cxc": TIPO_FILA, "i_banco": TIPO_FILA, "_DIF_MONTO": "float64", "_DIF_DIAS": "int64",
+                              "_TIPO_MATCH": "str", **({"_GRUPO": "float64"} if "_GRUPO" in enlaces.columns else {})})
+    resumen = {"CxC nuevas": int(nuevas_c.sum()), "Banco nuevas": int(nuevas_b.sum()),
+               "Enlaces reutilizados": len(viejos_idx), "Enlaces nuevos": len(nuevos)}
+    return enlaces, resumen
@@ -0,0 +1,230 @@
+# ingesta.py – lectura columnar rápida de CSV/TXT/Parquet/Feather
+"""Capa de ingesta para ``read_any``.
+
+* Detecta codificación y delimitador **una sola vez** sobre una muestra (sin leer el
+  archivo completo a memoria).
+* Lee con el motor ``pyarrow`` si está instalado, si no con el motor C, aplicando un
+  plan de tipos para los campos clave:
+
+  - IDs: enteros si la muestra lo es (inferencia del motor), ``category`` si se
+    repiten y ``str`` si son casi todos distintos (``category`` de alta cardinalidad
+    hace al motor C varias veces más lento);
+  - montos: ``float64`` solo si la muestra es numérica plana y
+    ``detectar_formato_monto`` confirma el punto decimal; si no, texto
+    (``"1.500"`` es ambiguo y ``a_centavos`` lo lee como 1500, no 1.5);
+  - fechas: ``datetime64`` con formato fijo (``caat.normalizacion``).
+* Parquet y Feather se leen directo.
+* Devuelve métricas de la lectura (filas, segundos, filas/s y pico de memoria
+  opcional con ``tracemalloc``, solo con los motores C y python: la memoria de Arrow
+  no pasa por ``tracemalloc``); ``benchmarks.ingesta_legado`` las compara con el
+  camino anterior de ``read_any``.
+"""
+import csv
+import re
+import time
+import tracemalloc
+
+import pandas as pd
+
+from caat.normalizacion import a_fecha, detectar_formato_fecha, detectar_formato_monto
+
+try:
+    import pyarrow  # noqa: F401
+    HAY_PYARROW = True
+except ImportError:
+    HAY_PYARROW = False
+
+MUESTRA_BYTES = 64 * 1024
+DELIMITADORES = ";,|\t"
+EXT_CSV = (".csv", ".txt")
+EXT_PARQUET = (".parquet", ".pq")
+EXT_FEATHER = (".feather", ".arrow")
+MAX_UNICOS_CATEGORIA = 0.5      # fracción de valores distintos en la muestra hasta la que un ID es ``category``
+MOTORES_TRACEMALLOC = ("c", "python")
+_NUMERO_PLANO = re.compile(r"^\s*-?\d+(\.\d+)?\s*$")
+_ENTERO = re.compile(r"^\s*-?\d+\s*$")
+
+
+def _nombre(fuente, nombre=None):
+    return str(nombre or getattr(fuente, "name", fuente)).lower()
+
+
+def _muestra(fuente, n=MUESTRA_BYTES) -> bytes:
+    if isinstance(fuente, (str, bytes)) or hasattr(fuente, "__fspath__"):
+        with open(fuente, "rb") as f:
+            return f.read(n)
+    pos = fuente.tell()
+    datos = fuente.read(n)
+    fuente.seek(pos)
+    return datos if isinstance(datos, bytes) else datos.encode("utf-8")
+
+
+def detectar_codificacion(muestra: bytes) -> str:
+    if muestra.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    try:
+        muestra.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # un carácter multibyte cortado al final de la muestra no invalida utf-8
+        return "utf-8" if e.start >= len(muestra) - 3 else "latin-1"
+
+
+def detectar_delimitador(texto: str):
+    try:
+        return csv.Sniffer().sniff(texto, delimiters=DELIMITADORES).delimiter
+    except Exception:
+        return None
+
+
+def plan_dtypes(encabezado, filas, ids=(), montos=(), fechas=()):
+    """Plan de tipos a partir de la muestra: (dtype para read_csv, {columna: formato_fecha})."""
+    dtype, formatos = {}, {}
+    columnas = {c: [f[i] for f in filas if i < len(f)] for i, c in enumerate(encabezado)}
+    for c in ids:
+        valores = [v for v in columnas.get(c, []) if v.strip()]
+        if c not in columnas or (valores and all(_ENTERO.match(v) for v in valores)):
+            continue                      # enteros: los infiere el motor
+        dtype[c] = "category" if len(set(valores)) <= MAX_UNICOS_CATEGORIA * len(valores) else "str"
+    for c in montos:
+        valores = [v for v in columnas.get(c, []) if v.strip()]
+        if not valores:
+            continue
+        # "1.500" solo es 1.5 si otro valor de la muestra delata el punto decimal ("12.5")
+        plano = all(_NUMERO_PLANO.match(v) for v in valores)
+        decimal = "." if not any("." in v for v in valores) else detectar_formato_monto(pd.Series(valores))[0]
+        dtype[c] = "float64" if plano and decimal == "." else "str"
+    for c in fechas:
+        if c in columnas:
+            fmt = detectar_formato_fecha(columnas[c])
+            if fmt:
+                dtype[c] = "str"          # sin inferencia del motor: se parsea con formato fijo
+                formatos[c] = fmt
+    return dtype, formatos
+
+
+def _ids_numericos(df, ids):
+    # read_csv deja las categorías como texto; si todas son números se convierten para que
+    # los merges contra archivos Excel (IDs enteros) sigan funcionando.
+    for c in ids:
+        if c in df.columns and isinstance(df[c].dtype, pd.CategoricalDtype):
+            num = pd.to_numeric(df[c].cat.categories, errors="coerce")
+            if len(num) and not pd.isna(num).any() and pd.Index(num).is_unique:
+                df[c] = df[c].cat.rename_categories(num)
+    return df
+
+
+def _leer_arrow(fuente, sep, codificacion, dtype):
+    """``pyarrow.csv`` con las columnas de texto del plan fijadas como ``string``.
+
+    ``read_csv(engine="pyarrow", dtype=...)`` convierte *después* de inferir: ``"1.500"``
+    llegaría como ``"1.5"``.
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    texto = {c: pa.string() for c, t in dtype.items() if t == "str"}
+    tabla = pa_csv.read_csv(fuente, read_options=pa_csv.ReadOptions(encoding=codificacion),
+                            parse_options=pa_csv.ParseOptions(delimiter=sep),
+                            convert_options=pa_csv.ConvertOptions(column_types=texto, strings_can_be_null=True))
+    df = tabla.to_pandas()
+    resto = {c: t for c, t in dtype.items() if c not in texto and c in df.columns}
+    return df.astype(resto) if resto else df
+
+
+def _leer_csv(fuente, ids, montos, fechas, motor):
+    muestra = _muestra(fuente)
+    codificacion = detectar_codificacion(muestra)
+    texto = muestra.decode(codificacion, errors="ignore")
+    sep = detectar_delimitador(texto) or ","
+    lineas = texto.splitlines()[:-1] or texto.splitlines()   # descarta la última línea (puede estar cortada)
+    filas = list(csv.reader(lineas, delimiter=sep))
+    dtype, formatos = plan_dtypes(filas[0] if filas else [], filas[1:], ids, montos, fechas)
+    motores = [motor] if motor else (["pyarrow"] if HAY_PYARROW else []) + ["c"]
+    error = None
+    for m in motores:
+        try:
+            if hasattr(fuente, "seek"):
+                fuente.seek(0)
+            if m == "pyarrow":
+                df = _leer_arrow(fuente, sep, codificacion, dtype)
+            else:
+                df = pd.read_csv(fuente, sep=sep, encoding=codificacion, engine=m, dtype=dtype or None)
+            break
+        except Exception as e:          # líneas irregulares, tipos fuera de plan, etc.
+            error = e
+    else:
+        if hasattr(fuente, "seek"):
+            fuente.seek(0)
+        try:
+            df, m = pd.read_csv(fuente, sep=None, engine="python", encoding=codificacion), "python"
+        except Exception:
+            raise error
+    for c, fmt in formatos.items():
+        df[c] = a_fecha(df[c], formato=fmt)
+    return _ids_numericos(df, ids), m
+
+
+def leer_tabular(fuente, nombre=None, ids=(), montos=(), fechas=(), motor=None, medir_memoria=False):
+    """Lee CSV/TXT/Parquet/Feather. Devuelve ``(df, metricas)``.
+
+    ``fuente`` puede ser una ruta o un archivo (p. ej. ``UploadedFile`` de Streamlit).
+    ``metricas["pico_mb"]`` es ``None`` sin ``medir_memoria`` o si leyó Arrow (ver ``MOTORES_TRACEMALLOC``).
+    """
+    nom = _nombre(fuente, nombre)
+    if medir_memoria:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        if nom.endswith(EXT_PARQUET):
+            df, m = pd.read_parquet(fuente), "parquet"
+        elif nom.endswith(EXT_FEATHER):
+            df, m = pd.read_feather(fuente), "feather"
+        else:
+            df, m = _leer_csv(fuente, ids, montos, fechas, motor)
+        segundos = time.perf_counter() - t0
+        pico = tracemalloc.get_traced_memory()[1] if medir_memoria and m in MOTORES_TRACEMALLOC else None
+    finally:
+        if medir_memoria:
+            tracemalloc.stop()
+    metricas = {"archivo": nom, "motor": m, "filas": len(df), "segundos": round(segundos, 4),
+                "filas_s": round(len(df) / segundos) if segundos > 0 else None,
+                "pico_mb": round(pico / 2**20, 1) if pico is not None else None}
+    return df, metricas
+
+
+def leer_por_bloques(fuente, filas_por_bloque, nombre=None, ids=(), montos=(), fechas=()):
+    """Genera DataFrames de a ``filas_por_bloque`` filas sin cargar el archivo completo.
+
+    Usa la misma detección de codificación/delimitador y formatos de fecha que
+    ``leer_tabular`` (los IDs no se pasan a ``category``: las categorías variarían por bloque).
+    """
+    nom = _nombre(fuente, nombre)
+    if nom.endswith(EXT_PARQUET) and HAY_PYARROW:
+        import pyarrow.parquet as pq
+        for lote in pq.ParquetFile(fuente).iter_batches(batch_size=filas_por_bloque):
+            yield lote.to_pandas()
+        return
+    if not nom.endswith(EXT_CSV):
+        df, _ = leer_tabular(fuente, nombre, ids=ids, montos=montos, fechas=fechas)
+        for i in range(0, len(df), filas_por_bloque):
+            yield df.iloc[i:i + filas_por_bloque]
+        return
+    muestra = _muestra(fuente)
+    codificacion = detectar_codificacion(muestra)
+    texto = muestra.decode(codificacion, errors="ignore")
+    sep = detectar_delimitador(texto) or ","
+    filas = list(csv.reader(texto.splitlines()[:-1] or texto.splitlines(), delimiter=sep))
+    dtype, formatos = plan_dtypes(filas[0] if filas else [], filas[1:], (), montos, fechas)
+    if hasattr(fuente, "seek"):
+        fuente.seek(0)
+    for bloque in pd.read_csv(fuente, sep=sep, encoding=codificacion, engine="c", dtype=dtype or None,
+                              chunksize=filas_por_bloque):
+        for c, fmt in formatos.items():
+            bloque[c] = a_fecha(bloque[c], formato=fmt)
+        yield bloque
+
+
+def bytes_por_fila(fuente) -> float:
+    """Bytes promedio por línea en la muestra (para dimensionar bloques y particiones)."""
+    muestra = _muestra(fuente)
+    return max(1.0, len(muestra) / max(1, muestra.count(b"\n")))
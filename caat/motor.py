@@ -0,0 +1,154 @@
+# motor.py – API sin interfaz: DataFrames → resultados, conteos y entregables
+"""Punto de entrada común para la app y la CLI.
+
+* ``prueba_origen_destino(df1, df2)`` – pruebas 1–5 (``caat.pruebas``);
+* ``prueba_cxc_bancos(cxc, banco, **parametros)`` – prueba 6 (``caat.cxc_bancos``);
+* ``leer_bancos(rutas, tasas)`` – uno o varios extractos; varios (o con tabla de tasas) se
+  consolidan por cuenta y moneda (``caat.consolidacion``);
+* ``procesar(trabajo, dir_salida)`` – lee los archivos de un trabajo del manifiesto,
+  ejecuta la prueba y escribe el XLSX/DOCX de hallazgos (y, con ``traza=True``, los
+  tiempos por etapa en formato Chrome trace, ver ``caat.perfil``).
+
+Los errores de datos (columnas faltantes) se informan con ``ValueError``.
+"""
+import os
+import time
+
+import pandas as pd
+
+from caat import cxc_bancos
+from caat.consolidacion import MONEDA_BASE, consolidar_bancos, cuenta_de_archivo, leer_extractos
+from caat.entregables import FORMATOS, docx_from_sections, exportar
+from caat.ingesta import EXT_CSV, EXT_FEATHER, EXT_PARQUET, leer_tabular
+from caat.normalizacion import a_fecha
+from caat.perfil import contar, etapa, registrar
+from caat.pruebas import (CAMPOS_CLAVE, CAMPOS_ID, ETIQUETAS_CONTEO, conciliar_todo, conteos,
+                          generar_conclusion_conteo, recomendaciones)
+
+PRUEBAS_CLI = ("origen_destino", "cxc_bancos")
+TITULO_ORIGEN_DESTINO = "Pruebas CAAT 1–5 – Reporte de Auditoría"
+
+
+def leer_archivo(ruta, hoja=0) -> pd.DataFrame:
+    with etapa(f"leer {os.path.basename(str(ruta))}"):
+        if str(ruta).lower().endswith(EXT_CSV + EXT_PARQUET + EXT_FEATHER):
+            df = leer_tabular(ruta, ids=CAMPOS_ID, montos=["Monto"], fechas=["Fecha"])[0]
+        else:
+            df = pd.read_excel(ruta, sheet_name=hoja)
+        contar("filas", len(df))
+    return df
+
+
+def leer_bancos(rutas, tasas=None, moneda_base=MONEDA_BASE, monedas=None, cuentas=None) -> pd.DataFrame:
+    """Extracto bancario de la prueba 6: una ruta se lee tal cual; una lista de rutas (o una
+    tabla de ``tasas``) se lee en paralelo y se consolida. ``cuentas`` son las etiquetas de
+    cada ruta (por defecto el nombre del archivo); ``monedas`` es ``{cuenta: moneda}``.
+    """
+    if isinstance(rutas, (str, os.PathLike)):
+        if tasas is None:
+            return leer_archivo(rutas)
+        rutas = [rutas]
+    cuentas = list(cuentas) if cuentas else [cuenta_de_archivo(r) for r in rutas]
+    extractos = dict(zip(cuentas, leer_extractos(rutas, leer_archivo)))
+    with etapa("consolidar bancos", cuentas=len(extractos)):
+        banco = consolidar_bancos(extractos, None if tasas is None else leer_archivo(tasas), moneda_base, monedas)
+        contar("filas", len(banco))
+    return banco
+
+
+def validar_columnas(df, nombre, requeridas):
+    faltantes = [col for col in requeridas if col not in df.columns]
+    if faltantes:
+        raise ValueError(f"El archivo '{nombre}' no contiene las columnas necesarias: {', '.join(faltantes)}")
+
+
+def prueba_origen_destino(df1, df2) -> tuple:
+    """Pruebas 1–5. Devuelve ``(resultados, conteo)`` con las etiquetas de ``ETIQUETAS_CONTEO``."""
+    validar_columnas(df1, "origen", CAMPOS_CLAVE); validar_columnas(df2, "destino", CAMPOS_CLAVE)
+    with etapa("normalizar fechas"):
+        df1 = df1.assign(Fecha=a_fecha(df1["Fecha"])); df2 = df2.assign(Fecha=a_fecha(df2["Fecha"]))
+    resultados = conciliar_todo(df1, df2)
+    return resultados, conteos(resultados)
+
+
+def prueba_cxc_bancos(cxc, banco, **parametros) -> tuple:
+    """Prueba 6. Devuelve ``(resultados, metricas)``."""
+    res = cxc_bancos.conciliar_cxc_bancos(cxc, banco, **parametros)
+    return res, cxc_bancos.metricas(res)
+
+
+def entregables_origen_destino(resultados, conteo, nombre) -> tuple:
+    """``(hojas, docx)`` de las pruebas 1–5: una hoja por salida y reporte con recomendaciones."""
+    hojas = {"Resumen": pd.DataFrame({"Métrica": list(conteo), "Valor": list(conteo.values())})}
+    hojas.update({ETIQUETAS_CONTEO[k]: v for k, v in resultados.items()})
+    texto = lambda x: x.replace("**", "")
+    conclusion = [texto(l.lstrip("- ")) for l in generar_conclusion_conteo(conteo).splitlines()[3:] if l.strip()]
+    secciones = [
+        ("RESUMEN EJECUTIVO", [f"• {nombre}"] + [f"• {k}: {v}" for k, v in conteo.items()]),
+        ("RECOMENDACIONES", [f"• {texto(r)}" for r in recomendaciones(conteo)]),
+        ("CONCLUSIÓN", [f"• {x}" for x in conclusion]),
+    ]
+    return hojas, docx_from_sections(TITULO_ORIGEN_DESTINO, secciones)
+
+
+def entregables_cxc_bancos(res, nombre_cxc, nombre_banco, **parametros) -> tuple:
+    p = {**cxc_bancos.PARAMETROS, **parametros}
+    hojas = cxc_bancos.hojas_xlsx(res, p["tol_monto"], p["tol_dias"])
+    secciones = cxc_bancos.secciones_docx(res, nombre_cxc, nombre_banco, p["tol_monto"], p["tol_dias"], p["irrisorio"],
+                                          p["aging_cortes"])
+    return hojas, docx_from_sections(cxc_bancos.TITULO_DOCX, secciones)
+
+
+def procesar(trabajo: dict, dir_salida, parametros=None, formato="xlsx", traza=False) -> dict:
+    """Ejecuta un trabajo ``{"nombre", "prueba", "origen", "destino"}`` y escribe sus entregables.
+
+    En la prueba 6 ``destino`` puede ser una lista de extractos, con ``tasas`` (tabla de
+    tipos de cambio), ``moneda_base`` y ``monedas`` opcionales en el trabajo (ver ``leer_bancos``).
+
+    Las hojas de hallazgos se escriben en streaming en ``formato`` (``xlsx``, ``csv.gz`` o ``parquet``).
+    Si ``parametros["almacen"]`` es un directorio, la prueba 6 usa ``<almacen>/<nombre>.sqlite``
+    como almacén incremental. Con ``traza`` escribe ``<nombre>_traza.json`` (Chrome trace).
+
+    Devuelve una fila de resumen (conteos, segundos y rutas).
+    """
+    if not traza:
+        return _procesar(trabajo, dir_salida, parametros, formato)
+    with registrar() as perfil:
+        fila = _procesar(trabajo, dir_salida, parametros, formato)
+    fila["traza"] = os.path.join(dir_salida, f"{fila['nombre']}_traza.json")
+    with open(fila["traza"], "w", encoding="utf-8") as f:
+        f.write(perfil.a_chrome_trace())
+    return fila
+
+
+def _procesar(trabajo, dir_salida, parametros, formato):
+    t0 = time.perf_counter()
+    parametros = parametros or {}
+    nombre, prueba = trabajo["nombre"], trabajo.get("prueba") or PRUEBAS_CLI[0]
+    a = leer_archivo(trabajo["origen"])
+    if prueba == "cxc_bancos":
+        b = leer_bancos(trabajo["destino"], trabajo.get("tasas"), trabajo.get("moneda_base") or MONEDA_BASE,
+                        trabajo.get("monedas"),
+                        [cuenta_de_archivo(r, f"{nombre}_banco") for r in trabajo["destino"]]
+                        if isinstance(trabajo["destino"], list) else None)
+    else:
+        b = leer_archivo(trabajo["destino"])
+    if prueba == "origen_destino":
+        resultados, conteo = prueba_origen_destino(a, b)
+        hojas, docx = entregables_origen_destino(resultados, conteo, nombre)
+    elif prueba == "cxc_bancos":
+        if parametros.get("almacen"):
+            parametros = {**parametros, "almacen": os.path.join(parametros["almacen"], f"{nombre}.sqlite")}
+        resultados, conteo = prueba_cxc_bancos(a, b, **parametros)
+        with etapa("entregables"):
+            destinos = trabajo["destino"] if isinstance(trabajo["destino"], list) else [trabajo["destino"]]
+            hojas, docx = entregables_cxc_bancos(resultados, os.path.basename(trabajo["origen"]),
+                                                ", ".join(os.path.basename(d) for d in destinos), **parametros)
+    else:
+        raise ValueError(f"Prueba desconocida: {prueba!r} (use {', '.join(PRUEBAS_CLI)})")
+    rutas = {"hallazgos": os.path.join(dir_salida, f"{nombre}_hallazgos{FORMATOS[formato][0]}"),
+             "docx": os.path.join(dir_salida, f"{nombre}_reporte.docx")}
+    exportar(hojas, rutas["hallazgos"], formato)
+    with open(rutas["docx"], "wb") as f:
+        f.write(docx)
+    return {"nombre": nombre, "prueba": prueba, **conteo, "segundos": round(time.perf_counter() - t0, 3), **rutas}
@@ -0,0 +1,134 @@
+# normalizacion.py – montos y fechas: detección de formato por columna y parseo vectorizado
+"""Núcleos de normalización usados por ``coerce_amount``/``coerce_date``.
+
+* Las columnas numéricas pasan sin ida y vuelta por texto (``1234.5`` sigue siendo
+  1234.50 y no 12345).
+* En columnas de texto la convención decimal/miles y el formato de fecha se detectan
+  **una vez** sobre una muestra y luego se aplica un único parseo vectorizado con
+  formato fijo; solo las filas que no encajan pasan por el parseo flexible.
+* Los montos se devuelven también como centavos enteros (``Int64``) para que las
+  comparaciones posteriores sean exactas.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+MUESTRA = 2_000
+FORMATOS_FECHA = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d",
+                  "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S", "%d/%m/%y", "%m/%d/%Y"]
+_SIMBOLOS = re.compile(r"[^\d,.\-()]")
+
+
+def _muestra(s: pd.Series, n=MUESTRA) -> pd.Series:
+    s = s.dropna()
+    return s.iloc[:n] if len(s) <= n else s.sample(n, random_state=0)
+
+
+# ------------------------- Montos -------------------------
+def _voto(valor: str):
+    """'.' o ',' si el valor delata el separador decimal; None si es ambiguo."""
+    v = _SIMBOLOS.sub("", valor)
+    p, c = v.rfind("."), v.rfind(",")
+    if p >= 0 and c >= 0:
+        return "." if p > c else ","
+    sep = "." if p >= 0 else "," if c >= 0 else None
+    if sep is None:
+        return None
+    if v.count(sep) > 1:
+        return "," if sep == "." else "."          # se repite: es separador de miles
+    return None if len(v) - v.rfind(sep) - 1 == 3 else sep   # '1.234' es ambiguo
+
+
+def detectar_formato_monto(s: pd.Series):
+    """(decimal, miles) de una columna de texto según una muestra."""
+    votos = _muestra(s).astype(str).map(_voto).value_counts()
+    if len(votos):
+        dec = votos.index[0]
+    else:
+        # Solo valores ambiguos ('1.234'): se mantiene la convención previa (punto = miles)
+        dec = ","
+    return dec, ("," if dec == "." else ".")
+
+
+def a_centavos(series: pd.Series, decimal=None, miles=None) -> pd.Series:
+    """Monto en centavos enteros (``Int64``; nulo si no se puede interpretar)."""
+    if pd.api.types.is_bool_dtype(series):
+        series = series.astype("int64")
+    if pd.api.types.is_numeric_dtype(series):
+        return (pd.to_numeric(series, errors="coerce") * 100).round().astype("Int64")
+    s = series.astype("string").str.strip()
+    if decimal is None:
+        decimal, miles = detectar_formato_monto(s)
+    # camino rápido: reemplazos literales y un solo to_numeric
+    num = pd.to_numeric(_a_punto(s, decimal, miles), errors="coerce")
+    malos = (num.isna() & s.notna() & (s != "")).to_numpy(dtype=bool)
+    if malos.any():
+        # solo las filas con símbolos, espacios o paréntesis pasan por la expresión regular
+        r = s[malos]
+        neg = (r.str.startswith("(") & r.str.endswith(")")).fillna(False).to_numpy(dtype=bool)
+        v = pd.to_numeric(_a_punto(r.str.replace(r"[^\d,.\-]", "", regex=True), decimal, miles), errors="coerce")
+        num[malos] = np.where(neg, -v.abs(), v)
+    return (num * 100).round().astype("Int64")
+
+
+def _a_punto(s, decimal, miles):
+    s = s.str.replace(miles, "", regex=False)
+    return s.str.replace(decimal, ".", regex=False) if decimal != "." else s
+
+
+# ------------------------- Fechas -------------------------
+def detectar_formato_fecha(valores, minimo=0.5):
+    """Formato de ``FORMATOS_FECHA`` que interpreta más valores de la muestra (al menos ``minimo``)."""
+    valores = pd.Series([v for v in valores if v is not None and str(v).strip()], dtype="object").astype(str)
+    if valores.empty:
+        return None
+    valores = valores.drop_duplicates().iloc[:MUESTRA]
+    mejor, tasa = None, 0.0
+    for fmt in FORMATOS_FECHA:
+        t = pd.to_datetime(valores, format=fmt, errors="coerce").notna().mean()
+        if t == 1.0:
+            return fmt
+        if t > tasa:
+            mejor, tasa = fmt, t
+    return mejor if tasa >= minimo else None
+
+
+def a_fecha(series: pd.Series, formato=None) -> pd.Series:
+    """Fecha ``datetime64``: formato fijo detectado en una muestra y respaldo flexible (día primero).
+
+    Se parsea una vez cada valor distinto (los libros repiten pocas fechas en muchas filas).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    s = series.astype("string").str.strip()
+    if formato is None:
+        formato = detectar_formato_fecha(_muestra(s).tolist()) or FORMATOS_FECHA[0]
+    codigos, unicos = pd.factorize(s)
+    valores = _parsear_fechas(pd.Series(unicos, dtype="string"), formato).to_numpy(dtype="datetime64[ns]")
+    res = np.full(len(s), np.datetime64("NaT"), dtype="datetime64[ns]")
+    hay = codigos >= 0
+    res[hay] = valores[codigos[hay]]
+    return pd.Series(res, index=series.index, name=series.name)
+
+
+def _parsear_fechas(u: pd.Series, formato) -> pd.Series:
+    res = pd.to_datetime(u, format=formato, errors="coerce")
+    # valores que no encajan: primero los demás formatos fijos (ISO no se lee con día primero), luego flexible
+    for fmt in [f for f in FORMATOS_FECHA if f != formato] + [None]:
+        faltan = (res.isna() & (u != "")).to_numpy(dtype=bool)
+        if not faltan.any():
+            break
+        if fmt is None:
+            res[faltan] = pd.to_datetime(u[faltan], errors="coerce", dayfirst=True, format="mixed")
+        else:
+            res[faltan] = pd.to_datetime(u[faltan], format=fmt, errors="coerce")
+    return res
+
+
+def a_dias(fechas: pd.Series) -> np.ndarray:
+    """Número de día (desde 1970-01-01) como ``int32``; las fechas nulas quedan en el mínimo de int32."""
+    d = fechas.to_numpy(dtype="datetime64[D]")
+    out = d.astype("int64")
+    out[np.isnat(d)] = np.iinfo("int32").min
+    return out.astype("int32")
@@ -0,0 +1,239 @@
+# notas_credito.py – NC y retenciones: clasificación por palabras clave y compensación contra facturas
+"""Notas de crédito y retenciones de CxC antes del cruce con el banco.
+
+* ``Automata`` – autómata de Aho-Corasick precompilado con ``PALABRAS_CLAVE`` (texto en
+  minúsculas y sin tildes, coincidencias solo en límite de palabra; una clave que
+  termina en ``*`` es prefijo). ``clasificar`` lo recorre una vez por observación
+  **distinta** (diccionario de la columna categórica) y reparte la etiqueta por código.
+* ``compensar`` – por cliente, aplica cada crédito (fila de CxC con monto negativo) a una
+  factura del mismo cliente:
+
+  1. por referencia: el número de factura aparece en la observación o es la
+     referencia del propio crédito;
+  2. retenciones por tasa: |retención| = tasa × factura (± 1 centavo de redondeo) para
+     alguna de ``TASAS_RETENCION``;
+  3. NC por monto: |NC| = factura, al centavo.
+
+  Para 2 y 3 el crédito debe tener fecha entre la factura y ``ventana_dias`` días
+  después. Cada crédito va a su mejor candidato (referencia primero, luego menor
+  diferencia y menor distancia en días) y una factura no recibe más créditos que su
+  saldo (+ ``tol_cent``); un crédito que no cabe pasa a su siguiente candidato. Las
+  facturas quedan con el saldo neto; los créditos aplicados y las facturas saldadas
+  salen del núcleo, de modo que el cruce con el banco trabaja con menos filas.
+"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from caat.candidatos import REF_VACIAS, TIPO_FILA
+from caat.referencias import PATRON_TOKEN
+from caat.transacciones import Transacciones, categoria
+
+PALABRAS_CLAVE = {
+    "nota de credito": "NC", "nota credito": "NC", "nc": "NC", "n/c": "NC", "credit note": "NC",
+    "retenc*": "Retención", "ret iva": "Retención", "ret. iva": "Retención", "ret renta": "Retención",
+    "ret. renta": "Retención", "ret fuente": "Retención", "ret. fuente": "Retención", "withholding": "Retención",
+}
+SIN_CLASIFICAR = "Crédito"
+TASAS_RETENCION = [0.01, 0.0175, 0.02, 0.0275, 0.08, 0.10]
+VENTANA_DIAS = 90
+COLUMNAS_ENLACES = ["i_factura", "i_credito", "_CENT_APLICADO", "_TIPO_NC", "_CRITERIO"]
+
+
+def normalizar_texto(textos) -> pd.Series:
+    """Minúsculas y sin tildes (NFKD sin marcas combinantes)."""
+    s = pd.Series(textos, dtype=object).astype(str)
+    return s.str.normalize("NFKD").str.replace("[\u0300-\u036f]", "", regex=True).str.lower()
+
+
+class Automata:
+    """Aho-Corasick sobre ``{palabra: etiqueta}`` (ver módulo)."""
+
+    def __init__(self, palabras: dict):
+        self.hijos, self.falla, self.salida = [{}], [0], [[]]
+        claves = list(palabras)
+        for clave, texto in zip(claves, normalizar_texto([c.rstrip("*") for c in claves])):
+            s = 0
+            for ch in texto:
+                if ch not in self.hijos[s]:
+                    self.hijos.append({}); self.falla.append(0); self.salida.append([])
+                    self.hijos[s][ch] = len(self.hijos) - 1
+                s = self.hijos[s][ch]
+            self.salida[s].append((len(texto), palabras[clave], clave.endswith("*")))
+        # enlaces de falla por niveles (BFS); la salida de un estado incluye la de su falla
+        cola = deque(self.hijos[0].values())
+        while cola:
+            s = cola.popleft()
+            for ch, t in self.hijos[s].items():
+                cola.append(t)
+                f = self.falla[s]
+                while f and ch not in self.hijos[f]:
+                    f = self.falla[f]
+                self.falla[t] = self.hijos[f].get(ch, 0)
+                self.salida[t] = self.salida[t] + self.salida[self.falla[t]]
+
+    def buscar(self, texto: str) -> str:
+        """Etiqueta de la primera palabra clave en ``texto`` (ya normalizado); ``""`` si no hay."""
+        hijos, falla, salida = self.hijos, self.falla, self.salida
+        s, n = 0, len(texto)
+        for j, ch in enumerate(texto):
+            while s and ch not in hijos[s]:
+                s = falla[s]
+            s = hijos[s].get(ch, 0)
+            for largo, etiqueta, prefijo in salida[s]:
+                i = j - largo + 1
+                if (i == 0 or not texto[i - 1].isalnum()) and (prefijo or j + 1 == n or not texto[j + 1].isalnum()):
+                    return etiqueta
+        return ""
+
+
+AUTOMATA = Automata(PALABRAS_CLAVE)
+
+
+def clasificar(textos, automata=AUTOMATA) -> np.ndarray:
+    """Etiqueta de cada texto (``""`` si no tiene palabras clave); el autómata corre una vez por texto distinto."""
+    cat = textos if isinstance(getattr(textos, "dtype", None), pd.CategoricalDtype) else categoria(textos)
+    dicc = [automata.buscar(t) for t in normalizar_texto(cat.cat.categories)]
+    etiquetas = np.array(dicc + [""], dtype=object)            # código -1 (nulo) → ""
+    return etiquetas[cat.cat.codes.to_numpy()]
+
+
+def _candidatos(**columnas) -> pd.DataFrame:
+    return pd.DataFrame({k: np.asarray(v) for k, v in columnas.items()})
+
+
+def _por_referencia(n, creditos, facturas, cli) -> pd.DataFrame:
+    """Créditos cuya observación (o referencia propia) nombra una factura del mismo cliente."""
+    refs = n["_REF"].cat.categories
+    vacia = np.append(refs.isin(REF_VACIAS) | (refs == ""), True)      # código -1 (nulo) → vacía
+    obs = n["_OBS"]
+    tokens = pd.Series(obs.cat.categories, dtype=object).astype(str).str.upper().str.findall(PATRON_TOKEN).explode()
+    tokens = tokens.dropna()
+    # token → código de referencia; cada crédito hereda los tokens de su observación
+    por_obs = pd.DataFrame({"obs": tokens.index.to_numpy(dtype="int64"), "ref": refs.get_indexer(tokens.to_numpy())})
+    por_obs = por_obs[por_obs["ref"] >= 0]
+    c = pd.DataFrame({"i_credito": creditos, "obs": obs.cat.codes.to_numpy()[creditos]})
+    c = pd.concat([c.merge(por_obs, on="obs")[["i_credito", "ref"]],
+                   pd.DataFrame({"i_credito": creditos, "ref": n["_REF"].cat.codes.to_numpy()[creditos]})])
+    c["cli"] = cli[c["i_credito"].to_numpy()]
+    f = pd.DataFrame({"i_factura": facturas, "ref": n["_REF"].cat.codes.to_numpy()[facturas], "cli": cli[facturas]})
+    pares = c[~vacia[c["ref"].to_numpy()]].merge(f, on=["cli", "ref"])[["i_credito", "i_factura"]].drop_duplicates()
+    return pares.assign(_CRITERIO="Referencia", _PRIORIDAD=0, _DIF=0)
+
+
+def _por_tasa(cent, dia, cli, creditos, facturas, tasas, tol_cent, ventana_dias, criterio) -> pd.DataFrame:
+    """Pares con |crédito| = tasa × factura (± ``tol_cent``), mismo cliente y fecha dentro de la ventana.
+
+    Las facturas se ordenan por (cliente, centavos) en una clave entera; cada crédito y tasa
+    abre con ``searchsorted`` la ventana de montos de factura compatibles.
+    """
+    if not len(creditos) or not len(facturas):
+        return _candidatos(i_credito=[], i_factura=[], _CRITERIO=[], _PRIORIDAD=[], _DIF=[])
+    base = int(cent[facturas].max()) + 1
+    clave = cli[facturas] * base + cent[facturas]
+    orden = np.argsort(clave, kind="stable")
+    clave, fac_ord = clave[orden], facturas[orden]
+    a = -cent[creditos]
+    partes = []
+    for tasa in tasas:
+        # round(factura × tasa) ∈ [a - tol, a + tol]  ⇔  factura ∈ [(a - tol - ½) / tasa, (a + tol + ½) / tasa]
+        lo = np.clip(np.ceil((a - tol_cent - 0.5) / tasa), 1, base - 1).astype("int64")
+        hi = np.clip(np.floor((a + tol_cent + 0.5) / tasa), 0, base - 1).astype("int64")
+        ini = np.searchsorted(clave, cli[creditos] * base + lo, side="left")
+        fin = np.searchsorted(clave, cli[creditos] * base + hi, side="right")
+        cnt = np.maximum(fin - ini, 0)
+        if not cnt.sum():
+            continue
+        ic = np.repeat(creditos, cnt)
+        pos = np.repeat(ini - np.cumsum(cnt) + cnt, cnt) + np.arange(int(cnt.sum()))
+        jf = fac_ord[pos]
+        dif = np.abs(np.rint(cent[jf] * tasa).astype("int64") + cent[ic])
+        desfase = dia[ic] - dia[jf]
+        ok = (dif <= tol_cent) & (desfase >= 0) & (desfase <= ventana_dias)
+        etiqueta = criterio if tasa == 1 else f"{criterio} {tasa:.2%}".replace(".00%", "%")
+        partes.append(_candidatos(i_credito=ic[ok], i_factura=jf[ok], _CRITERIO=np.full(int(ok.sum()), etiqueta),
+                                  _PRIORIDAD=np.ones(int(ok.sum()), dtype="int64"), _DIF=dif[ok]))
+    if not partes:
+        return _candidatos(i_credito=[], i_factura=[], _CRITERIO=[], _PRIORIDAD=[], _DIF=[])
+    return pd.concat(partes, ignore_index=True)
+
+
+def _asignar(candidatos, cent, tol_cent) -> tuple:
+    """``(i_credito, i_factura, criterio)`` aplicados, por rondas sobre ``candidatos`` ya ordenados.
+
+    En cada ronda cada crédito pendiente toma su mejor candidato restante y cada factura
+    acepta esos créditos en orden hasta el primero que supera su saldo (+ ``tol_cent``):
+    ese par se descarta (el crédito prueba su siguiente factura en la ronda siguiente) y
+    los posteriores esperan, porque el acumulado que los juzgó incluía al rechazado.
+    """
+    ic_c = candidatos["i_credito"].to_numpy(dtype="int64")
+    jf_c = candidatos["i_factura"].to_numpy(dtype="int64")
+    crit_c = candidatos["_CRITERIO"].to_numpy(dtype=object)
+    saldo = cent.copy()
+    vivo = np.ones(len(ic_c), dtype=bool)
+    aplicados, pendiente = [], np.ones(len(cent), dtype=bool)
+    while vivo.any():
+        pos = np.flatnonzero(vivo)
+        pos = pos[~pd.Series(ic_c[pos]).duplicated().to_numpy()]     # mejor candidato restante por crédito
+        ic, jf = ic_c[pos], jf_c[pos]
+        acumulado = pd.Series(-cent[ic]).groupby(jf).cumsum().to_numpy()
+        falla = acumulado > saldo[jf] + tol_cent
+        fallas = pd.Series(falla).groupby(jf).cumsum().to_numpy()
+        ok = fallas == 0
+        np.subtract.at(saldo, jf[ok], -cent[ic[ok]])
+        aplicados.append(pos[ok])
+        pendiente[ic[ok]] = False
+        vivo[pos[falla & (fallas == 1)]] = False                     # primer rechazo de cada factura
+        vivo &= pendiente[ic_c]
+    pos = np.concatenate(aplicados) if aplicados else np.array([], dtype="int64")
+    return ic_c[pos], jf_c[pos], crit_c[pos]
+
+
+def compensar(cxc: Transacciones, tol_cent=50, tasas=TASAS_RETENCION, ventana_dias=VENTANA_DIAS) -> tuple:
+    """``(cxc_neto, enlaces)``: CxC con saldos netos y los créditos aplicados (ver módulo).
+
+    ``enlaces`` tiene ``COLUMNAS_ENLACES``; ``i_factura``/``i_credito`` son posiciones en ``cxc``.
+    En ``cxc_neto`` las facturas compensadas llevan ``_CENT`` neto y ``_CENT_NC`` (lo aplicado).
+    """
+    n = cxc.nucleo
+    cent = n["_CENT"].to_numpy(dtype="int64")
+    dia = n["_DIA"].to_numpy(dtype="int64")
+    cli = n["_CLI"].cat.codes.to_numpy().astype("int64")
+    tipo = clasificar(n["_OBS"])
+    creditos, facturas = np.flatnonzero(cent < 0), np.flatnonzero(cent > 0)
+    vacio = pd.DataFrame({"i_factura": np.array([], dtype=TIPO_FILA), "i_credito": np.array([], dtype=TIPO_FILA),
+                          "_CENT_APLICADO": np.array([], dtype="int64"), "_TIPO_NC": np.array([], dtype=object),
+                          "_CRITERIO": np.array([], dtype=object)})
+    if not len(creditos) or not len(facturas):
+        return cxc, vacio
+
+    candidatos = pd.concat([
+        _por_referencia(n, creditos, facturas, cli),
+        _por_tasa(cent, dia, cli, creditos[tipo[creditos] == "Retención"], facturas, tasas, 1, ventana_dias, "Tasa"),
+        _por_tasa(cent, dia, cli, creditos[tipo[creditos] == "NC"], facturas, [1], 0, ventana_dias, "Monto"),
+    ], ignore_index=True)
+    if not len(candidatos):
+        return cxc, vacio
+    candidatos["_DIAS"] = np.abs(dia[candidatos["i_credito"].to_numpy(dtype="int64")]
+                                 - dia[candidatos["i_factura"].to_numpy(dtype="int64")])
+    candidatos = candidatos.sort_values(["_PRIORIDAD", "_DIF", "_DIAS", "i_credito", "i_factura"], kind="stable")
+    ic, jf, criterio = _asignar(candidatos, cent, tol_cent)
+    if not len(ic):
+        return cxc, vacio
+    aplicado = -cent[ic]
+
+    enlaces = pd.DataFrame({"i_factura": jf.astype(TIPO_FILA), "i_credito": ic.astype(TIPO_FILA),
+                            "_CENT_APLICADO": aplicado,
+                            "_TIPO_NC": np.where(tipo[ic] == "", SIN_CLASIFICAR, tipo[ic]).astype(object),
+                            "_CRITERIO": criterio})
+    enlaces = enlaces.sort_values(["i_factura", "i_credito"]).reset_index(drop=True)
+
+    nc = np.zeros(len(n), dtype="int64")
+    np.add.at(nc, jf, aplicado)
+    neto = cent - nc
+    queda = np.ones(len(n), dtype=bool)
+    queda[ic] = False
+    queda[jf[neto[jf] <= 0]] = False
+    nucleo = n.assign(_CENT=neto, _CENT_NC=nc)[queda].reset_index(drop=True)
+    return Transacciones(nucleo, cxc.carga), enlaces
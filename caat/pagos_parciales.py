@@ -0,0 +1,200 @@
+# pagos_parciales.py – pagos agrupados (N facturas ↔ 1 depósito) y parciales (1 factura ↔ N depósitos)
+"""Subset-sum acotado sobre centavos enteros para CxC vs Bancos.
+
+Se ejecuta sobre lo que queda abierto tras la asignación uno a uno, en este orden:
+
+1. **Pago parcial**: una factura se cubre con 2 a ``max_items`` depósitos libres
+   dentro de ``ventana_dias``.
+2. **Pago agrupado**: un depósito cubre de 2 a ``max_items`` facturas abiertas de un
+   mismo cliente dentro de ``ventana_dias``.
+
+Todo candidato necesita **afinidad** por referencia (``caat.referencias.pares_similares``):
+en el pago parcial cada depósito nombra a la factura; en el agrupado las facturas son
+del único cliente cuyas facturas nombra el concepto del depósito, y una factura
+nombrada con referencia exacta (``SIM_AGRUPADO``) está en el grupo: un núcleo o un
+parecido por trigramas suele ser un número con un dígito cambiado. Sin referencias no hay afinidad y no se buscan grupos: con ±tolerancia sobre
+decenas de candidatos casi siempre aparece *alguna* suma que cuadra.
+
+La búsqueda es meet-in-the-middle: los candidatos (podados con ``searchsorted`` a
+monto ≤ objetivo + tol y limitados a los ``max_candidatos`` más cercanos en fecha) se
+parten en dos mitades, se enumeran las sumas de cada mitad por cantidad de ítems y se
+cruzan con ``searchsorted``. Gana el menor desvío y, a igualdad, el grupo más chico;
+si otro subconjunto empata con el mejor el grupo es ambiguo y no se enlaza. Cada
+cliente tiene un presupuesto de ``max_busquedas`` búsquedas por pasada (determinista:
+el resultado no depende de la carga de la máquina).
+"""
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS_GRUPOS = ["_GRUPO", "i_cxc", "i_banco", "_TIPO_MATCH", "_DIF_MONTO"]
+COLUMNAS_AFINIDAD = ["i_banco", "i_cxc", "cli", "sim"]
+SIM_AGRUPADO = 1.0          # similitud mínima de la factura nombrada en un pago agrupado
+MAX_BUSQUEDAS = 2_000       # búsquedas de subconjunto por cliente y pasada
+
+
+@lru_cache(maxsize=256)
+def _indices_combinaciones(n, k):
+    if k == 0:
+        return np.zeros((1, 0), dtype="int64")
+    return np.array(list(combinations(range(n), k)), dtype="int64").reshape(-1, k)
+
+
+def _sumas_por_tamano(valores, max_items):
+    """{k: (sumas ordenadas, combinaciones en el mismo orden)} para k = 0..max_items."""
+    res = {}
+    for k in range(0, min(max_items, len(valores)) + 1):
+        combs = _indices_combinaciones(len(valores), k)
+        sumas = valores[combs].sum(axis=1)
+        o = np.argsort(sumas, kind="stable")
+        res[k] = (sumas[o], combs[o])
+    return res
+
+
+def _soluciones(si, sd, objetivo, dif, k) -> int:
+    """Cuántos subconjuntos de ``k`` ítems suman exactamente ``objetivo ± dif``."""
+    n = 0
+    for suma in {objetivo - dif, objetivo + dif}:
+        for ka, (sa, _) in si.items():
+            if k - ka in sd:
+                sb = sd[k - ka][0]
+                n += int((np.searchsorted(sb, suma - sa, "right") - np.searchsorted(sb, suma - sa, "left")).sum())
+    return n
+
+
+def mejor_subconjunto(valores, objetivo, tol, max_items=4, min_items=2, unico=False):
+    """Índices del subconjunto con |suma - objetivo| ≤ tol (mínimo desvío, luego menos ítems).
+
+    ``valores`` y ``objetivo`` en centavos enteros. Devuelve ``None`` si no hay solución
+    o, con ``unico``, si otro subconjunto empata con el mejor.
+    """
+    valores = np.asarray(valores, dtype="int64")
+    if len(valores) < min_items:
+        return None
+    # Poda: ni los max_items mayores alcanzan, ni los min_items menores caben
+    ordenados = np.sort(valores)
+    if ordenados[-max_items:].sum() < objetivo - tol or ordenados[:min_items].sum() > objetivo + tol:
+        return None
+    mitad = len(valores) // 2
+    izq, der = valores[:mitad], valores[mitad:]
+    si, sd = _sumas_por_tamano(izq, max_items), _sumas_por_tamano(der, max_items)
+    mejor = None
+    for ka, (sa, ca) in si.items():
+        for kb, (sb, cb) in sd.items():
+            if not (min_items <= ka + kb <= max_items) or not len(sb):
+                continue
+            falta = objetivo - sa
+            pos = np.clip(np.searchsorted(sb, falta), 0, len(sb) - 1)
+            for p in (pos, np.clip(pos - 1, 0, len(sb) - 1)):
+                dif = np.abs(sa + sb[p] - objetivo)
+                j = int(np.argmin(dif))
+                clave = (int(dif[j]), ka + kb)
+                if dif[j] <= tol and (mejor is None or clave < mejor[0]):
+                    mejor = (clave, np.concatenate([ca[j], cb[p[j]] + mitad]))
+    if mejor is None or (unico and _soluciones(si, sd, objetivo, *mejor[0]) > 1):
+        return None
+    return mejor[1]
+
+
+class _Candidatos:
+    """Posiciones ordenadas por monto: la poda ``monto ≤ objetivo + tol`` es un ``searchsorted``."""
+
+    def __init__(self, pos, cent):
+        pos = np.asarray(pos, dtype="int64")
+        self.pos = pos[np.argsort(cent[pos], kind="stable")]
+        self.cent = cent[self.pos]
+
+    def cercanos(self, dias, dia_obj, objetivo, tol, ventana, libres, max_candidatos):
+        """Candidatos libres, con monto en (0, objetivo + tol] y en ventana; los ``max_candidatos`` más cercanos en fecha."""
+        idx = self.pos[np.searchsorted(self.cent, 0, "right"):np.searchsorted(self.cent, objetivo + tol, "right")]
+        idx = idx[libres[idx] & (np.abs(dias[idx] - dia_obj) <= ventana)]
+        if len(idx) > max_candidatos:
+            idx = idx[np.argsort(np.abs(dias[idx] - dia_obj), kind="stable")[:max_candidatos]]
+        return idx
+
+
+def _agrupar(claves, valores) -> dict:
+    """{clave: valores únicos} para pares ``(clave, valor)``."""
+    return pd.Series(valores).groupby(claves, sort=True).unique().to_dict() if len(claves) else {}
+
+
+def buscar_pagos_parciales(cxc: pd.DataFrame, banco: pd.DataFrame, afinidad: pd.DataFrame, tol_cent, ventana_dias=30,
+                           max_items=4, max_candidatos=24, max_busquedas=MAX_BUSQUEDAS) -> pd.DataFrame:
+    """Grupos 1↔N y N↔1 sobre partidas abiertas.
+
+    ``cxc``: columnas i_cxc, cent, dia, cli. ``banco``: i_banco, cent, dia.
+    ``cent`` en centavos enteros (positivos) y ``dia`` como número de día entero.
+    ``afinidad`` (``COLUMNAS_AFINIDAD``): el concepto del depósito ``i_banco`` nombra la
+    factura ``i_cxc`` del cliente ``cli`` con similitud ``sim``.
+    Devuelve una fila por par (factura, depósito) con el id de grupo y el desvío del grupo.
+    """
+    filas = []
+    if cxc.empty or banco.empty or afinidad.empty:
+        return pd.DataFrame(filas, columns=COLUMNAS_GRUPOS)
+    tol = int(tol_cent)
+    c_cent, c_dia = cxc["cent"].to_numpy("int64"), cxc["dia"].to_numpy("int64")
+    c_cli, c_id = cxc["cli"].to_numpy(), cxc["i_cxc"].to_numpy("int64")
+    b_cent, b_dia, b_id = banco["cent"].to_numpy("int64"), banco["dia"].to_numpy("int64"), banco["i_banco"].to_numpy("int64")
+    libre_c = np.ones(len(cxc), dtype=bool); libre_b = np.ones(len(banco), dtype=bool)
+
+    # afinidad en posiciones locales; clientes nombrados por cada depósito
+    a_b = pd.Index(b_id).get_indexer(afinidad["i_banco"].to_numpy("int64"))
+    a_c = pd.Index(c_id).get_indexer(afinidad["i_cxc"].to_numpy("int64"))
+    n_clientes = pd.Series(afinidad["cli"].to_numpy()).groupby(a_b).nunique().to_dict()
+    ok = (a_b >= 0) & (a_c >= 0)
+    exacta = afinidad["sim"].to_numpy("float64")[ok] >= SIM_AGRUPADO
+    a_b, a_c = a_b[ok], a_c[ok]
+    depositos_fac = _agrupar(a_c, a_b)
+    facturas_dep = _agrupar(a_b[exacta], a_c[exacta])
+    grupo = 0
+
+    # 1) Pago parcial: una factura → varios depósitos que la nombran (por cliente y fecha)
+    busquedas = {}
+    for ic in sorted(depositos_fac, key=lambda i: (c_cli[i], c_dia[i], i)):
+        cli = c_cli[ic]
+        if c_cent[ic] <= 0 or busquedas.get(cli, 0) >= max_busquedas:
+            continue
+        busquedas[cli] = busquedas.get(cli, 0) + 1
+        cand = _Candidatos(depositos_fac[ic], b_cent).cercanos(b_dia, c_dia[ic], c_cent[ic], tol, ventana_dias,
+                                                              libre_b, max_candidatos)
+        sel = mejor_subconjunto(b_cent[cand], c_cent[ic], tol, max_items, unico=True)
+        if sel is None:
+            continue
+        elegidos = cand[sel]; dif = abs(int(b_cent[elegidos].sum()) - int(c_cent[ic])) / 100
+        libre_c[ic] = False; libre_b[elegidos] = False
+        filas += [(grupo, c_id[ic], b_id[j], "Pago parcial", dif) for j in elegidos]
+        grupo += 1
+
+    # 2) Pago agrupado: un depósito → una factura que nombra más otras del mismo cliente; el mejor grupo, si es único
+    facturas_cli = pd.Series(np.arange(len(cxc))).groupby(c_cli, sort=True).indices
+    por_cliente = {cli: _Candidatos(pos, c_cent) for cli, pos in facturas_cli.items() if len(pos) >= 2}
+    busquedas = dict.fromkeys(por_cliente, 0)
+    for jb in sorted(facturas_dep):
+        # un concepto que nombra facturas de varios clientes (p. ej. un número con un dígito cambiado) no da afinidad
+        if not libre_b[jb] or n_clientes[jb] > 1:
+            continue
+        hallados = {}
+        for ic in facturas_dep[jb]:
+            cli = c_cli[ic]
+            if not libre_c[ic] or c_cent[ic] <= 0 or cli not in por_cliente or busquedas[cli] >= max_busquedas:
+                continue
+            busquedas[cli] += 1
+            resto = b_cent[jb] - c_cent[ic]
+            cand = por_cliente[cli].cercanos(c_dia, b_dia[jb], resto, tol, ventana_dias, libre_c, max_candidatos)
+            cand = cand[cand != ic]
+            sel = mejor_subconjunto(c_cent[cand], resto, tol, max_items - 1, min_items=1, unico=True)
+            if sel is not None:
+                elegidos = np.sort(np.concatenate([[ic], cand[sel]]))
+                hallados[tuple(elegidos)] = (abs(int(c_cent[elegidos].sum()) - int(b_cent[jb])), len(elegidos))
+        # el mismo grupo puede salir de dos facturas nombradas: solo cuentan grupos distintos
+        claves = sorted(hallados.values())
+        if not claves or (len(claves) > 1 and claves[1] == claves[0]):
+            continue
+        elegidos = np.array(min(hallados, key=hallados.get)); dif = claves[0][0]
+        libre_c[elegidos] = False; libre_b[jb] = False
+        filas += [(grupo, c_id[i], b_id[jb], "Pago agrupado", dif / 100) for i in elegidos]
+        grupo += 1
+
+    return pd.DataFrame(filas, columns=COLUMNAS_GRUPOS)
@@ -0,0 +1,161 @@
+# paralelo.py – prueba 6 en paralelo: candidatos por cliente y asignación por componente
+"""Ejecución de ``cxc_bancos.emparejar`` en un pool de procesos, con resultado
+idéntico al serial.
+
+* **Candidatos**: cada fila de CxC genera sus pares sin depender de las demás, así que
+  las facturas se reparten por ``_CLI`` (clientes completos, balanceando filas) y cada
+  tarea busca la ventana monto/fecha contra todo el banco. Los pares se reordenan por
+  (i_cxc, i_banco), el mismo orden que producen las funciones seriales. Los pares por
+  referencia salen del índice de trigramas (``caat.referencias``), que se consulta una
+  sola vez en el proceso principal.
+* **Asignación**: las componentes conexas del grafo de candidatos (con todos los niveles
+  de prioridad) no comparten facturas ni depósitos; se reparten entre tareas y cada una
+  ejecuta ``asignar_uno_a_uno`` sobre sus aristas en el orden original, de modo que el
+  rango (costo, posición) y los desempates son los mismos.
+* Los pagos agrupados/parciales consumen depósitos en orden global de cliente y siguen
+  en serie.
+
+Las columnas numéricas viajan a los procesos en ``multiprocessing.shared_memory``;
+por tarea solo se envían vectores de posiciones. Cada tarea abre el bloque y lo cierra
+al terminar (``_adjuntar``), así los procesos del pool no retienen bloques ya liberados.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import heapq
+import os
+
+import numpy as np
+import pandas as pd
+
+from caat.asignacion import asignar_uno_a_uno, componentes
+from caat.candidatos import NS_DIA, TIPO_FILA, candidatos_ventana
+from caat.referencias import UMBRAL_SIMILITUD
+
+TAREAS_POR_PROCESO = 4
+
+
+class _Memoria:
+    """Arrays numpy copiados a un bloque de memoria compartida (se libera al salir)."""
+
+    def __init__(self, arrays: dict):
+        self.desc, total = {}, 0
+        for clave, a in arrays.items():
+            a = np.ascontiguousarray(a)
+            self.desc[clave] = (total, a.dtype.str, a.shape)
+            total += a.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        for clave, a in arrays.items():
+            ini, dtype, shape = self.desc[clave]
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=ini)[...] = a
+        self.nombre = self.shm.name
+
+    def __enter__(self):
+        return self.nombre, self.desc
+
+    def __exit__(self, *exc):
+        self.shm.close(); self.shm.unlink()
+
+
+@contextmanager
+def _adjuntar(nombre, desc):
+    """Arrays del bloque ``nombre`` (en el proceso de trabajo); el bloque se cierra al salir.
+
+    Las vistas no deben sobrevivir al ``with``: cada tarea calcula en una función aparte
+    y devuelve arrays propios.
+    """
+    shm = shared_memory.SharedMemory(name=nombre)
+    arrays = {c: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=ini) for c, (ini, dtype, shape) in desc.items()}
+    ok = False
+    try:
+        yield arrays
+        ok = True
+    finally:
+        arrays.clear()
+        try:
+            shm.close()
+        except BufferError:         # una excepción en curso retiene vistas en su traza: se libera con ella
+            if ok:
+                raise
+
+
+def _repartir(pesos: np.ndarray, n_tareas) -> list:
+    """Índices de ``pesos`` agrupados en ``n_tareas`` bolsas de peso similar (LPT, determinista)."""
+    bolsas = [(0, k, []) for k in range(min(n_tareas, len(pesos)))]
+    for i in np.argsort(-pesos, kind="stable"):
+        peso, k, items = heapq.heappop(bolsas)
+        items.append(i)
+        heapq.heappush(bolsas, (peso + int(pesos[i]), k, items))
+    return [np.sort(np.asarray(items, dtype="int64")) for _, _, items in sorted(bolsas, key=lambda b: b[1]) if items]
+
+
+# ------------------------- Candidatos -------------------------
+def _candidatos_tarea(nombre, desc, filas, tol_monto, tol_dias):
+    with _adjuntar(nombre, desc) as d:
+        return _candidatos(d, filas, tol_monto, tol_dias)
+
+
+def _candidatos(d, filas, tol_monto, tol_dias):
+    m_c, f_c = d["monto_c"][filas], d["fecha_c"][filas].view("datetime64[ns]")
+    m_b, f_b = d["monto_b"], d["fecha_b"].view("datetime64[ns]")
+    p = candidatos_ventana(np.abs(m_c), f_c, np.abs(m_b), f_b, tol_monto, tol_dias)
+    return filas[p["i_cxc"].to_numpy()], p["i_banco"].to_numpy(), p["_DIF_MONTO"].to_numpy(), p["_DIF_DIAS"].to_numpy()
+
+
+def _unir_pares(partes):
+    ia, ib, dm, dd = (np.concatenate(x) for x in zip(*partes))
+    # cada factura sale de una sola tarea, ya ordenada por i_banco: basta un orden estable por i_cxc
+    o = np.argsort(ia, kind="stable")
+    return pd.DataFrame({"i_cxc": ia[o].astype(TIPO_FILA), "i_banco": ib[o], "_DIF_MONTO": dm[o], "_DIF_DIAS": dd[o]})
+
+
+# ------------------------- Asignación -------------------------
+def _asignar_tarea(nombre, desc, posiciones):
+    with _adjuntar(nombre, desc) as d:
+        return _asignar(d, posiciones)
+
+
+def _asignar(d, posiciones):
+    pares = pd.DataFrame({"i_cxc": d["ia"][posiciones], "i_banco": d["ib"][posiciones],
+                          "_COSTO": d["costo"][posiciones], "_PRIORIDAD": d["prioridad"][posiciones],
+                          "_POS": posiciones})
+    return asignar_uno_a_uno(pares, costo="_COSTO", prioridad="_PRIORIDAD", workers=1)["_POS"].to_numpy()
+
+
+def candidatos_y_asignacion(cxc, bank, hay_ref, tol_monto, tol_dias, procesos=None, umbral_ref=UMBRAL_SIMILITUD):
+    """Equivalente paralelo de candidatos + ``asignar_uno_a_uno`` de ``cxc_bancos.emparejar``.
+
+    Devuelve las filas asignadas de los candidatos (mismas filas, orden e índice que en serie).
+    Requiere CxC y banco no vacíos.
+    """
+    from caat.cxc_bancos import combinar_candidatos, pares_referencia
+    procesos = procesos or os.cpu_count() or 1
+    n_tareas = procesos * TAREAS_POR_PROCESO
+    clientes = pd.factorize(cxc["_CLI"], sort=True)[0]
+    grupos = _repartir(np.bincount(clientes), n_tareas)
+    filas_por_tarea = [np.flatnonzero(np.isin(clientes, g)) for g in grupos]
+
+    arrays = {"monto_c": cxc["_MONTO"].to_numpy(dtype="float64"), "monto_b": bank["_MONTO"].to_numpy(dtype="float64"),
+              "fecha_c": cxc["_DIA"].to_numpy(dtype="int64") * NS_DIA, "fecha_b": bank["_DIA"].to_numpy(dtype="int64") * NS_DIA}
+
+    with ProcessPoolExecutor(max_workers=procesos) as ex:
+        with _Memoria(arrays) as (nombre, desc):
+            futuros = [ex.submit(_candidatos_tarea, nombre, desc, filas, tol_monto, tol_dias) for filas in filas_por_tarea]
+            # mientras tanto, el índice de referencias en este proceso
+            pares_ref = pares_referencia(cxc, bank, hay_ref, tol_monto, umbral_ref)
+            pares = _unir_pares([f.result() for f in futuros])
+        candidatos = combinar_candidatos(pares_ref, pares, tol_monto, tol_dias)
+        if candidatos.empty:
+            return asignar_uno_a_uno(candidatos, costo="_COSTO", prioridad="_PRIORIDAD")
+
+        arrays = {"ia": candidatos["i_cxc"].to_numpy(dtype="int64"), "ib": candidatos["i_banco"].to_numpy(dtype="int64"),
+                  "costo": candidatos["_COSTO"].to_numpy(dtype="float64"),
+                  "prioridad": candidatos["_PRIORIDAD"].to_numpy(dtype="int64")}
+        comp = componentes(arrays["ia"], arrays["ib"])
+        por_comp = _repartir(np.bincount(comp), n_tareas)
+        posiciones = [np.flatnonzero(np.isin(comp, g)) for g in por_comp]
+        with _Memoria(arrays) as (nombre, desc):
+            elegidas = [f.result() for f in [ex.submit(_asignar_tarea, nombre, desc, p) for p in posiciones]]
+    elegido = np.zeros(len(candidatos), dtype=bool)
+    elegido[np.concatenate(elegidas)] = True
+    return candidatos[elegido]
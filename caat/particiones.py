@@ -0,0 +1,138 @@
+# particiones.py – conciliación origen/destino por particiones en disco (archivos mayores que la RAM)
+"""Modo streaming para las pruebas 1–5 (origen/destino).
+
+Ambos archivos se leen por bloques y cada fila se envía, según el hash de
+``CAMPOS_ID`` (ID_Transaccion/ID_Entidad, como ``clave_id``), a un balde en disco. Como todas las
+pruebas unen (o agrupan) por claves que contienen ``CAMPOS_ID``, cada balde se
+concilia por separado y sus resultados (conciliadas, solo_origen, solo_destino,
+discrepancias y duplicados) se agregan a CSV de salida. La memoria pico queda
+acotada por ``presupuesto_mb``: el número de baldes y el tamaño de bloque se
+calculan a partir de él, y un balde que igual lo exceda (claves sesgadas) se vuelve
+a particionar con otra semilla.
+
+Cada bloque se lee con sus propios tipos (un bloque puede traer el ID como entero y
+el siguiente como texto), así que los baldes se concilian con ``ids_canonicos=True``:
+``1``, ``1.0`` y ``"001"`` son el mismo ID. Las pruebas en memoria comparan los IDs tal
+como vienen, salvo que se pida lo mismo (``conciliar_todo(..., ids_canonicos=True)``).
+"""
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from caat.ingesta import bytes_por_fila, leer_por_bloques
+from caat.normalizacion import a_fecha
+from caat.pruebas import CAMPOS_CLAVE, CAMPOS_ID, SALIDAS, conciliar_todo
+from caat.transacciones import ids
+
+EXPANSION = 6           # bytes en memoria por byte de CSV (objetos + merges)
+FACTOR_BALDE = 3        # memoria de un balde al conciliarlo respecto de su tamaño serializado
+MAX_NIVEL = 3
+
+
+def _balde(df, n, semilla=0) -> np.ndarray:
+    # hash sobre la clave canónica con que concilian las pruebas: 1, 1.0 y "001" caen en el mismo balde
+    claves = ids(df, CAMPOS_ID)
+    h = pd.util.hash_pandas_object(claves, index=False, hash_key=f"caat{semilla:012d}"[:16]).to_numpy()
+    return (h % np.uint64(n)).astype("int64")
+
+
+def _normalizar(bloque):
+    if not pd.api.types.is_datetime64_any_dtype(bloque["Fecha"]):
+        bloque["Fecha"] = a_fecha(bloque["Fecha"])
+    return bloque
+
+
+def _repartir(bloques, dir_baldes, lado, n, semilla):
+    partes = {}
+    for k, bloque in enumerate(bloques):
+        bloque = _normalizar(bloque)
+        for b, parte in bloque.groupby(_balde(bloque, n, semilla), sort=False):
+            ruta = os.path.join(dir_baldes, f"{lado}_{b:05d}_{k:06d}.pkl")
+            parte.to_pickle(ruta)
+            partes.setdefault(b, []).append(ruta)
+    return partes
+
+
+def _cargar(rutas, plantilla):
+    if not rutas:
+        return plantilla
+    return pd.concat([pd.read_pickle(r) for r in rutas], ignore_index=True)
+
+
+class _Escritor:
+    """Agrega resultados por balde a CSV de salida (encabezado solo la primera vez)."""
+
+    def __init__(self, dir_salida):
+        self.rutas = {s: os.path.join(dir_salida, f"{s}.csv") for s in SALIDAS}
+        self.conteo = {s: 0 for s in SALIDAS}
+        for r in self.rutas.values():
+            if os.path.exists(r):
+                os.remove(r)
+
+    def agregar(self, resultados):
+        for s, df in resultados.items():
+            if len(df):
+                df.to_csv(self.rutas[s], mode="a", index=False, header=self.conteo[s] == 0)
+                self.conteo[s] += len(df)
+
+
+def _procesar(partes_o, partes_d, dir_baldes, escritor, limite_bytes, nivel, plantillas):
+    for b in sorted(set(partes_o) | set(partes_d)):
+        ro, rd = partes_o.get(b, []), partes_d.get(b, [])
+        tam = sum(os.path.getsize(r) for r in ro + rd)
+        if tam * FACTOR_BALDE > limite_bytes and nivel < MAX_NIVEL:
+            # balde sesgado: se reparte otra vez con otra semilla
+            n = max(2, math.ceil(tam * FACTOR_BALDE / limite_bytes))
+            sub = tempfile.mkdtemp(dir=dir_baldes)
+            po = _repartir((pd.read_pickle(r) for r in ro), sub, "o", n, nivel + 1)
+            pd_ = _repartir((pd.read_pickle(r) for r in rd), sub, "d", n, nivel + 1)
+            for r in ro + rd:
+                os.remove(r)
+            _procesar(po, pd_, sub, escritor, limite_bytes, nivel + 1, plantillas)
+            continue
+        escritor.agregar(conciliar_todo(_cargar(ro, plantillas[0]), _cargar(rd, plantillas[1]), ids_canonicos=True))
+        for r in ro + rd:
+            os.remove(r)
+
+
+def conciliar_por_particiones(origen, destino, dir_salida, presupuesto_mb=512, filas_por_bloque=None):
+    """Concilia ``origen`` vs ``destino`` (rutas o archivos) con memoria acotada.
+
+    Escribe un CSV por salida (``conciliadas.csv``, ``solo_origen.csv``, ...) en ``dir_salida`` y devuelve ``{salida: (filas, ruta)}``.
+    """
+    limite = presupuesto_mb * 2**20
+    bpf = max(bytes_por_fila(origen), bytes_por_fila(destino))
+    if filas_por_bloque is None:
+        filas_por_bloque = max(1_000, int(limite / (bpf * EXPANSION * 2)))
+    tam = sum(_tamano(f) for f in (origen, destino))
+    n = max(1, math.ceil(tam * EXPANSION / limite))
+
+    os.makedirs(dir_salida, exist_ok=True)
+    dir_baldes = tempfile.mkdtemp(prefix="caat_baldes_")
+    try:
+        kw = dict(ids=CAMPOS_ID, montos=["Monto"], fechas=["Fecha"])
+        po = _repartir(leer_por_bloques(origen, filas_por_bloque, **kw), dir_baldes, "o", n, 0)
+        pd_ = _repartir(leer_por_bloques(destino, filas_por_bloque, **kw), dir_baldes, "d", n, 0)
+        plantillas = [_plantilla(po), _plantilla(pd_)]
+        escritor = _Escritor(dir_salida)
+        _procesar(po, pd_, dir_baldes, escritor, limite, 0, plantillas)
+    finally:
+        shutil.rmtree(dir_baldes, ignore_errors=True)
+    return {s: (escritor.conteo[s], escritor.rutas[s]) for s in SALIDAS}
+
+
+def _plantilla(partes):
+    # DataFrame vacío con las columnas y tipos del lado, para baldes que solo tienen filas del otro
+    for rutas in partes.values():
+        return pd.read_pickle(rutas[0]).iloc[:0]
+    return pd.DataFrame(columns=CAMPOS_CLAVE)
+
+
+def _tamano(f):
+    if isinstance(f, (str, bytes)) or hasattr(f, "__fspath__"):
+        return os.path.getsize(f)
+    return getattr(f, "size", None) or len(f.getbuffer())
@@ -0,0 +1,155 @@
+# perfil.py – tiempos, memoria y conteos por etapa (panel "Rendimiento")
+"""Instrumentación liviana de las etapas de las pruebas.
+
+Uso::
+
+    p = Perfil()
+    with registrar(p):
+        with etapa("emparejar"):
+            ...
+            contar("pares candidatos", len(pares))
+    p.tabla(); p.a_json(); p.a_chrome_trace()
+
+Sin un ``Perfil`` registrado, ``etapa`` devuelve un contexto vacío compartido y
+``contar`` no hace nada: el costo es una lectura de ``ContextVar`` por llamada, así que
+la instrumentación puede quedar siempre en el código. El perfil activo vive en un
+``ContextVar``, de modo que sesiones de Streamlit en hilos distintos no se mezclan.
+
+Cada etapa registra inicio y duración (``perf_counter_ns``), profundidad, RSS al
+entrar y al salir y los contadores agregados con ``contar``. ``a_chrome_trace`` produce
+el formato de eventos de Chrome (``chrome://tracing`` / Perfetto). ``Perfil.observador``
+(opcional) recibe cada etapa al terminar: así la cola de trabajos (``caat.trabajos``)
+publica el avance sin que las pruebas sepan que corren en segundo plano.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import os
+import time
+
+import pandas as pd
+
+_ACTUAL = ContextVar("caat_perfil", default=None)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _Nulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class _Etapa:
+    __slots__ = ("perfil", "nombre", "registro")
+
+    def __init__(self, perfil, nombre, contadores):
+        self.perfil, self.nombre = perfil, nombre
+        self.registro = {"etapa": nombre, "nivel": len(perfil._pila), "contadores": dict(contadores)}
+
+    def __enter__(self):
+        self.perfil._pila.append(self.registro)
+        self.registro["rss_inicio_mb"] = _rss_mb()
+        self.registro["inicio_ns"] = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, tipo, *exc):
+        r = self.registro
+        r["dur_ns"] = time.perf_counter_ns() - r["inicio_ns"]
+        r["rss_fin_mb"] = _rss_mb()
+        if tipo is not None:
+            r["error"] = tipo.__name__
+        self.perfil._pila.pop()
+        self.perfil.etapas.append(r)
+        if tipo is None and self.perfil.observador is not None:
+            self.perfil.observador(r)
+        return False
+
+
+class Perfil:
+    """Registro de etapas de una ejecución."""
+
+    def __init__(self, observador=None):
+        self.etapas, self._pila = [], []
+        self.origen_ns = time.perf_counter_ns()
+        self.observador = observador
+
+    def tabla(self) -> pd.DataFrame:
+        """Una fila por etapa en orden de inicio, con ms, % del total de nivel 0, RSS y contadores."""
+        if not self.etapas:
+            return pd.DataFrame(columns=["etapa", "nivel", "ms", "% total", "rss_fin_mb", "Δ rss_mb"])
+        etapas = sorted(self.etapas, key=lambda r: r["inicio_ns"])
+        total = sum(r["dur_ns"] for r in etapas if r["nivel"] == 0) or 1
+        filas = []
+        for r in etapas:
+            fila = {"etapa": "  " * r["nivel"] + r["etapa"], "nivel": r["nivel"], "ms": round(r["dur_ns"] / 1e6, 2),
+                    "% total": round(100 * r["dur_ns"] / total, 1), "rss_fin_mb": r["rss_fin_mb"],
+                    "Δ rss_mb": (round(r["rss_fin_mb"] - r["rss_inicio_mb"], 1)
+                                 if r["rss_fin_mb"] is not None and r["rss_inicio_mb"] is not None else None)}
+            fila.update(r["contadores"])
+            filas.append(fila)
+        return pd.DataFrame(filas)
+
+    def a_json(self) -> str:
+        etapas = [{**r, "inicio_ms": round((r["inicio_ns"] - self.origen_ns) / 1e6, 3), "ms": round(r["dur_ns"] / 1e6, 3)}
+                  for r in sorted(self.etapas, key=lambda r: r["inicio_ns"])]
+        for r in etapas:
+            del r["inicio_ns"], r["dur_ns"]
+        return json.dumps({"etapas": etapas}, ensure_ascii=False, indent=1)
+
+    def a_chrome_trace(self) -> str:
+        eventos = [{"name": r["etapa"], "ph": "X", "pid": os.getpid(), "tid": 1,
+                    "ts": (r["inicio_ns"] - self.origen_ns) / 1e3, "dur": r["dur_ns"] / 1e3,
+                    "args": {**r["contadores"], "rss_inicio_mb": r["rss_inicio_mb"], "rss_fin_mb": r["rss_fin_mb"]}}
+                   for r in self.etapas]
+        return json.dumps({"traceEvents": eventos, "displayTimeUnit": "ms"}, ensure_ascii=False)
+
+
+def activo():
+    """El ``Perfil`` registrado en este contexto (o ``None``)."""
+    return _ACTUAL.get()
+
+
+def etapa(nombre, **contadores):
+    """Contexto que mide la etapa ``nombre`` (no hace nada si no hay perfil registrado)."""
+    p = _ACTUAL.get()
+    if p is None:
+        return _NULO
+    return _Etapa(p, nombre, contadores)
+
+
+def contar(nombre, valor):
+    """Agrega un contador a la etapa en curso (p. ej. filas o pares candidatos)."""
+    p = _ACTUAL.get()
+    if p is not None and p._pila:
+        p._pila[-1]["contadores"][nombre] = int(valor) if isinstance(valor, (bool, int)) or hasattr(valor, "__index__") else valor
+
+
+def activar(perfil):
+    """Registra ``perfil`` (o ``None`` para apagar) sin bloque ``with``; útil en scripts planos como la app."""
+    _ACTUAL.set(perfil)
+    return perfil
+
+
+@contextmanager
+def registrar(perfil=None):
+    """Registra ``perfil`` (uno nuevo si es ``None``) mientras dura el bloque."""
+    perfil = Perfil() if perfil is None else perfil
+    token = _ACTUAL.set(perfil)
+    try:
+        yield perfil
+    finally:
+        _ACTUAL.reset(token)
@@ -0,0 +1,195 @@
+# pruebas.py – pruebas CAAT 1–5 origen/destino
+"""Pruebas origen/destino sobre DataFrames ya normalizados (``Fecha`` como fecha).
+
+``conciliar_todo`` resuelve las pruebas 1–5 con **un solo** join sobre ``CAMPOS_ID``
+en lugar de un merge por prueba. El join y las comparaciones corren sobre claves
+enteras angostas (``caat.transacciones``): un código conjunto del ID, la fecha en días
+(o ns) y un código del monto; las filas completas se toman recién al materializar:
+
+* conciliadas   = pares con el mismo ID cuya Fecha y Monto coinciden (= inner por CAMPOS_CLAVE)
+* solo_origen   = filas de origen sin ningún par conciliado (= anti-join izquierdo por CAMPOS_CLAVE)
+* solo_destino  = ídem para destino
+* discrepancias = pares con el mismo ID y Monto o Fecha distintos
+* duplicados    = filas repetidas por CAMPOS_CLAVE dentro de cada archivo
+
+Las salidas tienen las mismas columnas que las pruebas individuales de la app, que
+usan las mismas claves por separado: ``conciliadas_por_clave``, ``sin_par`` y
+``duplicados_por_clave``.
+
+Los IDs se comparan tal como vienen, igual que ``pd.merge``: ``1`` y ``"001"`` son
+IDs distintos. Con ``ids_canonicos=True`` se comparan por ``clave_id`` (``1``, ``1.0``
+y ``"001"`` concilian); es la comparación del modo streaming (``caat.particiones``),
+donde cada bloque del mismo archivo puede leerse con otro tipo de ID.
+``recomendaciones``/``generar_conclusion_conteo`` producen los textos del resumen.
+"""
+import numpy as np
+import pandas as pd
+
+from caat.perfil import contar, etapa
+from caat.transacciones import clave_fecha, clave_id, codigos
+
+CAMPOS_CLAVE = ["ID_Transaccion", "Fecha", "Monto", "ID_Entidad"]
+CAMPOS_ID = ["ID_Transaccion", "ID_Entidad"]
+SALIDAS = ["conciliadas", "solo_origen", "solo_destino", "discrepancias", "duplicados"]
+ETIQUETAS_CONTEO = {"conciliadas": "Conciliadas", "solo_origen": "Faltantes en destino",
+                    "solo_destino": "Inesperadas en destino", "discrepancias": "Discrepancias de valor",
+                    "duplicados": "Duplicados"}
+
+
+def _ids(df1, df2, canonicos) -> tuple:
+    """``CAMPOS_ID`` de ambos lados; con ``canonicos`` como ``clave_id``, salvo las columnas enteras en los dos."""
+    if not canonicos:
+        return df1[CAMPOS_ID], df2[CAMPOS_ID]
+    a, b = {}, {}
+    for c in CAMPOS_ID:
+        if pd.api.types.is_integer_dtype(df1[c]) and pd.api.types.is_integer_dtype(df2[c]):
+            a[c], b[c] = df1[c].reset_index(drop=True), df2[c].reset_index(drop=True)
+        else:
+            a[c], b[c] = clave_id(df1[c]), clave_id(df2[c])
+    return pd.DataFrame(a), pd.DataFrame(b)
+
+
+def _claves(df1, df2, ids_canonicos=False) -> tuple:
+    """Claves enteras ``(id, fecha, monto)`` y máscaras de nulos ``(fecha, monto)`` de cada lado.
+
+    Códigos conjuntos: el mismo valor tiene la misma clave en ambos archivos y los nulos
+    son iguales entre sí, como en ``merge``/``duplicated``. Con ``ids_canonicos`` el ID
+    se compara por ``clave_id`` (un archivo con ``1`` y otro con ``"001"`` concilian).
+    """
+    id1, id2 = codigos(*_ids(df1, df2, ids_canonicos), CAMPOS_ID)
+    m1, m2 = codigos(df1, df2, ["Monto"])
+    fecha = pd.concat([df1["Fecha"], df2["Fecha"]], ignore_index=True)
+    if pd.api.types.is_datetime64_any_dtype(fecha):
+        f = clave_fecha(fecha)
+        f1, f2 = f[:len(df1)], f[len(df1):]
+    else:
+        f1, f2 = codigos(df1, df2, ["Fecha"])
+    nulos = [(df["Fecha"].isna().to_numpy(), df["Monto"].isna().to_numpy()) for df in (df1, df2)]
+    return (id1, f1, m1, *nulos[0]), (id2, f2, m2, *nulos[1])
+
+
+def _pares(df1, df2, ids_canonicos=False) -> tuple:
+    """``(claves1, claves2, fo, fd, eq, dif)``: pares de filas con el mismo ID y si concilian o difieren."""
+    k1, k2 = _claves(df1, df2, ids_canonicos)
+    (id1, f1, m1, fn1, mn1), (id2, f2, m2, fn2, mn2) = k1, k2
+    m = pd.merge(pd.DataFrame({"k": id1, "fo": np.arange(len(df1), dtype="int32")}),
+                 pd.DataFrame({"k": id2, "fd": np.arange(len(df2), dtype="int32")}), on="k", sort=False)
+    fo = m["fo"].to_numpy(dtype="int64"); fd = m["fd"].to_numpy(dtype="int64")
+    contar("pares", len(m) + int((~np.isin(id1, id2)).sum() + (~np.isin(id2, id1)).sum()))
+    # merge() empareja nulos con nulos (conciliadas = inner por CAMPOS_CLAVE), pero != los trata como distintos
+    eq = (m1[fo] == m2[fd]) & (f1[fo] == f2[fd])
+    dif = ~eq | mn1[fo] | mn2[fd] | fn1[fo] | fn2[fd]
+    return k1, k2, fo, fd, eq, dif
+
+
+def _conciliadas(df1, df2, fo, fd, eq):
+    orden = np.lexsort((fd[eq], fo[eq]))
+    return _unir(df1, df2, fo[eq][orden], fd[eq][orden], CAMPOS_CLAVE, ("_x", "_y"))
+
+
+def _sin_par(df1, df2, f):
+    # layout del merge izquierdo contra un destino vacío, sin merge: los tipos del ID pueden diferir entre archivos
+    conc = np.zeros(len(df1), dtype=bool); conc[f] = True
+    return _unir(df1[~conc], df2, np.arange(int((~conc).sum())), None, CAMPOS_CLAVE, ("_x", "_y"))
+
+
+def _repetidas(claves) -> np.ndarray:
+    return pd.DataFrame({"i": claves[0], "f": claves[1], "m": claves[2]}).duplicated(keep=False).to_numpy()
+
+
+def conciliadas_por_clave(df1: pd.DataFrame, df2: pd.DataFrame, ids_canonicos=False) -> pd.DataFrame:
+    """Prueba 1: como ``pd.merge(df1, df2, on=CAMPOS_CLAVE)``."""
+    _, _, fo, fd, eq, _ = _pares(df1, df2, ids_canonicos)
+    return _conciliadas(df1, df2, fo, fd, eq)
+
+
+def sin_par(df1: pd.DataFrame, df2: pd.DataFrame, ids_canonicos=False) -> pd.DataFrame:
+    """Pruebas 2 y 3: filas de ``df1`` sin igual por ``CAMPOS_CLAVE`` en ``df2`` (como el ``left_only`` del merge izquierdo)."""
+    _, _, fo, _, eq, _ = _pares(df1, df2, ids_canonicos)
+    return _sin_par(df1, df2, fo[eq])
+
+
+def duplicados_por_clave(df: pd.DataFrame, ids_canonicos=False) -> pd.DataFrame:
+    """Prueba 5: como ``df[df.duplicated(subset=CAMPOS_CLAVE, keep=False)]``."""
+    return df[_repetidas(_claves(df, df.iloc[:0], ids_canonicos)[0])]
+
+
+def conciliar_todo(df1: pd.DataFrame, df2: pd.DataFrame, ids_canonicos=False) -> dict:
+    """Pruebas 1–5 en una pasada. Devuelve ``{salida: DataFrame}`` (ver ``SALIDAS``).
+
+    ``ids_canonicos``: comparar los IDs por ``clave_id`` en lugar de tal como vienen.
+    """
+    with etapa("merge por ID", filas_origen=len(df1), filas_destino=len(df2)):
+        k1, k2, fo, fd, eq, dif = _pares(df1, df2, ids_canonicos)
+
+    # Filas completas solo donde hace falta (con el mismo esquema de columnas que cada merge original)
+    with etapa("materializar salidas"):
+        conciliadas = _conciliadas(df1, df2, fo, fd, eq)
+        orden = np.lexsort((fd[dif], fo[dif]))
+        discrepancias = _unir(df1, df2, fo[dif][orden], fd[dif][orden], CAMPOS_ID, ("_origen", "_destino"))
+        solo_origen = _sin_par(df1, df2, fo[eq])
+        solo_destino = _sin_par(df2, df1, fd[eq])
+
+    with etapa("duplicados"):
+        duplicados = pd.concat([df1[_repetidas(k1)].assign(_ARCHIVO="origen"),
+                                df2[_repetidas(k2)].assign(_ARCHIVO="destino")],
+                               ignore_index=True, sort=False)
+        contar("filas", len(duplicados))
+    return dict(zip(SALIDAS, [conciliadas, solo_origen, solo_destino, discrepancias, duplicados]))
+
+
+def _unir(df1, df2, fo, fd, claves, suffixes):
+    """Pares (fila origen, fila destino) con el layout de ``pd.merge(df1, df2, on=claves)``."""
+    izq = df1.iloc[fo].reset_index(drop=True)
+    # fd None: sin par (columnas de df2 en nulo, como en el merge izquierdo)
+    der = (df2.iloc[:0].drop(columns=claves).reindex(range(len(izq))) if fd is None
+           else df2.iloc[fd].drop(columns=claves).reset_index(drop=True))
+    comunes = set(izq.columns.drop(claves)) & set(der.columns)
+    izq = izq.rename(columns={c: f"{c}{suffixes[0]}" for c in comunes})
+    der = der.rename(columns={c: f"{c}{suffixes[1]}" for c in comunes})
+    return pd.concat([izq, der], axis=1)
+
+
+def conteos(resultados: dict) -> dict:
+    """Conteos con las etiquetas de ``conteo_resultados`` de la app."""
+    return {ETIQUETAS_CONTEO[k]: len(v) for k, v in resultados.items() if k in ETIQUETAS_CONTEO}
+
+
+def generar_conclusion_conteo(conteo):
+    conclusion = "🔍 **Conclusión General del Análisis**\n\nDurante la conciliación se identificaron:\n\n"
+    if conteo["Faltantes en destino"] > 0:
+        conclusion += f"- **{conteo['Faltantes en destino']}** transacciones ausentes en el destino.\n"
+    if conteo["Inesperadas en destino"] > 0:
+        conclusion += f"- **{conteo['Inesperadas en destino']}** transacciones inesperadas en el destino.\n"
+    if conteo["Discrepancias de valor"] > 0:
+        conclusion += f"- **{conteo['Discrepancias de valor']}** discrepancias en monto o fecha.\n"
+    if conteo["Duplicados"] > 0:
+        conclusion += f"- **{conteo['Duplicados']}** registros duplicados.\n"
+    if all(conteo[k] == 0 for k in ["Faltantes en destino","Inesperadas en destino","Discrepancias de valor","Duplicados"]):
+        conclusion += "- No se detectaron anomalías significativas. Conciliación correcta.\n"
+    conclusion += "\n📌 Prioriza los casos con mayor materialidad e impacto."
+    return conclusion
+
+
+def generar_recomendacion(nombre, cantidad, umbral, mensaje_ok, mensaje_alerta):
+    if cantidad > umbral:
+        return f"🔴 Riesgo alto en **{nombre}**: {mensaje_alerta}"
+    elif cantidad > 0:
+        return f"🟡 Atención en **{nombre}**: {mensaje_alerta}"
+    else:
+        return f"🟢 **{nombre}** en buen estado: {mensaje_ok}"
+
+
+def recomendaciones(conteo) -> list:
+    return [
+        generar_recomendacion("Transacciones Conciliadas", conteo["Conciliadas"], 0,
+                              "Conciliación correcta.", "Verifica registros coincidentes."),
+        generar_recomendacion("Transacciones Faltantes", conteo["Faltantes en destino"], 2,
+                              "Sin omisiones relevantes.", "Posibles errores u omisiones en registro."),
+        generar_recomendacion("Transacciones Inesperadas", conteo["Inesperadas en destino"], 2,
+                              "Sin ingresos inesperados.", "Revisar ingresos no respaldados por origen."),
+        generar_recomendacion("Discrepancias de Valor", conteo["Discrepancias de valor"], 2,
+                              "Fechas y montos alineados.", "Existen valores que no coinciden."),
+        generar_recomendacion("Duplicados Internos", conteo["Duplicados"], 2,
+                              "No hay duplicaciones.", "Registros repetidos requieren revisión.")
+    ]
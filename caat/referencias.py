@@ -0,0 +1,217 @@
+# referencias.py – match de referencias banco ↔ factura con índice de trigramas
+"""Candidatos por referencia tolerantes al formato del concepto bancario.
+
+El concepto del banco rara vez es igual al número de factura
+(``"TRANSF 001-002-000123 ACME SA"`` frente a ``001-002-000123``). Aquí:
+
+* ``clave_ref`` normaliza a mayúsculas y solo ``A-Z0-9`` (sin guiones, espacios, etc.);
+* ``tokens_concepto`` extrae del concepto el texto completo, los tokens alfanuméricos
+  con dígitos (unidos y por partes: ``001-002-000123`` → ``001002000123``, ``000123``);
+* ``IndiceReferencias`` es un índice invertido de trigramas sobre las claves de las
+  facturas. Cada token consulta solo los trigramas más raros de su prefijo (filtro de
+  prefijo para Dice ≥ umbral) y, dentro de cada lista, solo el rango de documentos con
+  largo compatible; el solapamiento exacto se verifica con búsqueda binaria. No hay
+  comparación de todos contra todos.
+
+``pares_similares`` busca en tres niveles, y cada depósito pasa al siguiente solo si
+el anterior no le encontró factura:
+
+1. token igual a la clave de la factura → similitud 1.0;
+2. mismo **núcleo** (último grupo de dígitos sin ceros a la izquierda, p. ej. ``PAGO
+   12345`` ↔ ``001-002-000012345``) → ``SIM_NUCLEO``;
+3. índice de trigramas (errores de tipeo) → Dice, como máximo ``SIM_MAX_APROXIMADA``.
+
+Los trigramas presentes en más de ``MAX_FRECUENCIA`` facturas (series y rellenos de
+ceros comunes a casi todas) no se recorren en el nivel 3: acota el costo por token a
+costa de no encontrar parecidos que solo compartan esos trigramas.
+"""
+import numpy as np
+import pandas as pd
+
+from caat.candidatos import NS_DIA, REF_VACIAS, TIPO_FILA, _a_float, _a_ns, _pares_vacios
+
+Q = 3
+N_GRAMAS = 37 ** Q
+UMBRAL_SIMILITUD = 0.8
+MIN_LARGO_TOKEN = 4
+SIM_NUCLEO = 0.9
+SIM_MAX_APROXIMADA = 0.99
+MIN_LARGO_NUCLEO = 4
+MAX_FRECUENCIA = 256
+PATRON_TOKEN = r"[A-Z0-9]+(?:[-/.][A-Z0-9]+)*"
+
+_MAPA = np.zeros(256, dtype="int64")
+_MAPA[ord("0"):ord("9") + 1] = np.arange(1, 11)
+_MAPA[ord("A"):ord("Z") + 1] = np.arange(11, 37)
+
+
+def clave_ref(valores) -> pd.Series:
+    """Referencia normalizada (``A-Z0-9``); vacía para nulos y ``REF_VACIAS``."""
+    s = pd.Series(np.asarray(valores, dtype=object)).astype(str).fillna("").str.strip().str.upper()
+    s = s.where(~s.isin(REF_VACIAS), "")
+    return s.str.replace(r"[^A-Z0-9]", "", regex=True).astype(object)
+
+
+def nucleo_ref(valores) -> pd.Series:
+    """Último grupo de dígitos sin ceros a la izquierda (vacío si tiene menos de ``MIN_LARGO_NUCLEO``)."""
+    texto = pd.Series(np.asarray(valores, dtype=object)).astype(str)
+    nucleo = texto.str.extract(r"(\d+)\D*$", expand=False).str.lstrip("0")
+    return nucleo.where(nucleo.str.len() >= MIN_LARGO_NUCLEO, "").fillna("").astype(object)
+
+
+def tokens_concepto(valores) -> pd.DataFrame:
+    """Tokens ``(fila, clave, completo)`` de cada concepto bancario, sin repetidos por fila.
+
+    ``completo`` marca el concepto entero normalizado, que solo se compara por igualdad.
+    """
+    s = pd.Series(np.asarray(valores, dtype=object)).astype(str).str.upper()
+    s = s.where(~s.str.strip().isin(REF_VACIAS), "")
+    completos = pd.DataFrame({"fila": np.arange(len(s)), "clave": clave_ref(s).to_numpy(), "completo": True})
+    hallados = s.str.findall(PATRON_TOKEN).explode().dropna()
+    partes = hallados.str.split(r"[-/.]", regex=True).explode()
+    tokens = pd.concat([hallados.str.replace(r"[-/.]", "", regex=True), partes])
+    tokens = tokens[tokens.str.len().ge(MIN_LARGO_TOKEN) & tokens.str.contains(r"\d", regex=True)]
+    tokens = pd.DataFrame({"fila": tokens.index.to_numpy(dtype="int64"), "clave": tokens.to_numpy(dtype=object),
+                           "completo": False})
+    todos = pd.concat([completos, tokens], ignore_index=True)
+    todos = todos[todos["clave"].str.len() > 0]
+    return todos[~todos.duplicated(["fila", "clave"])].reset_index(drop=True)
+
+
+def _qgramas(claves) -> tuple:
+    """``(doc, gram)`` únicos de cada clave, ordenados por (doc, gram)."""
+    claves = np.asarray(claves, dtype=object)
+    largos = np.fromiter(map(len, claves), dtype="int64", count=len(claves))
+    if not len(claves):
+        return np.array([], dtype="int64"), np.array([], dtype="int64")
+    v = _MAPA[np.frombuffer("".join(claves).encode("ascii"), dtype="uint8")]
+    n_g = np.maximum(largos - (Q - 1), 0)
+    ini = np.cumsum(largos) - largos
+    doc = np.repeat(np.arange(len(claves), dtype="int64"), n_g)
+    pos = np.repeat(ini, n_g) + np.arange(int(n_g.sum())) - np.repeat(np.cumsum(n_g) - n_g, n_g)
+    gram = sum(v[pos + k] * 37 ** (Q - 1 - k) for k in range(Q))
+    clave = np.unique(doc * N_GRAMAS + gram)
+    return clave // N_GRAMAS, clave % N_GRAMAS
+
+
+class IndiceReferencias:
+    """Índice invertido de trigramas sobre claves de referencia (ver ``clave_ref``)."""
+
+    def __init__(self, claves):
+        self.claves = np.asarray(claves, dtype=object)
+        doc, gram = _qgramas(self.claves)
+        self._doc_gram = doc * N_GRAMAS + gram                     # ordenado: pertenencia por searchsorted
+        self.n_gramas = np.bincount(doc, minlength=len(self.claves))
+        self.frecuencia = np.bincount(gram, minlength=N_GRAMAS)
+        # postings ordenados por (trigrama, nº de trigramas del documento): el filtro de largo es un rango
+        self._largo_max = int(self.n_gramas.max(initial=0)) + 1
+        clave = gram * self._largo_max + self.n_gramas[doc]
+        orden = np.argsort(clave, kind="stable")
+        self._postings, self._clave_post = doc[orden], clave[orden]
+
+    def buscar(self, claves, umbral=UMBRAL_SIMILITUD, max_frecuencia=None, max_pares_bloque=2_000_000) -> pd.DataFrame:
+        """Pares ``(i_clave, doc, sim)`` con Dice(trigramas) ≥ ``umbral``; ``i_clave`` es la posición en ``claves``.
+
+        Con ``max_frecuencia`` no se recorren las listas de trigramas más frecuentes (resultado aproximado).
+        """
+        vacio = pd.DataFrame({"i_clave": np.array([], dtype="int64"), "doc": np.array([], dtype="int64"),
+                              "sim": np.array([], dtype="float64")})
+        q_doc, q_gram = _qgramas(claves)
+        if not len(q_doc) or not len(self._postings):
+            return vacio
+        n_q = np.bincount(q_doc, minlength=len(claves))
+        ini_q = np.cumsum(n_q) - n_q
+        # prefijo: los trigramas más raros de cada token; Dice ≥ u exige compartir al menos uno
+        o = np.lexsort((q_gram, self.frecuencia[q_gram], q_doc))
+        p_doc, p_gram = q_doc[o], q_gram[o]
+        rango = np.arange(len(p_doc)) - ini_q[p_doc]
+        minimo = np.ceil(umbral * n_q / (2 - umbral) - 1e-9).astype("int64")
+        en_prefijo = rango < (n_q - minimo + 1)[p_doc]
+        if max_frecuencia is not None:
+            en_prefijo &= self.frecuencia[p_gram] <= max_frecuencia
+        p_doc, p_gram = p_doc[en_prefijo], p_gram[en_prefijo]
+        # solo documentos con u/(2-u)·|x| ≤ |y| ≤ (2-u)/u·|x| trigramas
+        n_x = n_q[p_doc]
+        largo_min = np.ceil(umbral * n_x / (2 - umbral) - 1e-9).astype("int64")
+        largo_max = np.minimum(np.floor((2 - umbral) * n_x / umbral + 1e-9).astype("int64"), self._largo_max - 1)
+        lo = np.searchsorted(self._clave_post, p_gram * self._largo_max + largo_min, side="left")
+        hi = np.searchsorted(self._clave_post, p_gram * self._largo_max + largo_max, side="right")
+        cnt = np.maximum(hi - lo, 0)
+
+        salida = []
+        acum = np.cumsum(cnt)
+        inicio = 0
+        while inicio < len(p_doc):
+            base = acum[inicio - 1] if inicio else 0
+            fin = int(np.searchsorted(acum, base + max_pares_bloque, side="right"))
+            fin = max(fin, inicio + 1)
+            while fin < len(p_doc) and p_doc[fin] == p_doc[fin - 1]:       # bloques con tokens completos
+                fin += 1
+            c = cnt[inicio:fin]
+            total = int(c.sum())
+            if total:
+                tok = np.repeat(p_doc[inicio:fin], c)
+                desp = np.arange(total) - np.repeat(np.cumsum(c) - c, c)
+                doc = self._postings[np.repeat(lo[inicio:fin], c) + desp]
+                par = np.unique(tok * len(self.claves) + doc)
+                tok, doc = par // len(self.claves), par % len(self.claves)
+                n_x, n_y = n_q[tok], self.n_gramas[doc]
+                # verificación exacta: cuántos trigramas del token tiene cada documento candidato
+                id_par = np.repeat(np.arange(len(tok)), n_x)
+                g = q_gram[np.repeat(ini_q[tok], n_x) + np.arange(int(n_x.sum())) - np.repeat(np.cumsum(n_x) - n_x, n_x)]
+                buscada = doc[id_par] * N_GRAMAS + g
+                pos = np.minimum(np.searchsorted(self._doc_gram, buscada), len(self._doc_gram) - 1)
+                comunes = np.bincount(id_par, weights=self._doc_gram[pos] == buscada, minlength=len(tok))
+                sim = 2 * comunes / (n_x + n_y)
+                ok = sim >= umbral - 1e-12
+                salida.append((tok[ok], doc[ok], sim[ok]))
+            inicio = fin
+        if not salida:
+            return vacio
+        tok, doc, sim = (np.concatenate(x) for x in zip(*salida))
+        return pd.DataFrame({"i_clave": tok, "doc": doc, "sim": sim})
+
+
+def pares_similares(ref_cxc, ref_banco, umbral=UMBRAL_SIMILITUD, max_frecuencia=MAX_FRECUENCIA) -> pd.DataFrame:
+    """``(i_cxc, i_banco, _SIM)``: mejor similitud entre la factura y algún token del concepto."""
+    claves = clave_ref(ref_cxc)
+    facturas = pd.DataFrame({"i_cxc": np.flatnonzero(claves.str.len().to_numpy() > 0)})
+    facturas["clave"] = claves.to_numpy()[facturas["i_cxc"].to_numpy()]
+    ref_cxc = np.asarray(ref_cxc, dtype=object)
+    tokens = tokens_concepto(ref_banco).rename(columns={"fila": "i_banco"})
+
+    partes = [tokens.merge(facturas, on="clave")[["i_cxc", "i_banco"]].assign(_SIM=1.0)]
+    pendientes = tokens[~tokens["i_banco"].isin(partes[0]["i_banco"])]
+    if umbral <= SIM_NUCLEO and len(pendientes):
+        facturas["nucleo"] = nucleo_ref(ref_cxc[facturas["i_cxc"].to_numpy()]).to_numpy()
+        con_nucleo = pendientes.assign(nucleo=nucleo_ref(pendientes["clave"]).to_numpy())
+        por_nucleo = con_nucleo[con_nucleo["nucleo"].str.len() > 0].merge(facturas[facturas["nucleo"].str.len() > 0], on="nucleo")
+        partes.append(por_nucleo[["i_cxc", "i_banco"]].assign(_SIM=SIM_NUCLEO))
+        pendientes = pendientes[~pendientes["i_banco"].isin(por_nucleo["i_banco"])]
+    pendientes = pendientes[~pendientes["completo"]]
+    if umbral < 1 and len(pendientes):
+        # índice de trigramas: una consulta por token distinto
+        unicos, inversa = np.unique(pendientes["clave"].to_numpy(dtype=str), return_inverse=True)
+        claves_unicas = facturas["clave"].drop_duplicates().to_numpy()
+        hallados = IndiceReferencias(claves_unicas).buscar(unicos.astype(object), umbral, max_frecuencia)
+        hallados = hallados.assign(clave=claves_unicas[hallados["doc"].to_numpy()]).merge(facturas[["i_cxc", "clave"]], on="clave")
+        por_token = pd.DataFrame({"i_clave": inversa, "i_banco": pendientes["i_banco"].to_numpy()})
+        aprox = por_token.merge(hallados[["i_clave", "i_cxc", "sim"]], on="i_clave")
+        partes.append(pd.DataFrame({"i_cxc": aprox["i_cxc"], "i_banco": aprox["i_banco"],
+                                    "_SIM": np.minimum(aprox["sim"].to_numpy(), SIM_MAX_APROXIMADA)}))
+    pares = pd.concat(partes, ignore_index=True)
+    return pares.groupby(["i_cxc", "i_banco"], as_index=False, sort=True)["_SIM"].max()
+
+
+def candidatos_referencia_difusa(ref_cxc, ref_banco, monto_cxc, monto_banco, fecha_cxc, fecha_banco, tol_monto,
+                                 umbral=UMBRAL_SIMILITUD) -> pd.DataFrame:
+    """Pares con referencia similar (``pares_similares``) y |monto_cxc - monto_banco| ≤ tol_monto; agrega ``_SIM``."""
+    pares = pares_similares(ref_cxc, ref_banco, umbral)
+    if pares.empty:
+        return _pares_vacios().assign(_SIM=np.array([], dtype="float64"))
+    ia, ib = pares["i_cxc"].to_numpy(dtype="int64"), pares["i_banco"].to_numpy(dtype="int64")
+    dm = np.abs(_a_float(monto_cxc)[ia] - _a_float(monto_banco)[ib])
+    dd = np.abs(_a_ns(fecha_cxc)[ia] - _a_ns(fecha_banco)[ib]) // NS_DIA
+    ok = dm <= float(tol_monto)
+    return pd.DataFrame({"i_cxc": ia[ok].astype(TIPO_FILA), "i_banco": ib[ok].astype(TIPO_FILA),
+                         "_DIF_MONTO": dm[ok], "_DIF_DIAS": dd[ok], "_SIM": pares["_SIM"].to_numpy()[ok]})
@@ -0,0 +1,255 @@
+# trabajos.py – cola de trabajos en segundo plano para la prueba 6 (CxC vs Bancos)
+"""Conciliaciones largas fuera del hilo del script de Streamlit.
+
+``enviar`` copia los archivos a ``<directorio>/<id>/`` y entrega el trabajo a un pool
+de procesos compartido por todas las sesiones del servidor; el script sigue
+respondiendo y varios analistas pueden encolar trabajos a la vez. Todo el estado vive
+en disco, así que cualquier sesión (o un servidor reiniciado) puede consultarlo:
+
+* ``estado.json`` – estado (``en_cola``, ``ejecutando``, ``terminado``, ``error``,
+  ``cancelado``, ``interrumpido``), avance 0–1, etapa en curso y contadores (filas
+  leídas, pares candidatos, enlaces, % de CxC conciliado); se reescribe de forma
+  atómica al terminar cada etapa (``Perfil.observador``, ver ``caat.perfil``);
+* ``resultado.pkl`` – las tablas de ``conciliar_cxc_bancos``;
+* ``traza.json`` – tiempos por etapa (Chrome trace);
+* ``cancelar`` – marca de cancelación.
+
+La cancelación es cooperativa: un trabajo en cola no llega a ejecutarse y uno en
+ejecución se detiene al terminar la etapa en curso. Un trabajo cuyo proceso ya no
+existe (servidor reiniciado, proceso terminado) se informa como ``interrumpido``.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from caat import cxc_bancos
+from caat.consolidacion import MONEDA_BASE, cuenta_de_archivo
+from caat.motor import leer_archivo, leer_bancos
+from caat.perfil import Perfil, registrar
+
+DIRECTORIO = os.environ.get("CAAT_TRABAJOS") or os.path.join(tempfile.gettempdir(), "caat_trabajos")
+TRABAJADORES = int(os.environ.get("CAAT_TRABAJADORES") or max(1, (os.cpu_count() or 1) // 2))
+ESTADOS_FINALES = ("terminado", "error", "cancelado", "interrumpido")
+# avance al terminar cada etapa de la prueba 6 (las etapas "leer …" suman por archivo; la
+# primera es la CxC, la segunda los extractos y las demás, como la tabla de tasas, solo suman filas)
+AVANCE_ETAPAS = {"normalizar": 0.2, "compensar NC/retenciones": 0.25, "candidatos referencia": 0.35, "candidatos monto/fecha": 0.5,
+                 "asignación uno a uno": 0.7, "candidatos y asignación (paralelo)": 0.7, "pagos parciales": 0.8,
+                 "emparejar": 0.85, "resultados": 0.95}
+
+_POOL = None
+_FUTUROS = {}           # id → Future de los trabajos enviados por este proceso
+_CANDADO = threading.Lock()
+
+
+class Cancelado(Exception):
+    """El trabajo se canceló mientras corría."""
+
+
+def _ruta(id_trabajo, directorio=None, archivo=""):
+    return os.path.join(directorio or DIRECTORIO, id_trabajo, archivo)
+
+
+def _guardar(ruta, datos):
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, default=str)
+    os.replace(tmp, ruta)
+
+
+def _vivo(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
+
+
+def _pool():
+    global _POOL
+    with _CANDADO:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=TRABAJADORES)
+        return _POOL
+
+
+def _copiar(archivo, destino):
+    """Ruta o archivo subido (``name`` + ``getvalue``/``read``) → ``destino``."""
+    if isinstance(archivo, (str, os.PathLike)):
+        shutil.copyfile(archivo, destino)
+        return
+    archivo.seek(0)
+    with open(destino, "wb") as f:
+        f.write(archivo.getvalue() if hasattr(archivo, "getvalue") else archivo.read())
+    archivo.seek(0)
+
+
+def _nombre(archivo) -> str:
+    return os.path.basename(str(archivo) if isinstance(archivo, (str, os.PathLike)) else archivo.name)
+
+
+def enviar(cxc, banco, parametros=None, hojas=(0, 0), etiqueta="", directorio=None,
+           tasas=None, moneda_base=MONEDA_BASE, monedas=None) -> str:
+    """Encola la prueba 6 sobre ``cxc`` y ``banco`` (rutas o archivos subidos) y devuelve el id del trabajo.
+
+    ``parametros`` son los de ``cxc_bancos.PARAMETROS`` (deben ser serializables a JSON);
+    ``hojas`` las hojas de Excel de cada archivo; ``etiqueta`` identifica al analista o la corrida.
+    ``banco`` puede ser una lista de extractos: se consolidan por cuenta con la tabla ``tasas``,
+    ``moneda_base`` y ``monedas`` (``{cuenta: moneda}``), ver ``caat.consolidacion``.
+    """
+    directorio = directorio or DIRECTORIO
+    id_trabajo = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    os.makedirs(_ruta(id_trabajo, directorio, "entrada"))
+    entradas = {}
+    for lado, archivo in (("cxc", cxc), ("banco", banco), ("tasas", tasas)):
+        if archivo is None or isinstance(archivo, list):
+            continue
+        entradas[lado] = _nombre(archivo)
+        _copiar(archivo, _ruta(id_trabajo, directorio, os.path.join("entrada", f"{lado}_{entradas[lado]}")))
+    bancos = []
+    if isinstance(banco, list):
+        # "banco" queda como texto para mostrar; cada extracto se guarda con su posición
+        bancos = [_nombre(b) for b in banco]
+        entradas["banco"] = ", ".join(bancos)
+        for i, (b, nombre) in enumerate(zip(banco, bancos)):
+            _copiar(b, _ruta(id_trabajo, directorio, os.path.join("entrada", f"banco{i}_{nombre}")))
+    _guardar(_ruta(id_trabajo, directorio, "estado.json"),
+             {"id": id_trabajo, "estado": "en_cola", "etiqueta": etiqueta, "creado": time.time(),
+              "archivos": entradas, "bancos": bancos, "hojas": list(hojas), "parametros": parametros or {},
+              "moneda_base": moneda_base, "monedas": monedas or {},
+              "pid_servidor": os.getpid(), "avance": 0.0, "etapa": "", "contadores": {}})
+    _FUTUROS[id_trabajo] = _pool().submit(_ejecutar, id_trabajo, directorio)
+    return id_trabajo
+
+
+def estado(id_trabajo, directorio=None) -> dict:
+    """Estado del trabajo leído del disco (``interrumpido`` si su proceso ya no existe)."""
+    with open(_ruta(id_trabajo, directorio, "estado.json"), encoding="utf-8") as f:
+        e = json.load(f)
+    if e["estado"] == "en_cola" and not _vivo(e.get("pid_servidor")) \
+            or e["estado"] == "ejecutando" and not _vivo(e.get("pid")):
+        e["estado"] = "interrumpido"
+    if e["estado"] not in ESTADOS_FINALES and os.path.exists(_ruta(id_trabajo, directorio, "cancelar")):
+        e["cancelacion_pedida"] = True
+    return e
+
+
+def listar(directorio=None, limite=50) -> list:
+    """Estados de los trabajos del directorio, del más reciente al más antiguo."""
+    directorio = directorio or DIRECTORIO
+    if not os.path.isdir(directorio):
+        return []
+    ids = sorted((d for d in os.listdir(directorio) if os.path.exists(_ruta(d, directorio, "estado.json"))),
+                 reverse=True)
+    trabajos = []
+    for d in ids[:limite]:
+        try:
+            trabajos.append(estado(d, directorio))
+        except (OSError, ValueError):       # estado a medio escribir por otro proceso
+            continue
+    return trabajos
+
+
+def cancelar(id_trabajo, directorio=None) -> bool:
+    """Pide la cancelación; devuelve ``False`` si el trabajo ya había terminado."""
+    if estado(id_trabajo, directorio)["estado"] in ESTADOS_FINALES:
+        return False
+    open(_ruta(id_trabajo, directorio, "cancelar"), "w").close()
+    futuro = _FUTUROS.get(id_trabajo)
+    if futuro is not None and futuro.cancel():          # aún en cola: no llega a ejecutarse
+        e = estado(id_trabajo, directorio)
+        _guardar(_ruta(id_trabajo, directorio, "estado.json"), {**e, "estado": "cancelado", "fin": time.time()})
+    return True
+
+
+def resultado(id_trabajo, directorio=None) -> dict:
+    """Tablas de un trabajo terminado (las de ``conciliar_cxc_bancos``)."""
+    e = estado(id_trabajo, directorio)
+    if e["estado"] != "terminado":
+        raise ValueError(f"El trabajo {id_trabajo} no terminó (estado: {e['estado']})")
+    return pd.read_pickle(_ruta(id_trabajo, directorio, "resultado.pkl"))
+
+
+def limpiar(directorio=None, dias=7) -> int:
+    """Borra los trabajos finalizados hace más de ``dias`` días; devuelve cuántos."""
+    limite, borrados = time.time() - dias * 86400, 0
+    for e in listar(directorio, limite=None):
+        if e["estado"] in ESTADOS_FINALES and (e.get("fin") or e["creado"]) < limite:
+            shutil.rmtree(_ruta(e["id"], directorio), ignore_errors=True)
+            borrados += 1
+    return borrados
+
+
+class _Avance:
+    """Observador de etapas: acumula contadores y reescribe ``estado.json``."""
+
+    def __init__(self, ruta_estado, ruta_cancelar, e):
+        self.ruta_estado, self.ruta_cancelar, self.e = ruta_estado, ruta_cancelar, e
+
+    def publicar(self, **cambios):
+        self.e.update(cambios)
+        _guardar(self.ruta_estado, self.e)
+
+    def __call__(self, r):
+        c, nombre = self.e["contadores"], r["etapa"]
+        if nombre.startswith("leer "):
+            c["filas_leidas"] = c.get("filas_leidas", 0) + r["contadores"].get("filas", 0)
+            avance = 0.05 * (1 + ("filas_cxc" in c))
+            c.setdefault("filas_cxc" if "filas_cxc" not in c else "filas_banco", r["contadores"].get("filas", 0))
+        else:
+            avance = AVANCE_ETAPAS.get(nombre, self.e["avance"])
+        if nombre.startswith("candidatos"):
+            c["candidatos"] = c.get("candidatos", 0) + r["contadores"].get("pares", 0)
+        if "enlaces" in r["contadores"]:
+            c["enlaces"] = r["contadores"]["enlaces"]
+            if c.get("filas_cxc"):
+                c["conciliado_pct"] = round(min(100.0, 100 * c["enlaces"] / c["filas_cxc"]), 1)
+        self.publicar(avance=max(avance, self.e["avance"]), etapa=nombre)
+        if os.path.exists(self.ruta_cancelar):
+            raise Cancelado(nombre)
+
+
+def _ejecutar(id_trabajo, directorio):
+    # en el proceso de trabajo
+    ruta_estado, ruta_cancelar = _ruta(id_trabajo, directorio, "estado.json"), _ruta(id_trabajo, directorio, "cancelar")
+    with open(ruta_estado, encoding="utf-8") as f:
+        e = json.load(f)
+    avance = _Avance(ruta_estado, ruta_cancelar, e)
+    if os.path.exists(ruta_cancelar):
+        return avance.publicar(estado="cancelado", fin=time.time())
+    avance.publicar(estado="ejecutando", pid=os.getpid(), inicio=time.time())
+    perfil = Perfil(observador=avance)
+    try:
+        with registrar(perfil):
+            entrada = _ruta(id_trabajo, directorio, "entrada")
+            cxc = leer_archivo(os.path.join(entrada, f"cxc_{e['archivos']['cxc']}"), e["hojas"][0])
+            cxc = cxc.rename(columns=lambda x: str(x).strip())
+            tasas = os.path.join(entrada, f"tasas_{e['archivos']['tasas']}") if "tasas" in e["archivos"] else None
+            if e.get("bancos") or tasas:
+                bancos = e.get("bancos") or [e["archivos"]["banco"]]
+                rutas = ([os.path.join(entrada, f"banco{i}_{b}") for i, b in enumerate(bancos)] if e.get("bancos")
+                         else [os.path.join(entrada, f"banco_{bancos[0]}")])
+                banco = leer_bancos(rutas, tasas, e.get("moneda_base") or MONEDA_BASE, e.get("monedas"),
+                                    [cuenta_de_archivo(b) for b in bancos])
+            else:
+                banco = leer_archivo(os.path.join(entrada, f"banco_{e['archivos']['banco']}"), e["hojas"][1])
+                banco = banco.rename(columns=lambda x: str(x).strip())
+            res = cxc_bancos.conciliar_cxc_bancos(cxc, banco, **e["parametros"])
+        pd.to_pickle(res, _ruta(id_trabajo, directorio, "resultado.pkl"))
+        metricas = cxc_bancos.metricas(res)
+        if e["contadores"].get("filas_cxc"):
+            e["contadores"]["conciliado_pct"] = round(100 * (1 - metricas["Pendientes CxC"] / e["contadores"]["filas_cxc"]), 1)
+        avance.publicar(estado="terminado", avance=1.0, etapa="", metricas=metricas, fin=time.time())
+    except Cancelado:
+        avance.publicar(estado="cancelado", fin=time.time())
+    except Exception as ex:             # el error queda en el estado; el pool sigue atendiendo otros trabajos
+        avance.publicar(estado="error", error=f"{type(ex).__name__}: {ex}", fin=time.time())
+    finally:
+        with open(_ruta(id_trabajo, directorio, "traza.json"), "w", encoding="utf-8") as f:
+            f.write(perfil.a_chrome_trace())
@@ -0,0 +1,142 @@
+# transacciones.py – tabla canónica compacta: centavos int64, días int32, textos categóricos
+"""Representación canónica de transacciones para las pruebas.
+
+Una fuente normalizada se guarda como ``Transacciones``:
+
+* ``nucleo`` – una fila por transacción válida con columnas angostas: ``_FILA`` (int32,
+  posición en el archivo leído), ``_CENT`` (int64, centavos), ``_DIA`` (int32, días desde
+  1970-01-01) y los textos de cruce (``_CLI``, ``_REF``, ``_OBS``) como ``category``;
+  opcionales ``_DIA_VENCE`` (int32), ``_PLAZO`` (float32) y ``_CENT_NC`` (int64, NC y
+  retenciones aplicadas a la factura, ver ``caat.notas_credito``);
+* ``carga``  – el DataFrame leído, intacto, solo para mostrar: no se copia ni se le
+  agregan columnas y se une por ``_FILA`` recién al materializar las filas de salida.
+
+``t["_MONTO"]`` y ``t["_FECHA"]`` se derivan al vuelo de ``_CENT`` y ``_DIA`` (no ocupan
+memoria). ``materializar`` devuelve el layout histórico de las tablas de hallazgos
+(columnas originales + ``_FECHA``, ``_CENT``, ``_MONTO``, ``_COMPENSADO``, ``_REF``,
+``_CLI``, ``_OBS``, ``_VENCE``, ``_PLAZO``, ``_FILA``).
+
+Para las pruebas 1–5, ``codigos`` y ``clave_fecha`` dan claves enteras angostas
+(código de ID conjunto, días o ns) sobre las que se hacen los joins; con
+``ids_canonicos`` (modo streaming) los IDs se comparan por ``clave_id`` (``1``, ``1.0``
+y ``"001"`` son el mismo ID).
+"""
+import numpy as np
+import pandas as pd
+
+from caat.normalizacion import a_dias
+
+SIN_DIA = np.iinfo("int32").min
+NS_DIA = 86_400 * 10**9
+# columnas del núcleo → columna decodificada en ``materializar`` (en este orden)
+DECODIFICADAS = ["_FECHA", "_CENT", "_MONTO", "_COMPENSADO", "_REF", "_CLI", "_OBS", "_VENCE", "_PLAZO", "_FILA"]
+
+
+def dias(fechas) -> np.ndarray:
+    """Fechas → int32 días (``SIN_DIA`` si es nula)."""
+    return a_dias(pd.Series(fechas))
+
+
+def fechas(dias_) -> pd.Series:
+    """int32 días → ``datetime64[ns]`` (``NaT`` en ``SIN_DIA``)."""
+    d = np.asarray(dias_, dtype="int64")
+    return pd.Series(np.where(d == SIN_DIA, np.datetime64("NaT"), d.astype("datetime64[D]")).astype("datetime64[ns]"))
+
+
+def categoria(textos) -> pd.Series:
+    """Textos como ``category`` (diccionario + códigos int8/16/32)."""
+    return pd.Series(textos).astype("category").reset_index(drop=True)
+
+
+def clave_id(s) -> pd.Series:
+    """ID como texto canónico (``string``): enteros sin decimales ni ceros a la izquierda, el resto sin espacios."""
+    s = pd.Series(s).reset_index(drop=True)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # una vez por categoría; los códigos reparten el resultado (-1 → nulo)
+        cats = clave_id(pd.Series(s.cat.categories)).to_numpy(dtype=object, na_value=None)
+        return pd.Series(np.append(cats, None)[s.cat.codes.to_numpy()], dtype="string")
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        t = s.astype("string").str.strip()
+        return t.str.replace(r"^0*(\d+)(?:\.0+)?$", r"\1", regex=True)
+    if pd.api.types.is_integer_dtype(s):
+        return s.astype("Int64").astype("string")
+    f = s.astype("float64")
+    entero = (f == np.floor(f)) & (f.abs() < 2**53)
+    return f.where(entero).astype("Int64").astype("string").fillna(f.astype("string"))
+
+
+def ids(df, columnas) -> pd.DataFrame:
+    """``columnas`` de ``df`` como ``clave_id``."""
+    return pd.DataFrame({c: clave_id(df[c]) for c in columnas})
+
+
+def codigos(df1, df2, columnas) -> tuple:
+    """Código entero conjunto de ``columnas`` en ambos DataFrames (nulos iguales entre sí, como en ``merge``)."""
+    claves = pd.concat([df1[columnas], df2[columnas]], ignore_index=True)
+    c = claves.groupby(columnas, sort=False, dropna=False).ngroup().to_numpy()
+    c = c.astype("int32" if len(c) == 0 or c.max() < np.iinfo("int32").max else "int64")
+    return c[:len(df1)], c[len(df1):]
+
+
+def clave_fecha(s) -> np.ndarray:
+    """Fecha como entero: int32 días si todas caen a medianoche, si no int64 ns (``SIN_DIA`` / mínimo si es nula)."""
+    ns = pd.Series(s).to_numpy(dtype="datetime64[ns]").view("int64")
+    nulo = ns == np.iinfo("int64").min
+    if (ns[~nulo] % NS_DIA == 0).all():
+        return np.where(nulo, SIN_DIA, ns // NS_DIA).astype("int32")
+    return ns
+
+
+class Transacciones:
+    """Núcleo angosto + carga original unidos por ``_FILA`` (ver módulo)."""
+
+    __slots__ = ("nucleo", "carga")
+
+    def __init__(self, nucleo: pd.DataFrame, carga: pd.DataFrame):
+        self.nucleo, self.carga = nucleo, carga
+
+    def __len__(self):
+        return len(self.nucleo)
+
+    @property
+    def columns(self):
+        return self.nucleo.columns
+
+    def __getitem__(self, columna):
+        if columna == "_MONTO":
+            return pd.Series(self.nucleo["_CENT"].to_numpy() / 100)
+        if columna == "_FECHA":
+            return fechas(self.nucleo["_DIA"].to_numpy())
+        return self.nucleo[columna]
+
+    def copy(self, deep=False):
+        return Transacciones(self.nucleo.copy(deep=deep), self.carga)
+
+    def filas(self, posiciones) -> "Transacciones":
+        """Subconjunto del núcleo por posición (renumerado desde 0); la carga se comparte."""
+        return Transacciones(self.nucleo.iloc[np.asarray(posiciones)].reset_index(drop=True), self.carga)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes del núcleo (la carga es el archivo leído y se comparte con la caché de lectura)."""
+        return int(self.nucleo.memory_usage(index=True, deep=True).sum())
+
+    def materializar(self, posiciones=None) -> pd.DataFrame:
+        """Filas ``posiciones`` (del núcleo; todas si es ``None``) con columnas originales y decodificadas."""
+        n = self.nucleo if posiciones is None else self.nucleo.iloc[np.asarray(posiciones)]
+        out = self.carga.iloc[n["_FILA"].to_numpy()].reset_index(drop=True)
+        n = n.reset_index(drop=True)
+        decod = {"_FECHA": fechas(n["_DIA"].to_numpy()), "_CENT": n["_CENT"].astype("Int64"),
+                 "_MONTO": n["_CENT"].to_numpy() / 100}
+        if "_CENT_NC" in n.columns:
+            decod["_COMPENSADO"] = n["_CENT_NC"].to_numpy() / 100
+        for c in ("_REF", "_CLI", "_OBS"):
+            if c in n.columns:
+                decod[c] = n[c].astype(n[c].cat.categories.dtype)
+        if "_DIA_VENCE" in n.columns:
+            decod["_VENCE"] = fechas(n["_DIA_VENCE"].to_numpy())
+        if "_PLAZO" in n.columns:
+            decod["_PLAZO"] = n["_PLAZO"].astype("float64")
+        decod["_FILA"] = n["_FILA"]
+        extra = pd.DataFrame({c: decod[c] for c in DECODIFICADAS if c in decod})
+        return pd.concat([out.drop(columns=[c for c in extra.columns if c in out.columns]), extra], axis=1)
@@ -0,0 +1,128 @@
+# visor.py – páginas ordenadas, filtradas y con búsqueda sobre tablas de resultados
+"""Visor paginado del lado del servidor.
+
+La app no envía la tabla completa al navegador: ``Visor`` resuelve orden, filtro y
+búsqueda como vectores de posiciones y solo la página visible se convierte a Arrow
+(``pyarrow.Table``, que ``st.dataframe`` acepta sin reconvertir). Cada paso se guarda
+en una caché (``caat.cache``) bajo la ``clave`` estable de la tabla, de modo que
+cambiar de página no vuelve a ordenar ni a buscar, y un rerun con la misma consulta
+devuelve la misma página ya convertida.
+
+* orden: ``argsort`` estable por una columna (nulos al final);
+* filtro: ``{columna: texto}`` (contiene, sin distinguir mayúsculas) o
+  ``{columna: (desde, hasta)}`` para números y fechas;
+* búsqueda: texto en cualquier columna.
+"""
+import numpy as np
+import pandas as pd
+
+from caat.ingesta import HAY_PYARROW
+
+FILAS_POR_PAGINA = 50
+
+
+def _texto(s: pd.Series) -> pd.Series:
+    return s.astype("string")
+
+
+def interpretar_filtro(df, columna, texto):
+    """Texto de la interfaz → valor de filtro: ``"100..500"``, ``"..500"`` o ``"2024-01-01.."`` son
+    rangos en columnas numéricas o de fecha; cualquier otro texto es "contiene"."""
+    texto = (texto or "").strip()
+    s = df[columna]
+    es_rango = ".." in texto and (pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s))
+    if not es_rango:
+        return texto
+    convertir = pd.Timestamp if pd.api.types.is_datetime64_any_dtype(s) else float
+    try:
+        return tuple(convertir(x.strip()) if x.strip() else None for x in texto.split("..", 1))
+    except ValueError:
+        return texto
+
+
+def mascara_filtro(df, columna, valor) -> np.ndarray:
+    """Filas de ``df`` que cumplen el filtro de ``columna`` (ver módulo)."""
+    s = df[columna]
+    if isinstance(valor, tuple):
+        desde, hasta = valor
+        ok = s.notna().to_numpy()
+        if desde is not None:
+            ok = ok & (s >= desde).fillna(False).to_numpy(dtype=bool)
+        if hasta is not None:
+            ok = ok & (s <= hasta).fillna(False).to_numpy(dtype=bool)
+        return ok
+    return _texto(s).str.contains(str(valor), case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+
+
+def mascara_busqueda(df, texto) -> np.ndarray:
+    """Filas donde alguna columna contiene ``texto`` (sin distinguir mayúsculas)."""
+    ok = np.zeros(len(df), dtype=bool)
+    for c in df.columns:
+        ok |= _texto(df[c]).str.contains(texto, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+    return ok
+
+
+def permutacion(df, columna, ascendente=True) -> np.ndarray:
+    """Posiciones de ``df`` ordenadas por ``columna`` (estable, nulos al final)."""
+    s = df[columna].reset_index(drop=True)
+    try:
+        return s.sort_values(kind="stable", ascending=ascendente, na_position="last").index.to_numpy()
+    except TypeError:                       # columnas object con tipos mezclados: orden como texto
+        return _texto(s).sort_values(kind="stable", ascending=ascendente, na_position="last").index.to_numpy()
+
+
+class Visor:
+    """Páginas de ``df`` para una consulta (orden, filtros, búsqueda).
+
+    ``clave`` identifica el contenido de ``df`` (p. ej. la clave de caché del resultado);
+    ``cache`` es un ``CacheLRU`` o cualquier objeto con ``obtener(clave, calcular)``.
+    """
+
+    def __init__(self, df, clave, cache=None):
+        self.df, self.clave = df, clave
+        self.cache = cache
+
+    def _obtener(self, sub, calcular):
+        if self.cache is None:
+            return calcular()
+        return self.cache.obtener((self.clave,) + sub, calcular)
+
+    def filas(self, orden=None, ascendente=True, filtros=None, busqueda="") -> np.ndarray:
+        """Posiciones de las filas visibles en el orden pedido."""
+        filtros = {c: v for c, v in (filtros or {}).items() if c in self.df.columns and v not in ("", None, (None, None))}
+        busqueda = (busqueda or "").strip()
+        consulta = (orden, ascendente, tuple(sorted(filtros.items(), key=lambda x: x[0])), busqueda)
+        return self._obtener(("filas",) + consulta, lambda: self._filas(orden, ascendente, filtros, busqueda))
+
+    def _filas(self, orden, ascendente, filtros, busqueda):
+        ok = np.ones(len(self.df), dtype=bool)
+        for c, v in sorted(filtros.items(), key=lambda x: x[0]):
+            ok &= self._obtener(("filtro", c, v), lambda: mascara_filtro(self.df, c, v))
+        if busqueda:
+            ok &= self._obtener(("busqueda", busqueda), lambda: mascara_busqueda(self.df, busqueda))
+        if orden in self.df.columns:
+            pos = self._obtener(("orden", orden, ascendente), lambda: permutacion(self.df, orden, ascendente))
+            return pos[ok[pos]]
+        return np.flatnonzero(ok)
+
+    def pagina(self, numero=1, tamano=FILAS_POR_PAGINA, **consulta) -> tuple:
+        """``(pagina, total)``: DataFrame de la página ``numero`` (desde 1) y filas que cumplen la consulta."""
+        pos = self.filas(**consulta)
+        inicio = (max(1, int(numero)) - 1) * tamano
+        return self.df.iloc[pos[inicio:inicio + tamano]], len(pos)
+
+    def pagina_arrow(self, numero=1, tamano=FILAS_POR_PAGINA, **consulta) -> tuple:
+        """Como ``pagina`` pero la página ya convertida a ``pyarrow.Table`` (DataFrame si no hay pyarrow)."""
+        clave = ("arrow", int(numero), int(tamano), repr(sorted(consulta.items())))
+        return self._obtener(clave, lambda: self._arrow(*self.pagina(numero, tamano, **consulta)))
+
+    @staticmethod
+    def _arrow(df, total):
+        if not HAY_PYARROW:
+            return df, total
+        import pyarrow as pa
+        try:
+            return pa.Table.from_pandas(df, preserve_index=False), total
+        except (pa.ArrowInvalid, pa.ArrowTypeError):     # columnas object con tipos mezclados
+            return pa.Table.from_pandas(df.astype({c: "string" for c in df.columns[df.dtypes == object]}),
+                                        preserve_index=False), total
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat.aging import POR_VENCER, agregar_aging, etiquetas_aging, fecha_base, tramos_aging
+from caat.cxc_bancos import recomendaciones
+
+HOY = pd.Timestamp("2024-12-31")
+
+
+def test_etiquetas():
+    assert etiquetas_aging() == [POR_VENCER, "0-30", "31-60", "61-90", "90+"]
+    assert etiquetas_aging([90, 60, 60]) == [POR_VENCER, "0-60", "61-90", "90+"]
+    assert etiquetas_aging([]) == etiquetas_aging()
+
+
+def test_limites_de_tramo_y_por_vencer():
+    dias = [-5, -1, 0, 30, 31, 60, 61, 90, 91, 400]
+    fechas = pd.Series(HOY - pd.to_timedelta(dias, unit="D"))
+    d, tramo = tramos_aging(fechas, HOY)
+    assert d.tolist() == dias
+    assert list(tramo) == [POR_VENCER, POR_VENCER, "0-30", "0-30", "31-60", "31-60", "61-90", "61-90", "90+", "90+"]
+    assert tramo.ordered and list(tramo.categories) == etiquetas_aging()
+
+
+def test_fecha_nula_sin_tramo():
+    d, tramo = tramos_aging(pd.Series([HOY, pd.NaT]), HOY, [15])
+    assert d.tolist() == [0, pd.NA]
+    assert list(tramo.codes) == [1, -1]
+
+
+def test_fecha_base_por_vencimiento():
+    df = pd.DataFrame({"_FECHA": pd.to_datetime(["2024-01-01"] * 3),
+                       "_VENCE": pd.to_datetime(["2024-03-01", None, None]),
+                       "_PLAZO": [np.nan, 30.0, np.nan]})
+    assert fecha_base(df, "emision").equals(df["_FECHA"])
+    assert fecha_base(df, "vencimiento", plazo_dias=10).tolist() == list(pd.to_datetime(
+        ["2024-03-01", "2024-01-31", "2024-01-11"]))
+    assert fecha_base(df[["_FECHA"]], "vencimiento", 45).tolist() == [pd.Timestamp("2024-02-15")] * 3
+    with pytest.raises(ValueError):
+        fecha_base(df, "pago")
+
+
+def test_agregar_por_cliente_y_tramo():
+    fechas = pd.Series(HOY - pd.to_timedelta([5, 40, 45, 100, -3, 10], unit="D"))
+    _, tramo = tramos_aging(fechas, HOY)
+    clientes = ["B", "A", "A", "B", "A", None]
+    montos = [10.0, 20.0, 30.0, 40.0, 5.0, 99.0]
+    por_cliente, por_tramo = agregar_aging(clientes, tramo, montos)
+    assert por_cliente.values.tolist() == [["A", POR_VENCER, 1, 5.0], ["A", "31-60", 2, 50.0],
+                                           ["B", "0-30", 1, 10.0], ["B", "90+", 1, 40.0]]
+    assert por_tramo.values.tolist() == [[POR_VENCER, 1, 5.0], ["0-30", 1, 10.0], ["31-60", 2, 50.0], ["90+", 1, 40.0]]
+    # clientes categóricos: mismos totales con los códigos ya calculados
+    cat, _ = agregar_aging(pd.Series(clientes, dtype="category"), tramo, montos)
+    pd.testing.assert_frame_equal(cat, por_cliente)
+
+
+def test_recomendacion_con_los_cortes_de_la_corrida():
+    texto = recomendaciones([45, 120], irrisorio=2.5)
+    assert any("(0-45/46-120/120+)" in r and "desde 46+ días" in r for r in texto)
+    assert any("≤ 2.50" in r for r in texto)
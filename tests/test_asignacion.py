@@ -0,0 +1,69 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat import asignacion
+from caat.asignacion import asignar_uno_a_uno, componentes
+
+
+def _pares(aristas):
+    return pd.DataFrame(aristas, columns=["i_cxc", "i_banco", "costo"])
+
+
+def _enlaces(res):
+    return set(zip(res["i_cxc"], res["i_banco"]))
+
+
+def _optimo(pares):
+    """Fuerza bruta: máxima cardinalidad y, a igualdad, mínimo costo."""
+    filas = list(pares.itertuples(index=False))
+    for k in range(min(pares["i_cxc"].nunique(), pares["i_banco"].nunique()), 0, -1):
+        validos = [c for c in itertools.combinations(filas, k)
+                   if len({f.i_cxc for f in c}) == k and len({f.i_banco for f in c}) == k]
+        if validos:
+            return k, min(sum(f.costo for f in c) for c in validos)
+    return 0, 0.0
+
+
+def test_hungaro_supera_al_codicioso():
+    # el codicioso toma (0, 0) por ser la arista más barata y deja a la factura 1 sin depósito
+    pares = _pares([(0, 0, 1.0), (0, 1, 2.0), (1, 0, 2.0)])
+    assert _enlaces(asignar_uno_a_uno(pares, limite_exacto=0)) == {(0, 0)}
+    assert _enlaces(asignar_uno_a_uno(pares)) == {(0, 1), (1, 0)}
+
+    # a igual cardinalidad gana el menor costo total (4 frente a 11)
+    pares = _pares([(0, 0, 1.0), (0, 1, 2.0), (1, 0, 2.0), (1, 1, 10.0)])
+    assert _enlaces(asignar_uno_a_uno(pares, limite_exacto=0)) == {(0, 0), (1, 1)}
+    assert _enlaces(asignar_uno_a_uno(pares)) == {(0, 1), (1, 0)}
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_asignacion_optima_en_grafos_pequenos(semilla):
+    rng = np.random.default_rng(semilla)
+    n = int(rng.integers(2, 9))
+    aristas = {(int(a), int(b)) for a, b in rng.integers(0, 5, (n, 2))}
+    pares = _pares([(a, b, float(rng.integers(0, 5))) for a, b in sorted(aristas)])
+    res = asignar_uno_a_uno(pares)
+    assert res["i_cxc"].is_unique and res["i_banco"].is_unique
+    assert (len(res), res["costo"].sum()) == _optimo(pares)
+
+
+def test_prioridad_resuelve_niveles_en_orden():
+    # la referencia (nivel 0) se queda con el depósito aunque el par por monto sea más barato
+    pares = _pares([(0, 0, 5.0), (1, 0, 0.0), (1, 1, 1.0)]).assign(nivel=[0, 1, 1])
+    assert _enlaces(asignar_uno_a_uno(pares, prioridad="nivel")) == {(0, 0), (1, 1)}
+
+
+def test_componentes():
+    assert list(componentes([0, 0, 1, 2], [0, 1, 1, 5])) == [0, 0, 0, 1]
+
+
+def test_workers_no_cambia_el_resultado(monkeypatch):
+    rng = np.random.default_rng(0)
+    # muchos bloques 2×2 independientes, cada uno resuelto con el húngaro
+    bloques = [(2 * k + a, 2 * k + b, float(rng.integers(0, 9))) for k in range(40) for a in (0, 1) for b in (0, 1)]
+    pares = _pares(bloques)
+    monkeypatch.setattr(asignacion, "MIN_COMPONENTES_PARALELO", 8)
+    pd.testing.assert_frame_equal(asignar_uno_a_uno(pares, workers=2), asignar_uno_a_uno(pares))
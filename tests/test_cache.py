@@ -0,0 +1,61 @@
+import io
+
+import pandas as pd
+
+from caat import cache
+from caat.cache import CacheLRU, hash_archivo, hash_sesion
+
+
+class _Subido(io.BytesIO):
+    """Imita ``UploadedFile``: ``file_id`` y ``size`` además del buffer."""
+
+    def __init__(self, datos, file_id):
+        super().__init__(datos)
+        self.file_id, self.size = file_id, len(datos)
+
+
+def test_hash_igual_para_ruta_buffer_y_flujo(tmp_path):
+    datos = b"ID;Monto\n1;10\n" * 1000
+    ruta = tmp_path / "a.csv"
+    ruta.write_bytes(datos)
+    flujo = open(ruta, "rb")
+    flujo.read(5)
+    try:
+        assert hash_archivo(str(ruta)) == hash_archivo(io.BytesIO(datos)) == hash_archivo(flujo)
+        assert flujo.tell() == 5
+    finally:
+        flujo.close()
+
+
+def test_hash_sesion_recorre_cada_subida_una_vez(monkeypatch):
+    llamadas = []
+    original = cache.hash_archivo
+    monkeypatch.setattr(cache, "hash_archivo", lambda f: llamadas.append(f) or original(f))
+    estado = {}
+    a, b = _Subido(b"uno", "id-a"), _Subido(b"dos", "id-b")
+    h = [hash_sesion(estado, f) for f in (a, b, a, b, a)]
+    assert len(llamadas) == 2
+    assert h[0] == h[2] == h[4] != h[1]
+    hash_sesion(estado, _Subido(b"uno", "id-a2"))              # otra subida del mismo archivo
+    assert len(llamadas) == 3
+    hash_sesion(estado, io.BytesIO(b"uno"))                    # sin file_id: sin memo
+    assert len(llamadas) == 4
+
+
+def test_hash_sesion_acota_el_memo():
+    estado = {}
+    for i in range(cache.MAX_HASHES + 10):
+        hash_sesion(estado, _Subido(b"x", f"id-{i}"))
+    assert len(estado["_caat_hashes"]) == cache.MAX_HASHES
+
+
+def test_lru_descarta_lo_menos_usado():
+    df = pd.DataFrame({"x": range(100)})
+    tam = cache.tamano_bytes(df)
+    lru = CacheLRU(2 * tam)
+    lru.put("a", df); lru.put("b", df)
+    assert lru.get("a") is df
+    lru.put("c", df)
+    assert "b" not in lru and "a" in lru and "c" in lru
+    assert lru.bytes == 2 * tam
+    assert lru.put("grande", pd.concat([df] * 3)) is not None and "grande" not in lru
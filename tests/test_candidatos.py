@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat.candidatos import candidatos_fuerza_bruta, candidatos_ventana
+
+
+def _datos(rng, n, m, distintos=2_000):
+    # montos en centavos con empates y fechas con hora: los bordes de ambas ventanas se tocan;
+    # con pocos montos distintos la ventana por fecha es la más angosta y es la que se recorre
+    monto_cxc = rng.integers(0, distintos, n) / 100
+    monto_banco = rng.integers(0, distintos, m) / 100
+    base = pd.Timestamp("2024-01-01")
+    fecha_cxc = base + pd.to_timedelta(rng.integers(0, 40 * 24, n), unit="h")
+    fecha_banco = base + pd.to_timedelta(rng.integers(0, 40 * 24, m), unit="h")
+    return monto_cxc, pd.Series(fecha_cxc), monto_banco, pd.Series(fecha_banco)
+
+
+def _ordenar(df):
+    return df.sort_values(["i_cxc", "i_banco"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("semilla", range(5))
+@pytest.mark.parametrize("distintos", [5, 2_000])
+@pytest.mark.parametrize("tol_monto, tol_dias", [(0.0, 0), (0.05, 3), (1.0, 10)])
+def test_ventana_igual_a_fuerza_bruta(semilla, distintos, tol_monto, tol_dias):
+    rng = np.random.default_rng(semilla)
+    datos = _datos(rng, int(rng.integers(1, 300)), int(rng.integers(1, 300)), distintos)
+    esperado = _ordenar(candidatos_fuerza_bruta(*datos, tol_monto, tol_dias))
+    # bloques diminutos: el resultado no depende de max_pares_bloque
+    for bloque in (2_000_000, 7):
+        pd.testing.assert_frame_equal(candidatos_ventana(*datos, tol_monto, tol_dias, max_pares_bloque=bloque),
+                                      esperado)
+
+
+def test_ventana_sin_filas():
+    rng = np.random.default_rng(0)
+    m_a, f_a, m_b, f_b = _datos(rng, 5, 5)
+    assert candidatos_ventana(m_a[:0], f_a[:0], m_b, f_b, 1.0, 1).empty
+    assert candidatos_ventana(m_a, f_a, m_b[:0], f_b[:0], 1.0, 1).empty
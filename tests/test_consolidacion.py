@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat.consolidacion import consolidar_bancos, convertir, cuenta_de_archivo, leer_extractos, leer_tasas
+
+TASAS = pd.DataFrame({"Fecha": ["01/01/2024", "15/01/2024", "01/01/2024", "10/01/2024"],
+                      "Moneda": ["eur", "EUR", "PEN", "PEN"], "Tasa": ["1,10", "1,20", "0,27", "0"]})
+
+
+def test_tasa_vigente_a_la_fecha():
+    tasas = leer_tasas(TASAS)
+    assert len(tasas) == 3                                   # la tasa 0 se descarta
+    fechas = pd.to_datetime(["2024-01-10", "2024-01-15", "2024-01-20", "2024-01-05", "2024-01-12"])
+    tasa = convertir(fechas, ["EUR", "EUR", "EUR", "USD", "PEN"], tasas)
+    assert tasa.tolist() == pytest.approx([1.10, 1.20, 1.20, 1.0, 0.27])
+
+
+def test_sin_tasa_a_la_fecha():
+    tasas = leer_tasas(TASAS)
+    with pytest.raises(ValueError, match="EUR al 2023-12-31"):
+        convertir(pd.to_datetime(["2023-12-31", "2024-01-02"]), ["EUR", "EUR"], tasas)
+    with pytest.raises(ValueError, match="GBP"):
+        convertir(pd.to_datetime(["2024-01-02"]), ["GBP"], tasas)
+    with pytest.raises(ValueError, match="no hay tabla"):
+        convertir(pd.to_datetime(["2024-01-02"]), ["EUR"], None)
+    assert convertir(pd.to_datetime(["2024-01-02"]), ["USD"], None).tolist() == [1.0]
+
+
+def test_tabla_de_tasas_incompleta():
+    with pytest.raises(ValueError, match="tipos de cambio"):
+        leer_tasas(TASAS.drop(columns="Tasa"))
+
+
+def test_consolidar_cuentas_y_monedas():
+    usd = pd.DataFrame({"Fecha": ["02/01/2024"], "Monto": ["1.000,50"], "Concepto": ["F-1"], "Sucursal": ["A"]})
+    eur = pd.DataFrame({"Fecha": ["16/01/2024", "03/01/2024"], "Importe": [100.0, 10.0], "Referencia": ["F-2", "F-3"]})
+    pen = pd.DataFrame({"Fecha": ["02/01/2024"], "Monto": [100.0], "Moneda": ["pen"], "Cuenta": ["BCP-9"]})
+    banco = consolidar_bancos({"BN-1": usd, "EU-2": eur, "otro": pen}, TASAS, monedas={"EU-2": "eur"})
+    assert list(banco.columns[:7]) == ["Cuenta", "Moneda", "Fecha", "Monto", "Referencia", "Monto_original",
+                                       "Tasa_cambio"]
+    assert banco["Cuenta"].tolist() == ["BN-1", "EU-2", "EU-2", "BCP-9"]
+    assert banco["Moneda"].tolist() == ["USD", "EUR", "EUR", "PEN"]
+    assert banco["Monto"].tolist() == [1000.50, 120.0, 11.0, 27.0]
+    assert banco["Referencia"].tolist()[:3] == ["F-1", "F-2", "F-3"]
+    assert banco["Sucursal"].tolist()[0] == "A" and pd.isna(banco["Sucursal"].iloc[1])
+
+
+def test_extracto_sin_columnas_minimas():
+    with pytest.raises(ValueError, match="'X'"):
+        consolidar_bancos({"X": pd.DataFrame({"Concepto": ["a"]})})
+
+
+def test_cuenta_de_archivo_y_lectura_en_orden():
+    assert cuenta_de_archivo("c:/datos/banco_BCP-001.xlsx", prefijo="banco") == "BCP-001"
+    assert cuenta_de_archivo("extracto.csv") == "extracto"
+    dfs = leer_extractos(range(5), lambda i: pd.DataFrame({"i": np.arange(i)}), trabajadores=3)
+    assert [len(df) for df in dfs] == [0, 1, 2, 3, 4]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat.discrepancias import COLUMNAS_RESUMEN, discrepancias
+
+
+def _par(montos_o, montos_d, fechas_o=None, fechas_d=None, **extra):
+    n = len(montos_o)
+    base = pd.Timestamp("2024-01-10")
+    df1 = pd.DataFrame({"ID_Transaccion": range(n), "ID_Entidad": "E1", "Monto": montos_o,
+                        "Fecha": fechas_o if fechas_o is not None else [base] * n})
+    df2 = pd.DataFrame({"ID_Transaccion": range(n), "ID_Entidad": "E1", "Monto": montos_d,
+                        "Fecha": fechas_d if fechas_d is not None else [base] * n})
+    for c, (a, b) in extra.items():
+        df1[c], df2[c] = a, b
+    return df1, df2
+
+
+def test_limites_de_tolerancia_de_monto():
+    df1, df2 = _par([100.0, 100.0, 100.0, 100.0], [100.50, 100.51, 99.50, 99.49])
+    tabla, _ = discrepancias(df1, df2, tol_monto=0.50)
+    assert tabla["ID_Transaccion"].tolist() == [1, 3]
+    assert tabla["_DIF_MONTO"].tolist() == pytest.approx([0.51, 0.51])
+    assert len(discrepancias(df1, df2)[0]) == 4
+
+
+def test_limites_de_tolerancia_de_dias():
+    base = pd.Timestamp("2024-01-10")
+    fechas_d = [base + pd.Timedelta(days=d) for d in (2, 3, -2, -3)]
+    df1, df2 = _par([1.0] * 4, [1.0] * 4, fechas_d=fechas_d)
+    tabla, resumen = discrepancias(df1, df2, tol_dias=2)
+    assert tabla["ID_Transaccion"].tolist() == [1, 3]
+    assert tabla["_DIF_DIAS"].tolist() == [3, 3]
+    assert tabla["_COLUMNAS"].tolist() == ["Fecha", "Fecha"]
+    fila = resumen.set_index("Columna").loc["Fecha"]
+    assert (fila["Diferencias"], fila["Suma_dif"], fila["Max_dif"]) == (2, 6, 3)
+
+
+def test_nulos():
+    base = pd.Timestamp("2024-01-10")
+    df1, df2 = _par([np.nan, np.nan, 5.0, 5.0], [np.nan, 5.0, 5.0, 5.0],
+                    fechas_o=[base, base, pd.NaT, pd.NaT], fechas_d=[base, base, pd.NaT, base],
+                    Nota=(["a", None, None, " x "], ["a", None, "b", "x"]))
+    tabla, resumen = discrepancias(df1, df2)
+    assert tabla[["ID_Transaccion", "_COLUMNAS"]].values.tolist() == [[1, "Monto"], [2, "Nota"], [3, "Fecha"]]
+    assert list(resumen.columns) == COLUMNAS_RESUMEN
+    assert resumen["Diferencias"].tolist() == [1, 1, 1]
+    assert np.isnan(resumen.set_index("Columna").loc["Nota", "Suma_dif"])
+
+
+def test_ids_repetidos_se_emparejan_uno_a_uno():
+    df1 = pd.DataFrame({"ID_Transaccion": [1, 1, 2], "ID_Entidad": "E1", "Monto": [10.0, 20.0, 5.0],
+                        "Fecha": pd.Timestamp("2024-01-01")})
+    df2 = df1.assign(Monto=[10.0, 21.0, 5.0])
+    tabla, _ = discrepancias(df1, df2)
+    # un merge por ID daría 4 pares del ID 1 (3 con diferencia)
+    assert tabla[["Monto_origen", "Monto_destino"]].values.tolist() == [[20.0, 21.0]]
+
+
+def test_columnas_extra_y_faltantes():
+    df1, df2 = _par([1.0, 1.0], [1.0, 1.0], Cuenta=([1, 2], [1, 3]), Nota=(["a", "b"], ["a", "c"]))
+    assert discrepancias(df1, df2, columnas=["Cuenta"])[0]["_COLUMNAS"].tolist() == ["Cuenta"]
+    assert discrepancias(df1, df2)[0]["_COLUMNAS"].tolist() == ["Cuenta, Nota"]
+    with pytest.raises(ValueError, match="Fecha"):
+        discrepancias(df1.drop(columns="Fecha"), df2)
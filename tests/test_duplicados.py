@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat.duplicados import REGLAS, _exactos, claves_normalizadas, detectar_duplicados, filas_duplicadas
+from caat.pruebas import CAMPOS_CLAVE
+
+
+def _libro(n=2_000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({"ID_Transaccion": rng.integers(0, n // 2, n), "ID_Entidad": rng.choice(["E1", "E2", "E3"], n),
+                         "Fecha": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 5, n), unit="D"),
+                         "Monto": rng.choice([10.0, 20.5, 99.99], n)})
+
+
+def _conjuntos(grupos, regla):
+    g = grupos[grupos["_REGLA"] == REGLAS[regla]]
+    return {frozenset(x) for x in g.groupby("_GRUPO")["_FILA"].apply(lambda s: s.tolist())}
+
+
+def test_exactos_igual_a_duplicated_en_memoria_y_desde_csv(tmp_path):
+    df = _libro()
+    esperado = {frozenset(g.index.tolist())
+                for _, g in df[df.duplicated(subset=CAMPOS_CLAVE, keep=False)].groupby(CAMPOS_CLAVE)}
+    assert esperado
+    grupos, resumen = detectar_duplicados(df)
+    assert _conjuntos(grupos, "exacto") == esperado
+    assert resumen.values.tolist() == [[REGLAS["exacto"], len(esperado), sum(map(len, esperado))]]
+    # desde disco, con varios baldes y bloques chicos
+    ruta = tmp_path / "libro.csv"
+    df.to_csv(ruta, index=False)
+    grupos_csv, _ = detectar_duplicados(str(ruta), presupuesto_mb=0.05, filas_por_bloque=300)
+    assert _conjuntos(grupos_csv, "exacto") == esperado
+
+
+def test_colision_de_hash_no_une_claves_distintas():
+    claves = claves_normalizadas(pd.DataFrame({"ID_Transaccion": [1, 2, 1], "ID_Entidad": "E1",
+                                               "Fecha": pd.Timestamp("2024-01-01"), "Monto": 10.0}))
+    claves["_H"] = np.uint64(7)                    # las tres filas con el mismo hash
+    g = _exactos(claves)
+    assert g["_FILA"].tolist() == [0, 2] and g["_N"].tolist() == [2, 2]
+
+
+def test_ventana_encadenada_sin_repetir_los_exactos():
+    df = pd.DataFrame({"ID_Transaccion": [1, 2, 3, 4, 5, 6, 7],
+                       "ID_Entidad": ["E1", "E1", "E1", "E1", "E2", "E2", "E2"],
+                       "Fecha": pd.to_datetime(["2024-01-01", "2024-01-03", "2024-01-06", "2024-01-20",
+                                                "2024-01-01", "2024-01-01", "2024-01-02"]),
+                       "Monto": [50.0, 50.0, 50.0, 50.0, 10.0, 10.0, 11.0]})
+    df.loc[5, "ID_Transaccion"] = 5                # filas 4 y 5: duplicado exacto, sola en su ventana
+    grupos, _ = detectar_duplicados(df, reglas=("exacto", "ventana"), ventana_dias=3)
+    assert _conjuntos(grupos, "ventana") == {frozenset({0, 1, 2})}
+    assert _conjuntos(grupos, "exacto") == {frozenset({4, 5})}
+
+
+def test_ids_transpuestos():
+    df = pd.DataFrame({"ID_Transaccion": ["12345", "12435", "21345", "99999", "12354"],
+                       "ID_Entidad": ["E1", "E1", "E1", "E1", "E2"],
+                       "Fecha": pd.Timestamp("2024-01-01"), "Monto": [10.0, 10.0, 10.0, 10.0, 10.0]})
+    grupos, _ = detectar_duplicados(df, reglas=("transpuesto",))
+    assert _conjuntos(grupos, "transpuesto") == {frozenset({0, 1, 2})}   # otra entidad: no
+
+
+def test_filas_duplicadas_trae_las_filas_de_cada_grupo():
+    df = _libro(300)
+    grupos, _ = detectar_duplicados(df)
+    filas = filas_duplicadas(df, grupos, filas_por_bloque=50)
+    assert len(filas) == len(grupos)
+    esperado = df.iloc[filas["_FILA"].to_numpy()].reset_index(drop=True)
+    pd.testing.assert_frame_equal(filas[df.columns], esperado)
+
+
+def test_errores():
+    df = _libro(10)
+    with pytest.raises(ValueError, match="desconocida"):
+        detectar_duplicados(df, reglas=("otra",))
+    with pytest.raises(ValueError, match="Monto"):
+        detectar_duplicados(df.drop(columns="Monto"))
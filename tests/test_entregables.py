@@ -0,0 +1,63 @@
+import gzip
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat.entregables import docx_from_sections, escribir_xlsx, exportar, partir_hojas, to_xlsx_bytes
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _hallazgos(n=7):
+    return pd.DataFrame({"ID": np.arange(n), "Fecha": pd.date_range("2024-01-01", periods=n),
+                         "Monto": np.linspace(1, 2, n), "Nota": ["a", None] * (n // 2) + ["b"] * (n % 2)})
+
+
+def test_partir_hojas_con_nombres_de_31_caracteres():
+    nombre = "H" * 40
+    partes = partir_hojas({nombre: _hallazgos(7), "Chica": _hallazgos(2)}, max_filas=4)
+    assert [(nm, len(df)) for nm, df in partes] == [("H" * 31, 3), ("H" * 29 + "_2", 3), ("H" * 29 + "_3", 1),
+                                                    ("Chica", 2)]
+
+
+def test_xlsx_en_modo_write_only_igual_a_to_excel():
+    df = _hallazgos()
+    wb = openpyxl.load_workbook(io.BytesIO(to_xlsx_bytes({"Hallazgos": df, "Vacia": pd.DataFrame()})))
+    assert wb.sheetnames == ["Hallazgos", "Vacia"]
+    leido = pd.read_excel(io.BytesIO(to_xlsx_bytes({"Hallazgos": df})))
+    pd.testing.assert_frame_equal(leido, df, check_dtype=False)
+
+
+def test_xlsx_partido_por_limite_de_filas(tmp_path):
+    ruta = tmp_path / "h.xlsx"
+    escribir_xlsx({"Hallazgos": _hallazgos(5)}, ruta, max_filas=3)
+    hojas = pd.read_excel(ruta, sheet_name=None)
+    assert list(hojas) == ["Hallazgos", "Hallazgos_2", "Hallazgos_3"]
+    assert pd.concat(hojas.values())["ID"].tolist() == list(range(5))
+
+
+def test_csv_gz_y_parquet_una_entrada_por_hoja():
+    df = _hallazgos()
+    f = exportar({"A": df, "B": df.iloc[:0]}, formato="csv.gz")
+    with zipfile.ZipFile(f) as zf:
+        assert zf.namelist() == ["A.csv.gz", "B.csv.gz"]
+        assert pd.read_csv(io.BytesIO(gzip.decompress(zf.read("A.csv.gz"))))["ID"].tolist() == list(range(7))
+    pytest.importorskip("pyarrow")
+    mezclado = pd.DataFrame({"ID": pd.Series([1, "X2"], dtype=object)})
+    f = exportar({"A": df, "Mixto": mezclado}, formato="parquet")
+    with zipfile.ZipFile(f) as zf:
+        assert pd.read_parquet(io.BytesIO(zf.read("Mixto.parquet")))["ID"].tolist() == ["1", "X2"]
+
+
+def test_formato_desconocido():
+    with pytest.raises(ValueError, match="Formato desconocido"):
+        exportar({"A": _hallazgos()}, formato="ods")
+
+
+def test_docx():
+    docx = pytest.importorskip("docx")
+    d = docx.Document(io.BytesIO(docx_from_sections("Título", [("Hallazgos", ["uno", "dos"])])))
+    assert [p.text for p in d.paragraphs] == ["Título", "Hallazgos", "uno", "dos"]
@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import comparar
+from benchmarks.generadores import COLUMNA_VERDAD, generar_cxc_banco, generar_origen_destino, main
+from caat.pruebas import conciliar_todo, conteos
+
+
+def test_misma_semilla_mismos_datos():
+    for generar in (generar_origen_destino, generar_cxc_banco):
+        a, b = generar(500, semilla=3)
+        c, d = generar(500, semilla=3)
+        pd.testing.assert_frame_equal(a, c)
+        pd.testing.assert_frame_equal(b, d)
+        assert not generar(500, semilla=4)[0].equals(a)
+
+
+def test_tasas_de_origen_destino():
+    n = 20_000
+    origen, destino = generar_origen_destino(n, faltantes=0.05, inesperadas=0.03, discrepancias=0.0, duplicados=0.0)
+    c = conteos(conciliar_todo(origen, destino))
+    assert c["Discrepancias de valor"] == 0 and c["Duplicados"] == 0
+    assert abs(c["Faltantes en destino"] / n - 0.05) < 0.01
+    assert c["Inesperadas en destino"] == round(n * 0.03)
+
+
+def test_depositos_suman_la_factura():
+    cxc, banco = generar_cxc_banco(3_000, parciales=0.3, notas_credito=0.05, verdad=True)
+    cent = banco.groupby(COLUMNA_VERDAD)["Monto"].sum().mul(100).round().astype("int64")
+    facturas = cxc.set_index("NumeroFactura")["Monto"].mul(100).round().astype("int64")
+    assert (cent == facturas.loc[cent.index]).all()
+    cuotas = banco[COLUMNA_VERDAD].value_counts()
+    assert set(cuotas.unique()) == {1, 2, 3}
+    assert (facturas.loc[cent.index] > 0).all()                 # las NC no se pagan
+
+
+def test_retenciones_netas_en_el_deposito():
+    cxc, banco = generar_cxc_banco(2_000, parciales=0.0, retenciones=0.5, notas_credito=0.0, verdad=True)
+    ret = cxc[cxc["NumeroFactura"].str.startswith("RET-")]
+    assert len(ret) > 300 and (ret["Monto"] < 0).all()
+    # facturas pagadas = depósitos netos + retenciones
+    facturas = cxc.set_index("NumeroFactura")["Monto"]
+    assert np.isclose(facturas.loc[banco[COLUMNA_VERDAD]].sum(), banco["Monto"].sum() - ret["Monto"].sum())
+
+
+def test_main_escribe_los_archivos(tmp_path, capsys):
+    main([str(tmp_path), "--filas", "50", "--prueba", "cxc_bancos"])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bench6_banco.csv", "bench6_cxc.csv"]
+
+
+def test_comparar_marca_regresiones(tmp_path, capsys):
+    def corrida(nombre, segundos):
+        ruta = tmp_path / nombre
+        ruta.write_text(json.dumps({"resultados": [
+            {"filas": 100, "prueba": "1-5", "etapa": "total", "segundos": segundos, "rss_pico_mb": 10.0},
+            {"filas": 100, "prueba": "6", "etapa": "total", "error": "MemoryError"}]}), encoding="utf-8")
+        return str(ruta)
+    base, igual, lenta = corrida("base.json", 1.0), corrida("igual.json", 1.1), corrida("lenta.json", 1.5)
+    assert comparar.main([base, igual]) == 0
+    assert comparar.main([base, lenta]) == 1
+    assert comparar.comparar(comparar.cargar(base), comparar.cargar(lenta))["x_tiempo"].tolist() == [1.5]
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from caat import cxc_bancos
+from caat.incremental import conciliar_incremental
+
+
+def _cxc_banco(semilla=0, n=400, desde="2024-01-01", prefijo="F"):
+    rng = np.random.default_rng(semilla)
+    m = n // 2
+    cxc = pd.DataFrame({"Cliente": rng.choice(["A", "B", "C"], n),
+                        "NumeroFactura": [f"{prefijo}{i:05d}" for i in range(n)],
+                        "Fecha": pd.Timestamp(desde) + pd.to_timedelta(rng.integers(0, 60, n), unit="D"),
+                        "Monto": rng.choice([100.0, 250.0, 37.5, 12.34], n)})
+    i = rng.choice(n, m, replace=False)
+    banco = pd.DataFrame({"Fecha": cxc["Fecha"].to_numpy()[i] + pd.to_timedelta(rng.integers(0, 3, m), unit="D"),
+                          "Monto": cxc["Monto"].to_numpy()[i] + rng.choice([0, 0, 0.2], m),
+                          "Referencia": np.where(rng.random(m) < 0.3, cxc["NumeroFactura"].to_numpy()[i], "")})
+    return cxc, banco
+
+
+def _completo(cxc, banco):
+    c, b, h = cxc_bancos.normalizar(cxc.copy(), banco.copy())
+    return c, b, h, cxc_bancos.emparejar(c, b, h, 0.5, 5).reset_index(drop=True)
+
+
+def _igual(incremental, completo):
+    columnas = list(completo.columns)
+    pd.testing.assert_frame_equal(incremental[columnas].sort_values(["i_cxc", "i_banco"]).reset_index(drop=True),
+                                  completo.sort_values(["i_cxc", "i_banco"]).reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def test_incremental_igual_a_corrida_completa(tmp_path):
+    ruta = str(tmp_path / "almacen.sqlite")
+    cxc, banco = _cxc_banco()
+    c, b, h, completo = _completo(cxc, banco)
+    assert len(completo)
+
+    primera, _ = conciliar_incremental(c, b, h, ruta, 0.5, 5)
+    _igual(primera, completo)
+    # misma entrada: todo se reutiliza y el resultado no cambia
+    segunda, _ = conciliar_incremental(c, b, h, ruta, 0.5, 5)
+    pd.testing.assert_frame_equal(segunda, primera, check_dtype=False)
+
+    # partidas nuevas de otro periodo (sin candidatos comunes con las previas): igual a conciliar todo de nuevo
+    cxc2, banco2 = _cxc_banco(semilla=1, n=100, desde="2025-01-01", prefijo="G")
+    c, b, h, completo = _completo(pd.concat([cxc, cxc2], ignore_index=True),
+                                  pd.concat([banco, banco2], ignore_index=True))
+    tercera, _ = conciliar_incremental(c, b, h, ruta, 0.5, 5)
+    _igual(tercera, completo)
+
+
+def test_cambio_de_parametros_reinicia_el_almacen(tmp_path):
+    ruta = str(tmp_path / "almacen.sqlite")
+    cxc, banco = _cxc_banco()
+    c, b, h = cxc_bancos.normalizar(cxc.copy(), banco.copy())
+    conciliar_incremental(c, b, h, ruta, 0.5, 5)
+    res, _ = conciliar_incremental(c, b, h, ruta, 0.0, 1)
+    _igual(res, cxc_bancos.emparejar(c, b, h, 0.0, 1).reset_index(drop=True))
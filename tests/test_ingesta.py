@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from caat.ingesta import HAY_PYARROW, leer_por_bloques, leer_tabular, plan_dtypes
+from caat.normalizacion import a_centavos
+
+
+def _csv(tmp_path, texto, nombre="datos.csv"):
+    ruta = tmp_path / nombre
+    ruta.write_text(texto, encoding="utf-8")
+    return ruta
+
+
+@pytest.mark.parametrize("motor", ["c"] + (["pyarrow"] if HAY_PYARROW else []))
+def test_punto_de_miles_no_se_lee_como_decimal(tmp_path, motor):
+    ruta = _csv(tmp_path, "ID_Transaccion,Monto\n1,1.500\n2,2.250\n3,12.000\n")
+    df, _ = leer_tabular(ruta, ids=["ID_Transaccion"], montos=["Monto"], motor=motor)
+    assert list(a_centavos(df["Monto"])) == [150000, 225000, 1200000]
+
+
+@pytest.mark.parametrize("motor", ["c"] + (["pyarrow"] if HAY_PYARROW else []))
+def test_punto_decimal_confirmado_por_la_muestra(tmp_path, motor):
+    ruta = _csv(tmp_path, "ID_Transaccion,Monto\n1,1.500\n2,12.5\n3,7\n")
+    df, _ = leer_tabular(ruta, montos=["Monto"], motor=motor)
+    assert df["Monto"].dtype == "float64"
+    assert list(a_centavos(df["Monto"])) == [150, 1250, 700]
+
+
+def test_coma_decimal(tmp_path):
+    ruta = _csv(tmp_path, "Monto;Fecha\n1.234,56;01/02/2024\n10,5;02/02/2024\n")
+    df, _ = leer_tabular(ruta, montos=["Monto"], fechas=["Fecha"])
+    assert list(a_centavos(df["Monto"])) == [123456, 1050]
+    assert list(df["Fecha"]) == [pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-02")]
+
+
+def test_plan_de_ids_por_cardinalidad():
+    filas = [[str(i), f"T{i}", "E1" if i % 2 else "E2"] for i in range(100)]
+    dtype, _ = plan_dtypes(["Entero", "Texto", "Entidad"], filas, ids=["Entero", "Texto", "Entidad"])
+    assert dtype == {"Texto": "str", "Entidad": "category"}
+
+
+def test_bloques_con_el_mismo_plan(tmp_path):
+    ruta = _csv(tmp_path, "Monto\n" + "".join(f"{i}.500\n" for i in range(1, 11)))
+    bloques = list(leer_por_bloques(ruta, 3, montos=["Monto"]))
+    assert [len(b) for b in bloques] == [3, 3, 3, 1]
+    assert list(a_centavos(pd.concat(bloques)["Monto"]))[:2] == [150000, 250000]
+
+
+def test_pico_de_memoria_solo_con_tracemalloc(tmp_path):
+    ruta = _csv(tmp_path, "Monto\n1.5\n2.5\n")
+    assert leer_tabular(ruta, motor="c", medir_memoria=True)[1]["pico_mb"] is not None
+    if HAY_PYARROW:
+        assert leer_tabular(ruta, motor="pyarrow", medir_memoria=True)[1]["pico_mb"] is None
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat.normalizacion import a_centavos, a_dias, a_fecha, detectar_formato_monto, detectar_formato_fecha
+
+
+@pytest.mark.parametrize("valores, formato", [
+    (["1.234,56", "10,5", "7"], (",", ".")),
+    (["1,234.56", "10.5", "7"], (".", ",")),
+    (["1.234.567", "2.000"], (",", ".")),        # el punto se repite: miles
+    (["1.500", "2.250"], (",", ".")),            # solo ambiguos: punto = miles
+])
+def test_detectar_formato_monto(valores, formato):
+    assert detectar_formato_monto(pd.Series(valores)) == formato
+
+
+def test_a_centavos_texto_con_simbolos_y_negativos():
+    s = pd.Series(["$ 1.234,56", "(10,50)", "-3,1", " 7 ", "", None, "abc"])
+    assert a_centavos(s).tolist() == [123456, -1050, -310, 700, pd.NA, pd.NA, pd.NA]
+
+
+def test_a_centavos_numerico_sin_ida_y_vuelta_por_texto():
+    assert a_centavos(pd.Series([1234.5, 0.1 + 0.2, np.nan])).tolist() == [123450, 30, pd.NA]
+    assert a_centavos(pd.Series([1, 2], dtype="int64")).tolist() == [100, 200]
+
+
+def test_a_centavos_formato_explicito():
+    assert a_centavos(pd.Series(["1.500"]), decimal=".", miles=",").tolist() == [150]
+
+
+def test_a_fecha_formato_fijo_y_respaldo():
+    s = pd.Series(["05/01/2024", "06/01/2024", "2024-01-07", None, "xx"])
+    assert detectar_formato_fecha(s.dropna().tolist()) == "%d/%m/%Y"
+    f = a_fecha(s)
+    assert f.tolist()[:3] == [pd.Timestamp("2024-01-05"), pd.Timestamp("2024-01-06"), pd.Timestamp("2024-01-07")]
+    assert f.iloc[3:].isna().all()
+
+
+def test_a_fecha_mes_primero_detectado():
+    f = a_fecha(pd.Series(["12/31/2024", "01/15/2024"]))
+    assert f.tolist() == [pd.Timestamp("2024-12-31"), pd.Timestamp("2024-01-15")]
+
+
+def test_a_dias_con_nulos():
+    d = a_dias(pd.Series(pd.to_datetime(["1970-01-02", None])))
+    assert d.dtype == np.int32 and d.tolist() == [1, np.iinfo("int32").min]
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from caat import cxc_bancos
+from caat.notas_credito import compensar
+
+
+def _cxc(filas):
+    cxc = pd.DataFrame(filas, columns=["Cliente", "NumeroFactura", "Fecha", "Monto", "Observacion"])
+    banco = pd.DataFrame({"Fecha": ["2024-01-01"], "Monto": [1.0], "Referencia": [""]})
+    return cxc_bancos.normalizar(cxc, banco)[0]
+
+
+def _aplicados(enlaces, cxc):
+    ref = cxc["_REF"].astype(str).to_numpy()
+    return {(ref[c], ref[f], int(a)) for f, c, a in
+            zip(enlaces["i_factura"], enlaces["i_credito"], enlaces["_CENT_APLICADO"])}
+
+
+def test_credito_rechazado_no_bloquea_al_siguiente_y_prueba_otra_factura():
+    # NC-1 nombra F-1 y F-2: no cabe en F-1 (150 > 100) y debe pasar a F-2;
+    # NC-2 (30) cabe en F-1 aunque el acumulado con NC-1 lo superaría
+    cxc = _cxc([["A", "F-1", "2024-01-01", 100.0, ""],
+                ["A", "F-2", "2024-01-01", 500.0, ""],
+                ["A", "NC-1", "2024-01-05", -150.0, "Nota de credito F-1 F-2"],
+                ["A", "NC-2", "2024-01-06", -30.0, "Nota de credito F-1"]])
+    neto, enlaces = compensar(cxc, tol_cent=0)
+    assert _aplicados(enlaces, cxc) == {("NC-1", "F-2", 15000), ("NC-2", "F-1", 3000)}
+    assert dict(zip(neto["_REF"].astype(str), neto["_CENT"])) == {"F-1": 7000, "F-2": 35000}
+
+
+def test_credito_sin_factura_con_saldo_queda_sin_aplicar():
+    cxc = _cxc([["A", "F-1", "2024-01-01", 100.0, ""],
+                ["A", "NC-1", "2024-01-05", -80.0, "NC F-1"],
+                ["A", "NC-2", "2024-01-06", -50.0, "NC F-1"]])
+    neto, enlaces = compensar(cxc, tol_cent=0)
+    assert _aplicados(enlaces, cxc) == {("NC-1", "F-1", 8000)}
+    assert sorted(neto["_REF"].astype(str)) == ["F-1", "NC-2"]
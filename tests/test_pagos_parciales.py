@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.generadores import COLUMNA_VERDAD, generar_cxc_banco
+from caat import cxc_bancos
+from caat.pagos_parciales import COLUMNAS_AFINIDAD, buscar_pagos_parciales, mejor_subconjunto
+
+
+def _buscar(facturas, depositos, afinidad, **kw):
+    cxc = pd.DataFrame(facturas, columns=["i_cxc", "cent", "dia", "cli"])
+    banco = pd.DataFrame(depositos, columns=["i_banco", "cent", "dia"])
+    afinidad = pd.DataFrame(afinidad, columns=COLUMNAS_AFINIDAD)
+    grupos = buscar_pagos_parciales(cxc, banco, afinidad, tol_cent=50, **kw)
+    return {(t, tuple(sorted(set(g["i_cxc"]))), tuple(sorted(set(g["i_banco"]))))
+            for (t, _), g in grupos.groupby(["_TIPO_MATCH", "_GRUPO"])}
+
+
+def test_mejor_subconjunto_unico():
+    assert sorted(mejor_subconjunto([100, 250, 400, 70], 500, 0)) == [0, 2]
+    # 100 + 400 y 250 + 250 empatan: ambiguo
+    assert mejor_subconjunto([100, 250, 250, 400], 500, 0) is not None
+    assert mejor_subconjunto([100, 250, 250, 400], 500, 0, unico=True) is None
+
+
+def test_pago_parcial_solo_con_depositos_que_nombran_la_factura():
+    facturas = [(0, 30000, 0, "A")]
+    depositos = [(10, 10000, 1), (11, 20000, 5), (12, 20000, 6)]
+    # el depósito 12 suma igual que el 11 pero no nombra la factura
+    assert _buscar(facturas, depositos, [(10, 0, "A", 1.0), (11, 0, "A", 0.9)]) == {("Pago parcial", (0,), (10, 11))}
+    assert _buscar(facturas, depositos, []) == set()
+    # con los dos nombrándola hay dos grupos posibles: no se enlaza
+    assert _buscar(facturas, depositos, [(10, 0, "A", 1.0), (11, 0, "A", 1.0), (12, 0, "A", 1.0)]) == set()
+
+
+def test_pago_agrupado_exige_referencia_exacta_y_un_solo_cliente():
+    facturas = [(0, 10000, 0, "A"), (1, 15000, 2, "A"), (2, 15000, 2, "B")]
+    depositos = [(10, 25000, 3)]
+    assert _buscar(facturas, depositos, [(10, 0, "A", 1.0)]) == {("Pago agrupado", (0, 1), (10,))}
+    assert _buscar(facturas, depositos, [(10, 0, "A", 0.9)]) == set()            # solo núcleo
+    assert _buscar(facturas, depositos, [(10, 0, "A", 1.0), (10, 2, "B", 1.0)]) == set()
+
+
+def test_pago_parcial_antes_que_agrupado():
+    # los depósitos 10 y 11 son cuotas de la factura 0; el 10 también cuadra con 1 + 2 (pago agrupado)
+    facturas = [(0, 30000, 0, "A"), (1, 5000, 0, "A"), (2, 5000, 1, "A")]
+    depositos = [(10, 10000, 1), (11, 20000, 2)]
+    afinidad = [(10, 0, "A", 1.0), (11, 0, "A", 1.0), (10, 1, "A", 1.0)]
+    assert _buscar(facturas, depositos, afinidad) == {("Pago parcial", (0,), (10, 11))}
+
+
+def test_presupuesto_de_busquedas():
+    facturas = [(0, 30000, 0, "A")]
+    depositos = [(10, 10000, 1), (11, 20000, 5)]
+    afinidad = [(10, 0, "A", 1.0), (11, 0, "A", 1.0)]
+    assert _buscar(facturas, depositos, afinidad, max_busquedas=0) == set()
+    assert len(_buscar(facturas, depositos, afinidad, max_busquedas=1)) == 1
+
+
+def test_precision_contra_la_verdad_del_generador():
+    cxc, banco = generar_cxc_banco(5000, ruido_ref=0.3, retenciones=0.1, verdad=True)
+    c, b, hay_ref = cxc_bancos.normalizar(cxc, banco)
+    c, _ = cxc_bancos.compensar_nc(c, 0.5)
+    enlaces = cxc_bancos.emparejar(c, b, hay_ref, 0.5, 5)
+    grupos = enlaces[enlaces["_TIPO_MATCH"].isin(["Pago parcial", "Pago agrupado"])]
+    factura = c["_REF"].astype(str).to_numpy()[grupos["i_cxc"].to_numpy()]
+    verdad = banco[COLUMNA_VERDAD].to_numpy()[b["_FILA"].to_numpy()][grupos["i_banco"].to_numpy()]
+    assert len(grupos) > 20
+    np.testing.assert_array_equal(factura, verdad)
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat import cxc_bancos
+
+
+def _cxc_banco(n=600, semilla=0):
+    rng = np.random.default_rng(semilla)
+    m = n // 2
+    cxc = pd.DataFrame({"Cliente": rng.choice([f"C{i}" for i in range(20)], n),
+                        "NumeroFactura": [f"F{i:06d}" for i in range(n)],
+                        "Fecha": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 120, n), unit="D"),
+                        "Monto": np.round(rng.choice([100, 250, 37.5, 12.34], n)
+                                          * np.where(rng.random(n) < 0.05, -1, 1), 2)})
+    i = rng.choice(n, m, replace=False)
+    banco = pd.DataFrame({"Fecha": cxc["Fecha"].to_numpy()[i] + pd.to_timedelta(rng.integers(0, 4, m), unit="D"),
+                          "Monto": np.abs(cxc["Monto"].to_numpy()[i]) + rng.choice([0, 0, 0.01, 0.3], m),
+                          "Referencia": np.where(rng.random(m) < 0.4, cxc["NumeroFactura"].to_numpy()[i], "")})
+    return cxc_bancos.normalizar(cxc, banco)
+
+
+@pytest.mark.parametrize("parciales", [False, True])
+def test_emparejar_paralelo_igual_a_serial(parciales):
+    cxc, banco, hay_ref = _cxc_banco()
+    serial = cxc_bancos.emparejar(cxc, banco, hay_ref, 0.5, 5, parciales, procesos=1)
+    paralelo = cxc_bancos.emparejar(cxc, banco, hay_ref, 0.5, 5, parciales, procesos=2)
+    assert len(serial)
+    pd.testing.assert_frame_equal(paralelo, serial, check_exact=True)
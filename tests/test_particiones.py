@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from caat.ingesta import leer_tabular
+from caat.normalizacion import a_fecha
+from caat.particiones import conciliar_por_particiones
+from caat.pruebas import CAMPOS_ID, SALIDAS, conciliar_todo
+from caat.transacciones import ids
+
+
+def _archivos(tmp_path, n=400, semilla=0):
+    rng = np.random.default_rng(semilla)
+    origen = pd.DataFrame({"ID_Transaccion": np.arange(n), "ID_Entidad": rng.choice(["E1", "E2", "E3"], n),
+                           "Fecha": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D"),
+                           "Monto": np.round(rng.uniform(1, 500, n), 2)})
+    destino = origen.sample(frac=0.9, random_state=semilla).reset_index(drop=True)
+    # el mismo ID escrito de otra forma: con ceros a la izquierda, con ".0" y mezclado con IDs de texto
+    texto = destino["ID_Transaccion"].astype(str)
+    destino["ID_Transaccion"] = np.where(rng.random(len(destino)) < 0.5, texto.str.zfill(5), texto + ".0")
+    destino.loc[:9, "Monto"] += 1
+    destino.loc[10:14, "Fecha"] += pd.Timedelta(days=2)
+    destino = pd.concat([destino, destino.iloc[:3],
+                         pd.DataFrame({"ID_Transaccion": ["X1", "X2"], "ID_Entidad": ["E1", "E2"],
+                                       "Fecha": pd.Timestamp("2024-02-01"), "Monto": [10.0, 20.0]})],
+                        ignore_index=True)
+    rutas = tmp_path / "origen.csv", tmp_path / "destino.csv"
+    origen.to_csv(rutas[0], index=False)
+    destino.to_csv(rutas[1], index=False)
+    return rutas
+
+
+def _claves(df) -> list:
+    return sorted(map(tuple, ids(df, CAMPOS_ID).fillna("").to_numpy()))
+
+
+def test_particiones_igual_a_conciliar_todo_con_ids_mezclados(tmp_path):
+    origen, destino = _archivos(tmp_path)
+    kw = dict(ids=CAMPOS_ID, montos=["Monto"], fechas=["Fecha"])
+    df1, df2 = (leer_tabular(r, **kw)[0] for r in (origen, destino))
+    for df in (df1, df2):
+        df["Fecha"] = a_fecha(df["Fecha"])
+    esperado = conciliar_todo(df1, df2, ids_canonicos=True)
+    assert len(esperado["conciliadas"]) > 300
+
+    # presupuesto diminuto: varios baldes y bloques de pocas filas con tipos de ID distintos por bloque
+    res = conciliar_por_particiones(str(origen), str(destino), str(tmp_path / "salida"), presupuesto_mb=0.1,
+                                    filas_por_bloque=50)
+    for s in SALIDAS:
+        filas, ruta = res[s]
+        assert filas == len(esperado[s]), s
+        if filas:
+            assert _claves(pd.read_csv(ruta, dtype=str)) == _claves(esperado[s]), s
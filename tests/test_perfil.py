@@ -0,0 +1,63 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from caat.perfil import Perfil, activar, activo, contar, etapa, registrar
+
+
+def test_sin_perfil_no_registra_nada():
+    assert activo() is None
+    with etapa("x", filas=1) as e:
+        contar("pares", 5)
+    assert etapa("y") is e                         # contexto vacío compartido
+
+
+def test_etapas_anidadas_con_contadores():
+    with registrar() as p:
+        with etapa("total", archivos=2):
+            with etapa("leer"):
+                contar("filas", np.int64(10))
+            contar("pares", 3)
+    assert activo() is None
+    tabla = p.tabla()
+    assert tabla["etapa"].tolist() == ["total", "  leer"]
+    assert tabla["nivel"].tolist() == [0, 1]
+    assert tabla["% total"].iloc[0] == 100.0
+    assert tabla.loc[0, "archivos"] == 2 and tabla.loc[0, "pares"] == 3 and tabla.loc[1, "filas"] == 10
+    assert isinstance(p.etapas[0]["contadores"]["filas"], int)
+
+
+def test_error_y_observador():
+    vistas = []
+    with registrar(Perfil(observador=lambda r: vistas.append(r["etapa"]))) as p:
+        with etapa("bien"):
+            pass
+        with pytest.raises(KeyError):
+            with etapa("mal"):
+                raise KeyError("x")
+    assert vistas == ["bien"]
+    assert p.etapas[1]["error"] == "KeyError"
+
+
+def test_json_y_chrome_trace():
+    with registrar() as p:
+        with etapa("a"):
+            contar("filas", 4)
+    etapas = json.loads(p.a_json())["etapas"]
+    assert etapas[0]["etapa"] == "a" and etapas[0]["contadores"] == {"filas": 4} and "inicio_ns" not in etapas[0]
+    eventos = json.loads(p.a_chrome_trace())["traceEvents"]
+    assert eventos[0]["ph"] == "X" and eventos[0]["args"]["filas"] == 4 and eventos[0]["dur"] >= 0
+
+
+def test_activar_no_se_mezcla_entre_hilos():
+    p = activar(Perfil())
+    try:
+        en_hilo = []
+        t = threading.Thread(target=lambda: en_hilo.append(activo()))
+        t.start(); t.join()
+        assert en_hilo == [None] and activo() is p
+    finally:
+        activar(None)
+    assert Perfil().tabla().empty
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from caat.pruebas import (CAMPOS_CLAVE, CAMPOS_ID, conciliadas_por_clave, conciliar_todo, duplicados_por_clave,
+                          sin_par)
+
+
+def _archivos(semilla=0, n=300):
+    rng = np.random.default_rng(semilla)
+    origen = pd.DataFrame({"ID_Transaccion": rng.integers(0, n, n), "ID_Entidad": rng.choice(["E1", "E2"], n),
+                           "Fecha": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 20, n), unit="D"),
+                           "Monto": rng.choice([10.0, 20.0, 35.5, np.nan], n), "Descripcion": "origen"})
+    destino = origen.sample(frac=0.8, random_state=semilla).reset_index(drop=True)
+    destino["Descripcion"] = "destino"
+    destino.loc[:20, "Monto"] += 1
+    destino.loc[21:30, "Fecha"] += pd.Timedelta(days=1)
+    destino.loc[31:35, "Fecha"] = pd.NaT
+    return origen, destino
+
+
+def _merges(df1, df2) -> dict:
+    """Las pruebas 1–5 tal como se calculaban antes, una ``pd.merge`` por prueba."""
+    izq = pd.merge(df1, df2, how="left", on=CAMPOS_CLAVE, indicator=True)
+    der = pd.merge(df2, df1, how="left", on=CAMPOS_CLAVE, indicator=True)
+    por_id = pd.merge(df1, df2, on=CAMPOS_ID, how="inner", suffixes=("_origen", "_destino"))
+    return {"conciliadas": pd.merge(df1, df2, how="inner", on=CAMPOS_CLAVE),
+            "solo_origen": izq[izq["_merge"] == "left_only"].drop(columns="_merge"),
+            "solo_destino": der[der["_merge"] == "left_only"].drop(columns="_merge"),
+            "discrepancias": por_id[(por_id["Monto_origen"] != por_id["Monto_destino"]) |
+                                    (por_id["Fecha_origen"] != por_id["Fecha_destino"])],
+            "duplicados": [df[df.duplicated(subset=CAMPOS_CLAVE, keep=False)] for df in (df1, df2)]}
+
+
+def _igual(a, b):
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+
+
+def test_conciliar_todo_igual_a_los_merges_por_prueba():
+    for semilla in range(3):
+        df1, df2 = _archivos(semilla)
+        esperado = _merges(df1, df2)
+        res = conciliar_todo(df1, df2)
+        for s in ["conciliadas", "solo_origen", "solo_destino", "discrepancias"]:
+            assert len(esperado[s]), s
+            _igual(res[s], esperado[s])
+        dup = res["duplicados"]
+        for lado, df in zip(["origen", "destino"], esperado["duplicados"]):
+            _igual(dup[dup["_ARCHIVO"] == lado].drop(columns="_ARCHIVO"), df)
+
+
+def test_pruebas_sueltas_igual_a_conciliar_todo():
+    df1, df2 = _archivos()
+    res = conciliar_todo(df1, df2)
+    _igual(conciliadas_por_clave(df1, df2), res["conciliadas"])
+    _igual(sin_par(df1, df2), res["solo_origen"])
+    _igual(sin_par(df2, df1), res["solo_destino"])
+    _igual(duplicados_por_clave(df1), df1[df1.duplicated(subset=CAMPOS_CLAVE, keep=False)])
+
+
+def test_ids_tal_como_vienen_salvo_ids_canonicos():
+    fila = {"ID_Entidad": "E1", "Fecha": pd.Timestamp("2024-01-01"), "Monto": 10.0}
+    df1 = pd.DataFrame([{"ID_Transaccion": "001", **fila}, {"ID_Transaccion": "2", **fila}])
+    df2 = pd.DataFrame([{"ID_Transaccion": "1", **fila}, {"ID_Transaccion": "2", **fila}])
+    res = conciliar_todo(df1, df2)
+    _igual(res["conciliadas"], pd.merge(df1, df2, on=CAMPOS_CLAVE))
+    assert list(res["solo_origen"]["ID_Transaccion"]) == ["001"]
+    assert len(duplicados_por_clave(pd.concat([df1, df2]))) == 2
+    canon = conciliar_todo(df1, df2, ids_canonicos=True)
+    assert len(canon["conciliadas"]) == 2 and canon["solo_origen"].empty
+    assert len(conciliadas_por_clave(df1, df2, ids_canonicos=True)) == 2
+    assert len(duplicados_por_clave(pd.concat([df1, df2]), ids_canonicos=True)) == 4
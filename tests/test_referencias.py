@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from caat.referencias import (SIM_MAX_APROXIMADA, SIM_NUCLEO, IndiceReferencias, _qgramas, clave_ref,
+                              pares_similares, tokens_concepto)
+
+
+def _dice(a, b):
+    ga, gb = ({x[i:i + 3] for i in range(len(x) - 2)} for x in (a, b))
+    return 2 * len(ga & gb) / (len(ga) + len(gb)) if ga or gb else 0.0
+
+
+def test_claves_y_tokens_del_concepto():
+    assert clave_ref(["001-002/000123 ", None, "nan"]).tolist() == ["001002000123", "", ""]
+    tokens = tokens_concepto(["TRANSF 001-002-000123 ACME SA"])
+    assert set(tokens["clave"]) == {"TRANSF001002000123ACMESA", "001002000123", "000123"}
+    assert tokens.loc[tokens["completo"], "clave"].tolist() == ["TRANSF001002000123ACMESA"]
+
+
+def test_indice_igual_a_fuerza_bruta():
+    rng = np.random.default_rng(0)
+    alfabeto = np.array(list("0123456789AB"))
+    docs = ["".join(rng.choice(alfabeto, rng.integers(4, 12))) for _ in range(300)]
+    # consultas: documentos con un carácter cambiado y cadenas al azar
+    consultas = []
+    for d in docs[:100]:
+        i = rng.integers(len(d))
+        consultas.append(d[:i] + str(rng.choice(alfabeto)) + d[i + 1:])
+    consultas += ["".join(rng.choice(alfabeto, rng.integers(4, 12))) for _ in range(100)]
+    for umbral in (0.6, 0.8):
+        res = IndiceReferencias(docs).buscar(np.array(consultas, dtype=object), umbral, max_pares_bloque=500)
+        hallados = {(int(q), int(d)) for q, d in zip(res["i_clave"], res["doc"])}
+        esperado = {(q, d) for q, c in enumerate(consultas) for d, x in enumerate(docs) if _dice(c, x) >= umbral - 1e-12}
+        assert hallados == esperado
+
+
+def test_qgramas_sin_repetidos_por_documento():
+    doc, gram = _qgramas(np.array(["AAAAA", "AB"], dtype=object))
+    assert doc.tolist() == [0]                    # "AB" no tiene trigramas; "AAA" una sola vez
+    assert len(gram) == 1
+
+
+def test_niveles_de_similitud():
+    cxc = ["001-002-000012345", "001-002-000067890", "FAC-99999"]
+    banco = ["TRANSF 001-002-000012345", "PAGO 67890 CLIENTE", "DEP FAC-99989", "SIN REFERENCIA"]
+    pares = pares_similares(cxc, banco)
+    sim = {(int(a), int(b)): s for a, b, s in pares.itertuples(index=False)}
+    assert sim[(0, 0)] == 1.0
+    assert sim[(1, 1)] == SIM_NUCLEO
+    assert 0.8 <= sim[(2, 2)] <= SIM_MAX_APROXIMADA
+    assert not any(b == 3 for _, b in sim)
+    # con referencia exacta no se agregan parecidos del mismo depósito
+    assert [a for a, b in sim if b == 0] == [0]
+    assert pares_similares(cxc, banco, umbral=1.0)[["i_cxc", "i_banco"]].values.tolist() == [[0, 0]]
+
+
+def test_precision_con_errores_de_tipeo():
+    rng = np.random.default_rng(1)
+    n = 2_000
+    cxc = [f"001-002-{x:09d}" for x in rng.choice(10**9, n, replace=False)]
+    banco, verdad = [], []
+    for i in rng.choice(n, 500, replace=False):
+        ref = list(cxc[i].replace("-", ""))
+        j = rng.integers(6, len(ref) - 1)
+        ref[j], ref[j + 1] = ref[j + 1], ref[j]            # dos dígitos transpuestos
+        banco.append(f"TRANSF {''.join(ref)} CLIENTE {rng.integers(100)}")
+        verdad.append(i)
+    # depósitos cuya referencia no es de ninguna factura
+    banco += [f"TRANSF 001002{x:09d}" for x in rng.choice(10**9, 500)]
+    pares = pares_similares(cxc, banco)
+    mejor = pares.sort_values(["_SIM", "i_cxc"], ascending=[False, True]).drop_duplicates("i_banco")
+    ruido = mejor["i_banco"].to_numpy() >= len(verdad)
+    assert ruido.sum() <= 5
+    mejor = mejor[~ruido]
+    aciertos = mejor["i_cxc"].to_numpy() == np.array(verdad)[mejor["i_banco"].to_numpy()]
+    assert len(mejor) >= 100
+    assert aciertos.mean() >= 0.98
@@ -0,0 +1,87 @@
+from concurrent.futures import Future
+import json
+import os
+import time
+
+import pytest
+
+from benchmarks.generadores import generar_cxc_banco
+from caat import trabajos
+
+
+class _Inmediato:
+    """Pool que ejecuta en el mismo proceso al enviar (o deja el trabajo en cola)."""
+
+    def __init__(self, ejecutar=True):
+        self.ejecutar = ejecutar
+
+    def submit(self, funcion, *args):
+        futuro = Future()
+        if self.ejecutar:
+            futuro.set_result(funcion(*args))
+        return futuro
+
+
+@pytest.fixture
+def archivos(tmp_path):
+    cxc, banco = generar_cxc_banco(300, semilla=1)
+    rutas = str(tmp_path / "cxc.csv"), str(tmp_path / "banco.csv")
+    cxc.to_csv(rutas[0], index=False)
+    banco.to_csv(rutas[1], index=False)
+    return rutas
+
+
+def test_trabajo_terminado_con_avance_y_resultado(tmp_path, archivos, monkeypatch):
+    monkeypatch.setattr(trabajos, "_pool", lambda: _Inmediato())
+    directorio = str(tmp_path / "trabajos")
+    id_trabajo = trabajos.enviar(*archivos, {"tol_dias": 5}, etiqueta="ana", directorio=directorio)
+    e = trabajos.estado(id_trabajo, directorio)
+    assert e["estado"] == "terminado" and e["avance"] == 1.0 and e["etiqueta"] == "ana"
+    assert e["contadores"]["filas_cxc"] == 300 and e["contadores"]["candidatos"] > 0
+    assert e["metricas"]["Conciliados"] > 0
+    assert set(trabajos.resultado(id_trabajo, directorio)) >= {"conciliados", "pend_cxc", "pagos_no_aplicados"}
+    traza = json.loads(open(os.path.join(directorio, id_trabajo, "traza.json"), encoding="utf-8").read())
+    assert any(ev["name"] == "emparejar" for ev in traza["traceEvents"])
+    assert [t["id"] for t in trabajos.listar(directorio)] == [id_trabajo]
+    assert trabajos.cancelar(id_trabajo, directorio) is False
+
+
+def test_error_queda_en_el_estado(tmp_path, monkeypatch):
+    monkeypatch.setattr(trabajos, "_pool", lambda: _Inmediato())
+    malo = tmp_path / "malo.csv"
+    malo.write_text("a,b\n1,2\n", encoding="utf-8")
+    directorio = str(tmp_path / "trabajos")
+    id_trabajo = trabajos.enviar(str(malo), str(malo), directorio=directorio)
+    e = trabajos.estado(id_trabajo, directorio)
+    assert e["estado"] == "error" and e["error"].startswith("ValueError")
+    with pytest.raises(ValueError, match="no terminó"):
+        trabajos.resultado(id_trabajo, directorio)
+
+
+def test_cancelar_en_cola_y_en_ejecucion(tmp_path, archivos, monkeypatch):
+    directorio = str(tmp_path / "trabajos")
+    monkeypatch.setattr(trabajos, "_pool", lambda: _Inmediato(ejecutar=False))
+    en_cola = trabajos.enviar(*archivos, directorio=directorio)
+    assert trabajos.cancelar(en_cola, directorio) is True
+    assert trabajos.estado(en_cola, directorio)["estado"] == "cancelado"
+
+    # en ejecución: la marca se ve al terminar la primera etapa
+    otro = trabajos.enviar(*archivos, directorio=directorio)
+    open(os.path.join(directorio, otro, "cancelar"), "w").close()
+    assert trabajos.estado(otro, directorio)["cancelacion_pedida"] is True
+    trabajos._ejecutar(otro, directorio)
+    assert trabajos.estado(otro, directorio)["estado"] == "cancelado"
+
+
+def test_interrumpido_y_limpiar(tmp_path, archivos, monkeypatch):
+    directorio = str(tmp_path / "trabajos")
+    monkeypatch.setattr(trabajos, "_pool", lambda: _Inmediato(ejecutar=False))
+    id_trabajo = trabajos.enviar(*archivos, directorio=directorio)
+    ruta = os.path.join(directorio, id_trabajo, "estado.json")
+    e = json.load(open(ruta, encoding="utf-8"))
+    trabajos._guardar(ruta, {**e, "estado": "ejecutando", "pid": 2**22 + 1})        # proceso que no existe
+    assert trabajos.estado(id_trabajo, directorio)["estado"] == "interrumpido"
+    assert trabajos.limpiar(directorio, dias=1) == 0
+    trabajos._guardar(ruta, {**e, "estado": "terminado", "fin": time.time() - 2 * 86400})
+    assert trabajos.limpiar(directorio, dias=1) == 1
+    assert trabajos.listar(directorio) == []
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from caat.transacciones import (DECODIFICADAS, SIN_DIA, Transacciones, categoria, clave_fecha, clave_id, codigos,
+                                dias, fechas)
+
+
+def test_dias_y_fechas_ida_y_vuelta():
+    f = pd.Series(pd.to_datetime(["1970-01-01", None, "2024-02-29"]))
+    d = dias(f)
+    assert d.dtype == np.int32 and d.tolist() == [0, SIN_DIA, 19782]
+    assert fechas(d).equals(f.astype("datetime64[ns]"))
+
+
+def test_clave_id_canonica():
+    assert clave_id(pd.Series([1, 2], dtype="int64")).tolist() == ["1", "2"]
+    assert clave_id(pd.Series([1.0, np.nan, 2.5])).tolist() == ["1", pd.NA, "2.5"]
+    assert clave_id(pd.Series([" 001", "1.0", "A-01", None], dtype=object)).tolist() == ["1", "1", "A-01", pd.NA]
+    cat = pd.Series(["007", "X", None, "007"], dtype="category")
+    assert clave_id(cat).tolist() == ["7", "X", pd.NA, "7"]
+
+
+def test_codigos_conjuntos_y_clave_fecha():
+    a = pd.DataFrame({"k": ["x", "y", None]})
+    b = pd.DataFrame({"k": [None, "x", "z"]})
+    ca, cb = codigos(a, b, ["k"])
+    assert ca.dtype == np.int32
+    assert ca[0] == cb[1] and ca[2] == cb[0] and cb[2] not in ca
+    assert clave_fecha(pd.to_datetime(["2024-01-01", None])).tolist() == [19723, SIN_DIA]
+    con_hora = clave_fecha(pd.to_datetime(["2024-01-01 10:00", "2024-01-01 00:00"]))
+    assert con_hora.dtype == np.int64 and con_hora[0] != con_hora[1]
+
+
+def _transacciones():
+    carga = pd.DataFrame({"Factura": ["F1", "F2", "F3"], "Monto": ["10,00", "x", "2,50"], "Cliente": ["A", "B", "A"]})
+    nucleo = pd.DataFrame({"_FILA": np.array([0, 2], dtype="int32"), "_CENT": np.array([1000, 250], dtype="int64"),
+                           "_DIA": dias(pd.to_datetime(["2024-01-01", "2024-01-03"])),
+                           "_CLI": categoria(["A", "A"]), "_REF": categoria(["F1", "F3"]),
+                           "_PLAZO": np.array([30, np.nan], dtype="float32")})
+    return Transacciones(nucleo, carga)
+
+
+def test_materializar_une_la_carga_por_fila():
+    t = _transacciones()
+    df = t.materializar()
+    assert list(df.columns) == ["Factura", "Monto", "Cliente"] + [c for c in DECODIFICADAS if c in (
+        "_FECHA", "_CENT", "_MONTO", "_REF", "_CLI", "_PLAZO", "_FILA")]
+    assert df["Factura"].tolist() == ["F1", "F3"] and df["_MONTO"].tolist() == [10.0, 2.5]
+    assert df["_FECHA"].tolist() == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-03")]
+    assert df["_CLI"].tolist() == ["A", "A"] and not isinstance(df["_CLI"].dtype, pd.CategoricalDtype)
+    assert t.materializar([1])["Factura"].tolist() == ["F3"]
+
+
+def test_columnas_derivadas_y_subconjuntos():
+    t = _transacciones()
+    assert t["_MONTO"].tolist() == [10.0, 2.5]
+    assert t["_FECHA"].iloc[1] == pd.Timestamp("2024-01-03")
+    sub = t.filas([1])
+    assert len(sub) == 1 and sub.carga is t.carga and sub["_FILA"].tolist() == [2]
+    assert t.nbytes < t.materializar().memory_usage(deep=True).sum()
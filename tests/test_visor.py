@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from caat.cache import CacheLRU
+from caat.visor import Visor, interpretar_filtro, mascara_busqueda, mascara_filtro, permutacion
+
+
+def _tabla():
+    return pd.DataFrame({"ID": [5, 3, 1, 4, 2], "Monto": [50.0, np.nan, 10.0, 40.0, 20.0],
+                         "Fecha": pd.to_datetime(["2024-01-05", "2024-01-03", None, "2024-01-04", "2024-01-02"]),
+                         "Concepto": ["Pago ACME", "dep", None, "TRANSF acme", "otro"]})
+
+
+def test_interpretar_filtro():
+    df = _tabla()
+    assert interpretar_filtro(df, "Monto", "10..40") == (10.0, 40.0)
+    assert interpretar_filtro(df, "Monto", "..40") == (None, 40.0)
+    assert interpretar_filtro(df, "Fecha", "2024-01-03..") == (pd.Timestamp("2024-01-03"), None)
+    assert interpretar_filtro(df, "Monto", "a..b") == "a..b"
+    assert interpretar_filtro(df, "Concepto", " 1..2 ") == "1..2"
+
+
+def test_mascaras_de_filtro_y_busqueda():
+    df = _tabla()
+    assert mascara_filtro(df, "Monto", (15.0, None)).tolist() == [True, False, False, True, True]
+    assert mascara_filtro(df, "Fecha", (None, pd.Timestamp("2024-01-03"))).tolist() == [False, True, False, False, True]
+    assert mascara_filtro(df, "Concepto", "ACME").tolist() == [True, False, False, True, False]
+    assert mascara_busqueda(df, "2024-01-04").tolist() == [False, False, False, True, False]
+    assert mascara_busqueda(df, "3").tolist() == [False, True, False, False, False]
+
+
+def test_permutacion_estable_con_nulos_al_final_y_tipos_mezclados():
+    df = _tabla()
+    assert permutacion(df, "Monto").tolist() == [2, 4, 3, 0, 1]
+    assert permutacion(df, "Monto", ascendente=False).tolist() == [0, 3, 4, 2, 1]
+    mezclado = pd.DataFrame({"x": pd.Series([2, "b", 1, "a"], dtype=object)})
+    assert permutacion(mezclado, "x").tolist() == [2, 0, 3, 1]
+
+
+def test_paginas_con_consulta():
+    df = pd.DataFrame({"n": np.arange(120), "par": np.where(np.arange(120) % 2 == 0, "si", "no")})
+    v = Visor(df, "t")
+    pag, total = v.pagina(2, 25, orden="n", ascendente=False, filtros={"par": "si"})
+    assert total == 60 and pag["n"].tolist() == list(range(68, 18, -2))
+    assert v.pagina(9, 25)[0].empty
+    assert v.pagina(1, 10, filtros={"par": "", "otra": "x"})[1] == 120       # filtros vacíos o ajenos no cuentan
+
+
+def test_cache_reutiliza_orden_y_filtros():
+    df = _tabla()
+    cache = CacheLRU(2**20)
+    v = Visor(df, "t", cache)
+    v.pagina(1, 2, orden="Monto", filtros={"Concepto": "acme"})
+    fallos = cache.fallos
+    v.pagina(2, 2, orden="Monto", filtros={"Concepto": "acme"})
+    assert cache.fallos == fallos                           # otra página: ni orden ni filtro de nuevo
+    pyarrow = pytest.importorskip("pyarrow")
+    tabla, total = v.pagina_arrow(1, 2, orden="Monto")
+    assert isinstance(tabla, pyarrow.Table) and total == 5
+    assert v.pagina_arrow(1, 2, orden="Monto")[0] is tabla